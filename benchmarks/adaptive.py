@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+How close AdaptiveRateLimiter gets to a server's sustainable rate with no
+tuning: worker threads share one client against a stub server that
+answers 429 above --server-rate requests per second.
+
+    $ python -m benchmarks.adaptive --server-rate 50 --seconds 20
+"""
+import argparse
+import threading
+import time
+
+from goodreads.goodreads import Goodreads
+from goodreads.metrics import MetricsRegistry
+from goodreads.ratelimit import AdaptiveRateLimiter
+from tests.stub import StubServer
+
+
+def run(server_rate, seconds, threads, start_rate):
+    limiter = AdaptiveRateLimiter(rate=start_rate)
+    metrics = MetricsRegistry()
+    done = []
+    with StubServer(rate=server_rate, burst=max(1, int(server_rate / 10))) \
+            as server:
+        g = Goodreads('key', 'secret', base_url=server.url,
+                      rate_limiter=limiter, metrics=metrics,
+                      threads=threads)
+        deadline = time.time() + seconds
+
+        def work():
+            while time.time() < deadline:
+                try:
+                    g.dev_get('user/show/', {'id': 1000001})
+                    done.append(1)
+                except Exception:
+                    pass
+
+        workers = [threading.Thread(target=work) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        while time.time() < deadline:
+            time.sleep(1)
+            print '%6.1f req/s allowed' % limiter.rate
+        for worker in workers:
+            worker.join()
+        g.close()
+        throttled = server.counts['throttled']
+    return len(done) / float(seconds), throttled, limiter.backoffs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--server-rate', type=float, default=50)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--start-rate', type=float, default=1)
+    args = parser.parse_args(argv)
+    achieved, throttled, backoffs = run(args.server_rate, args.seconds,
+                                        args.threads, args.start_rate)
+    print 'achieved %.1f req/s of %.1f (%.0f%%); %d throttled, %d backoffs' % (
+        achieved, args.server_rate, 100 * achieved / args.server_rate,
+        throttled, backoffs)
+
+
+if __name__ == '__main__':
+    main()
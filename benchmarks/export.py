@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Peak memory of a streaming export against the number of records: each
+size runs in a fresh process exporting synthetic books to a temporary file.
+
+    $ python -m benchmarks.export --format csv
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from goodreads.export import export
+from goodreads.goodreads import GoodreadsAuthor, GoodreadsBook
+
+
+class Books(object):
+    """
+    A paginator of `count` books, 20 per page.
+    """
+
+    def __init__(self, count, page=1):
+        self.count = count
+        self.cursor = page
+
+    def __iter__(self):
+        for i in xrange((self.cursor - 1) * 20, self.count):
+            self.cursor = i // 20 + 1
+            yield GoodreadsBook(
+                id=i, title='Book %d' % i, isbn='%010d' % i, pages=300,
+                description='x' * 500,
+                authors=[GoodreadsAuthor(id=str(i % 100), name='Author')])
+
+
+def peak(count, format):
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        export(lambda page: Books(count, page), path, GoodreadsBook, format)
+    finally:
+        os.remove(path)
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--format', default='jsonl')
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--child', type=int)
+    args = parser.parse_args(argv)
+    if args.child:
+        print peak(args.child, args.format)
+        return
+    for size in [int(s) for s in args.sizes.split(',')]:
+        kb = subprocess.check_output([
+            sys.executable, '-m', 'benchmarks.export', '--format',
+            args.format, '--child', str(size)])
+        print '%8d records: peak RSS %6.1f MB' % (size, int(kb) / 1024.0)
+
+
+if __name__ == '__main__':
+    main()
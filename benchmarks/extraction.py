@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Book records parsed per second: the parsers before Schema, walking an
+objectify tree by attribute into Bunch records, against the compiled
+schemas on a plain etree tree.
+
+`build` times turning already parsed elements into models; `total` adds
+parsing the document, which libxml2 does at about the same speed either way.
+The speedup is printed against the TARGET the Schema rewrite aimed for.
+The old parsers left values as objectify elements, so the schemas also
+convert types that the baseline never did.
+
+    $ python -m benchmarks.extraction
+"""
+import time
+
+from lxml import objectify
+
+from goodreads.goodreads import Bunch, GoodreadsBook
+from goodreads.schema import parse
+from tests.stub import fixture
+
+# "several times faster"
+TARGET = 3.0
+
+
+class LegacyAuthor(Bunch):
+    # GoodreadsAuthor.from_object before Schema
+    @classmethod
+    def from_object(cls, o):
+        return cls(
+            id=o.id.text,
+            name=o.name.text
+        )
+
+
+def legacy_small_book(book):
+    # GoodreadsBook.from_small_element before Schema, which called an
+    # author from_element that did not exist; from_object stands in
+    return Bunch(**{
+        'id': book.id,
+        'title': book.title,
+        'authors': [LegacyAuthor.from_object(author)
+                    for author in book.authors.iterchildren()],
+        'format': book.format,
+        'pages': book.num_pages,
+        'date': book.published,
+        'publisher': book.publisher,
+        'image': book.image_url,
+        'isbn': book.isbn,
+    })
+
+
+def legacy_books(xml):
+    return list(objectify.fromstring(xml).author.books.iterchildren())
+
+
+def schema_books(xml):
+    return list(parse(xml).iterfind('author/books/book'))
+
+
+def legacy_build(books):
+    return [legacy_small_book(b) for b in books]
+
+
+def schema_build(books):
+    return [GoodreadsBook.from_small_element(b) for b in books]
+
+
+def legacy_page(xml):
+    return legacy_build(legacy_books(xml))
+
+
+def schema_page(xml):
+    return schema_build(schema_books(xml))
+
+
+def book_page(count):
+    """
+    An author/list page of `count` books built from the recorded fixture.
+    """
+    xml = fixture('author_list_1.xml')
+    head, rest = xml.split('<book>', 1)
+    books, tail = rest.rsplit('</book>', 1)
+    book = '<book>%s</book>' % books.split('</book>', 1)[0]
+    return head + book * count + tail
+
+
+def rate(fn, arg, books, seconds=1.0):
+    runs = 0
+    started = time.time()
+    while time.time() - started < seconds:
+        fn(arg)
+        runs += 1
+    return runs * books / (time.time() - started)
+
+
+def main():
+    print '%-8s %-6s %14s %14s %8s %s' % ('books', 'stage', 'objectify/s',
+                                          'schema/s', 'speedup', 'target')
+    for count in (10, 200, 2000):
+        xml = book_page(count)
+        assert ([b.title.text for b in legacy_page(xml)] ==
+                [b.title for b in schema_page(xml)])
+        stages = (
+            ('build', legacy_build, legacy_books(xml),
+             schema_build, schema_books(xml)),
+            ('total', legacy_page, xml, schema_page, xml),
+        )
+        for stage, legacy, legacy_arg, schema, schema_arg in stages:
+            before = rate(legacy, legacy_arg, count)
+            after = rate(schema, schema_arg, count)
+            speedup = after / before
+            print '%-8d %-6s %14.0f %14.0f %7.1fx %s' % (
+                count, stage, before, after, speedup,
+                'met' if speedup >= TARGET else
+                'short by %.1fx' % (TARGET / speedup))
+
+
+if __name__ == '__main__':
+    main()
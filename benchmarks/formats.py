@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Decode cost of the XML and JSON representations of book/show, from body
+bytes to models, on the recorded fixtures.  The JSON response holds only
+the reviews widget, so its figure is the cost of that alone, not of a
+whole book.
+
+    $ python -m benchmarks.formats
+"""
+import json
+import time
+
+from goodreads.goodreads import GoodreadsBook
+from goodreads.schema import parse
+from tests.stub import fixture
+
+
+def from_xml(body):
+    return GoodreadsBook.from_element(parse(body).find('book'))
+
+
+def from_xml_lazy(body):
+    return GoodreadsBook.from_element(parse(body).find('book'), lazy=True)
+
+
+def from_json(body):
+    return GoodreadsBook.from_widget(json.loads(body))
+
+
+ENDPOINTS = (
+    ('book/show', (
+        ('xml', from_xml, fixture('book_show.xml')),
+        ('xml lazy', from_xml_lazy, fixture('book_show.xml')),
+        ('json', from_json, fixture('book_show.json')),
+    )),
+)
+
+
+def rate(decode, body, seconds=1.0):
+    runs = 0
+    started = time.time()
+    while time.time() - started < seconds:
+        decode(body)
+        runs += 1
+    return runs / (time.time() - started)
+
+
+def main():
+    print '%-12s %-9s %8s %12s' % ('endpoint', 'format', 'bytes', 'decodes/s')
+    for endpoint, formats in ENDPOINTS:
+        for name, decode, body in formats:
+            print '%-12s %-9s %8d %12.0f' % (endpoint, name, len(body),
+                                             rate(decode, body))
+
+
+if __name__ == '__main__':
+    main()
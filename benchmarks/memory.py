@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Bytes held per model instance, before (Bunch, per-instance __dict__) and
+after (fixed __slots__ layout).
+
+    $ python -m benchmarks.memory
+"""
+import sys
+
+from goodreads.goodreads import Bunch, GoodreadsAuthor, GoodreadsBook
+
+SMALL = ('id', 'title', 'authors', 'format', 'pages', 'date', 'publisher',
+         'image', 'isbn')
+
+
+class LegacyBook(Bunch):
+    pass
+
+
+def instance_size(obj):
+    """
+    Size of the instance itself; field values are shared and not counted.
+    """
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def values(fields):
+    author = GoodreadsAuthor(id='2001', name='Ursula K. Le Guin')
+    sample = {'id': 3001, 'authors': [author], 'pages': 387,
+              'average_rating': 4.21, 'is_ebook': False}
+    return dict((f, sample.get(f, 'x')) for f in fields)
+
+
+def main():
+    rows = [
+        ('small', values(SMALL)),
+        ('full', values(GoodreadsBook.field_names)),
+    ]
+    print '%-8s %10s %10s %8s' % ('record', 'Bunch', '__slots__', 'saved')
+    for label, kwds in rows:
+        before = instance_size(LegacyBook(**kwds))
+        after = instance_size(GoodreadsBook(**kwds))
+        print '%-8s %10d %10d %7.0f%%' % (
+            label, before, after, 100.0 * (before - after) / before)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Parser hot-path benchmarks on the recorded (anonymized) fixtures in
+tests/fixtures; no network access is needed.
+
+Each case reports objects parsed per second and what one object leaves
+allocated: Python 2 has no tracemalloc, so allocations are counted as the
+gc-tracked objects (and their bytes) still alive after the call.  Results
+are printed, or written with --output, as JSON; --baseline compares against
+an earlier run and exits non-zero when a case slowed down by more than
+--tolerance.
+
+    $ python -m benchmarks.parsers --output parsers.json
+    $ python -m benchmarks.parsers --baseline parsers.json
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import urlparse
+
+from goodreads.cache import CachedResponse
+from goodreads.goodreads import (Goodreads, GoodreadsBook, GoodreadsUser,
+                                 GoodreadsWork)
+from goodreads.ratelimit import RateLimiter
+from goodreads.schema import parse
+from tests.stub import ROUTES, fixture
+
+
+class Replay(object):
+    """
+    Serves the fixtures in place of the transport.
+    """
+
+    def body(self, url, params=None):
+        url = urlparse.urlparse(url)
+        params = dict(urlparse.parse_qsl(url.query), **(params or {}))
+        return fixture(ROUTES[url.path] % dict({'page': 1, 'format': 'xml'},
+                                               **params))
+
+    def request(self, method, url, params=None, **kwargs):
+        return CachedResponse(url, 200, {}, self.body(url, params), 0)
+
+    def get(self, url, params=None, **kwargs):
+        return self.request('GET', url, params)
+
+    def close(self):
+        pass
+
+
+def client():
+    return Goodreads('key', 'secret', 'token', 'token_secret',
+                     transport=Replay(),
+                     rate_limiter=RateLimiter(rate=1e9, burst=1000))
+
+
+def elements(name, path):
+    return parse(fixture(name)).findall(path)
+
+
+def models(build, items):
+    """
+    A call building a model from each of items.
+    """
+    return lambda: [build(item) for item in items], len(items)
+
+
+def cases(g):
+    """
+    (name, setup) pairs; setup returns (call, objects per call).
+    """
+    return [
+        ('GoodreadsUser.from_object', lambda: models(
+            GoodreadsUser.from_object, elements('user_show.xml', 'user'))),
+        ('GoodreadsBook.from_element', lambda: models(
+            GoodreadsBook.from_element, elements('book_show.xml', 'book'))),
+        ('GoodreadsBook.from_small_element', lambda: models(
+            GoodreadsBook.from_small_element,
+            elements('author_list_1.xml', 'author/books/book'))),
+        ('GoodreadsWork.from_object', lambda: models(
+            GoodreadsWork.from_object,
+            elements('book_show.xml', 'book/work'))),
+        ('user/show', lambda: (lambda: g.user(1000001), 1)),
+        ('author/show', lambda: (lambda: g.author(2001), 1)),
+        ('author/list', lambda: (lambda: list(g.author_books(2001)), 25)),
+        ('user/compare', lambda: (lambda: g.user_compare(1000002), 1)),
+        ('notifications', lambda: (
+            lambda: list(g.user_notifications()), 2)),
+    ]
+
+
+def throughput(call, count, seconds, repeat=3):
+    """
+    Best of `repeat` timed runs, which filters out scheduler noise.
+    """
+    best = 0
+    for _ in xrange(repeat):
+        runs = 0
+        started = time.time()
+        while time.time() - started < seconds / repeat:
+            call()
+            runs += 1
+        best = max(best, runs * count / (time.time() - started))
+    return best
+
+
+def allocations(call, count, runs=20):
+    """
+    gc-tracked objects and bytes left alive per object parsed.
+    """
+    call()  # warm caches and lazily built state
+    gc.collect()
+    gc.disable()
+    try:
+        before = set(id(o) for o in gc.get_objects())
+        results = [call() for _ in xrange(runs)]
+        gc.collect()
+        new = [o for o in gc.get_objects() if id(o) not in before]
+    finally:
+        gc.enable()
+    new = [o for o in new if o is not results and o is not before]
+    objects = len(new)
+    size = sum(sys.getsizeof(o) for o in new)
+    per = float(runs * count)
+    return objects / per, size / per
+
+
+def run(seconds=1.0, only=None):
+    results = {}
+    with client() as g:
+        for name, setup in cases(g):
+            if only and only not in name:
+                continue
+            call, count = setup()
+            objects, size = allocations(call, count)
+            results[name] = {
+                'objects_per_sec': round(throughput(call, count, seconds), 1),
+                'allocated_objects': round(objects, 2),
+                'allocated_bytes': round(size, 1),
+            }
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    slower = []
+    for name, result in sorted(results.items()):
+        before = baseline.get(name, {}).get('objects_per_sec')
+        if before and result['objects_per_sec'] < before * (1 - tolerance):
+            slower.append((name, before, result['objects_per_sec']))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--seconds', type=float, default=1.0,
+                        help='time spent measuring each case')
+    parser.add_argument('--only', help='run cases whose name contains this')
+    parser.add_argument('--output', help='write the JSON results here')
+    parser.add_argument('--baseline', help='JSON results to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed fractional slowdown (default 0.2)')
+    args = parser.parse_args(argv)
+
+    results = {
+        'python': sys.version.split()[0],
+        'cases': run(args.seconds, args.only),
+    }
+    data = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(data + '\n')
+    else:
+        print data
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['cases']
+        slower = regressions(results['cases'], baseline, args.tolerance)
+        for name, before, after in slower:
+            sys.stderr.write('%s: %.0f -> %.0f objects/s\n' % (
+                name, before, after))
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
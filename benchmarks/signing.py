@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+OAuth signing cost, and signed against unsigned round trips to the bundled
+stub server.
+
+Signing compares goodreads.signing.Signer with building and signing an
+oauth2.Request the way oauth2.Client does for every call.  Round trips
+compare oauth2.Client (httplib2), OAuth requests through the pooled
+transport and developer-key requests.
+
+    $ python -m benchmarks.signing
+"""
+import time
+
+import oauth2 as oauth
+
+from goodreads.goodreads import Goodreads
+from goodreads.ratelimit import RateLimiter
+from goodreads.signing import Signer
+from tests.stub import StubServer
+
+CONSUMER = oauth.Consumer('key', 'secret')
+TOKEN = oauth.Token('token', 'token_secret')
+URL = 'http://www.goodreads.com/user/compare/1.xml'
+PARAMS = {'id': '1000002', 'page': '2'}
+
+
+def oauth2_sign():
+    request = oauth.Request.from_consumer_and_token(
+        CONSUMER, TOKEN, 'GET', URL, dict(PARAMS), is_form_encoded=True)
+    request.sign_request(oauth.SignatureMethod_HMAC_SHA1(), CONSUMER, TOKEN)
+    return request.to_url()
+
+
+def signer_sign(signer=Signer(CONSUMER, TOKEN)):
+    return signer.sign('GET', URL, PARAMS)
+
+
+def rate(call, seconds=1.0):
+    runs = 0
+    started = time.time()
+    while time.time() - started < seconds:
+        call()
+        runs += 1
+    return runs / (time.time() - started)
+
+
+def round_trips(server, seconds):
+    g = Goodreads('key', 'secret', 'token', 'token_secret',
+                  base_url=server.url, rate_limiter=RateLimiter(1e9, 1000))
+    client = oauth.Client(CONSUMER, TOKEN)
+    url = '%s/user/compare/1.xml?id=1000002' % server.url
+    try:
+        return [
+            ('oauth2.Client', rate(lambda: client.request(url), seconds)),
+            ('signed, pooled', rate(
+                lambda: g.client_get('user/compare/1.xml', {'id': 1000002}),
+                seconds)),
+            ('developer key', rate(
+                lambda: g.dev_get('user/show/', {'id': 1000001}), seconds)),
+        ]
+    finally:
+        g.close()
+
+
+def main(seconds=1.0):
+    print '%-16s %14s' % ('signing', 'signatures/s')
+    for name, call in (('oauth2.Request', oauth2_sign),
+                       ('Signer', signer_sign)):
+        print '%-16s %14.0f' % (name, rate(call, seconds))
+    print
+    print '%-16s %14s' % ('round trip', 'requests/s')
+    with StubServer() as server:
+        for name, result in round_trips(server, seconds):
+            print '%-16s %14.0f' % (name, result)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,15 @@ __author__ = 'Paul Shannon'
 __email__ = 'paul@paulshannon.ca'
 __version__ = '0.1.3'
 
-__all__ = ["Goodreads"]
+__all__ = ["AsyncGoodreads", "Catalog", "EntityCache", "Goodreads",
+           "ISBNResolver", "MetricsRegistry", "RateLimiter", "ResponseCache",
+           "Transport"]
 
 from goodreads import Goodreads
+from async_client import AsyncGoodreads
+from catalog import Catalog
+from isbn import ISBNResolver
+from cache import EntityCache, ResponseCache
+from metrics import MetricsRegistry
+from ratelimit import RateLimiter
+from transport import Transport
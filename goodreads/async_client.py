@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import Queue
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from goodreads import Goodreads
+from transport import Transport
+
+
+class AsyncGoodreads(object):
+    """
+    Concurrent counterpart to Goodreads.
+
+    Endpoint methods return concurrent.futures.Future objects instead of
+    blocking; at most `concurrency` requests are in flight at once and all of
+    them share one pooled transport and one rate limiter.  A lookup made
+    while an identical one is still pending gets the pending one's Future;
+    `coalesced` counts them.
+    """
+
+    def __init__(self, developer_key=None, developer_secret=None,
+                 user_token=None, user_secret=None, concurrency=10,
+                 transport=None, rate_limiter=None, client=None,
+                 base_url=None):
+        if client is None:
+            client = Goodreads(
+                developer_key, developer_secret, user_token, user_secret,
+                transport=transport or Transport(pool_maxsize=concurrency),
+                rate_limiter=rate_limiter, base_url=base_url)
+        self.client = client
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.coalesced = 0
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def _coalesce(self, key, fn, *args):
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = self._inflight[key] = self.submit(fn, *args)
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def _forget(self, key, future):
+        with self._inflight_lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # ############### API #################
+
+    def user(self, user_id=None, username=None):
+        return self._coalesce(('user', user_id, username), self.client.user,
+                              user_id, username)
+
+    def auth_user(self):
+        return self._coalesce(('auth_user',), self.client.auth_user)
+
+    def user_notifications(self, page=1):
+        return self.submit(
+            lambda: list(self.client.user_notifications(page=page)))
+
+    def user_compare(self, other_user_id):
+        return self._coalesce(('user_compare', str(other_user_id)),
+                              self.client.user_compare, other_user_id)
+
+    def author(self, author_id):
+        return self._coalesce(('author', str(author_id)), self.client.author,
+                              author_id)
+
+    def author_books(self, author_id, limit=None, buffer_size=50):
+        """
+        Iterate an author's books while later pages are fetched on a worker.
+        """
+        queue = Queue.Queue(maxsize=buffer_size)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    queue.put(item, timeout=0.1)
+                    return True
+                except Queue.Full:
+                    pass
+            return False
+
+        def produce():
+            try:
+                for book in self.client.author_books(author_id, limit):
+                    if not put((book, None)):
+                        return
+            except Exception as e:
+                put((None, e))
+            put((done, None))
+
+        self.submit(produce)
+        try:
+            while True:
+                book, error = queue.get()
+                if error is not None:
+                    raise error
+                if book is done:
+                    return
+                yield book
+        finally:
+            stop.set()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from collections import deque, OrderedDict
+from itertools import islice
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class Result(object):
+    """
+    Outcome of one id in a bulk lookup: the model, or the exception that
+    looking it up raised.
+    """
+    __slots__ = ('id', 'value', 'error')
+
+    def __init__(self, id, value=None, error=None):
+        self.id = id
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return '<Result:%s %r>' % (self.id, self.value)
+        return '<Result:%s error=%r>' % (self.id, self.error)
+
+
+def _result(id, future):
+    try:
+        return Result(id, future.result())
+    except Exception as e:
+        return Result(id, error=e)
+
+
+def _done(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def chunks(iterable, size):
+    """
+    Lists of up to `size` consecutive items, reading `iterable` lazily.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def fetch_many(fetch, ids, workers=4, cached=None, window=None, memo=10000):
+    """
+    Yield a Result per id, in input order, while fetch(id) runs on up to
+    `workers` threads.
+
+    `ids` may be any iterable and is read lazily: no more than `window`
+    (default 4 * workers) ids are in flight or waiting to be yielded at a
+    time.  cached(id) returns a model to use without a request, or None.
+    Repeats of an id among the last `memo` distinct ids share one lookup.
+    A failed lookup becomes a Result with `error` set; the batch goes on.
+    """
+    window = window or workers * 4
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = OrderedDict()
+    pending = deque()
+    try:
+        for id in ids:
+            key = str(id)
+            future = futures.get(key)
+            if future is None:
+                value = cached(id) if cached is not None else None
+                if value is not None:
+                    future = _done(value)
+                else:
+                    future = executor.submit(fetch, id)
+                futures[key] = future
+                if len(futures) > memo:
+                    futures.popitem(last=False)
+            pending.append((id, future))
+            while pending and (len(pending) >= window or
+                               pending[0][1].done()):
+                yield _result(*pending.popleft())
+        while pending:
+            yield _result(*pending.popleft())
+    finally:
+        # abandoned early: drop what has not started
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+from datetime import timedelta
+from urllib import urlencode
+import cPickle as pickle
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# params never part of a cache key
+IGNORED_PARAMS = ('key',)
+
+
+class CachedResponse(object):
+    """
+    A stored response; quacks like requests.Response for the parsers.
+    """
+    from_cache = True
+    elapsed = timedelta(0)
+
+    def __init__(self, url, status_code, headers, content, stored):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.stored = stored
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        for i in xrange(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+    def validators(self):
+        """
+        Headers for a conditional request revalidating this response.
+        """
+        headers = {}
+        if self.headers.get('etag'):
+            headers['If-None-Match'] = self.headers['etag']
+        if self.headers.get('last-modified'):
+            headers['If-Modified-Since'] = self.headers['last-modified']
+        return headers
+
+
+class ResponseCache(object):
+    """
+    Persistent, size-bounded LRU cache of GET responses.
+
+    Entries live one per file under `path`; the file mtime doubles as the LRU
+    clock so eviction order survives restarts.  `ttls` maps url prefixes to
+    lifetimes in seconds (longest prefix wins), anything else gets `ttl`.
+    """
+    kept_headers = ('content-type', 'etag', 'last-modified')
+
+    def __init__(self, path, max_size=100 * 1024 * 1024, ttl=3600, ttls=None,
+                 clock=time.time):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.ttls = sorted((ttls or {}).items(), key=lambda i: -len(i[0]))
+        self.clock = clock
+        self.size = 0
+        self._index = OrderedDict()
+        self._lock = threading.Lock()
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._load()
+
+    def _load(self):
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith('.cache'):
+                st = os.stat(os.path.join(self.path, name))
+                entries.append((st.st_mtime, name[:-6], st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.size += size
+
+    def _file(self, key):
+        return os.path.join(self.path, '%s.cache' % key)
+
+    @staticmethod
+    def key(url, params=None):
+        params = sorted((k, v) for k, v in (params or {}).items()
+                        if v is not None and k not in IGNORED_PARAMS)
+        return hashlib.sha1('%s?%s' % (url, urlencode(params))).hexdigest()
+
+    def ttl_for(self, url):
+        for prefix, ttl in self.ttls:
+            if url.startswith(prefix):
+                return ttl
+        return self.ttl
+
+    def fresh(self, url, response):
+        return self.clock() - response.stored < self.ttl_for(url)
+
+    def get(self, url, params=None):
+        """
+        Return the stored response, fresh or stale, or None.
+        """
+        key = self.key(url, params)
+        with self._lock:
+            if key not in self._index:
+                return None
+            try:
+                with open(self._file(key), 'rb') as f:
+                    response = CachedResponse(**pickle.load(f))
+                os.utime(self._file(key), None)
+            except (IOError, OSError, EOFError, TypeError,
+                    pickle.UnpicklingError):
+                self._discard(key)
+                return None
+            self._index[key] = self._index.pop(key)
+            return response
+
+    def set(self, url, params, response):
+        headers = dict((h, response.headers[h]) for h in self.kept_headers
+                       if h in response.headers)
+        entry = CachedResponse(url, response.status_code, headers,
+                               response.content, self.clock())
+        self._write(self.key(url, params), entry)
+        return entry
+
+    def refresh(self, url, params, response):
+        """
+        Restart the lifetime of a response the server says is unchanged.
+        """
+        response.stored = self.clock()
+        self._write(self.key(url, params), response)
+        return response
+
+    def _write(self, key, entry):
+        data = pickle.dumps(vars(entry), pickle.HIGHEST_PROTOCOL)
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        with self._lock:
+            os.rename(tmp, self._file(key))
+            self.size -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self.size += len(data)
+            while self.size > self.max_size and len(self._index) > 1:
+                self._discard(next(iter(self._index)))
+
+    def _discard(self, key):
+        self.size -= self._index.pop(key, 0)
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._discard(key)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+
+class EntityCache(object):
+    """
+    In-memory identity map of parsed models keyed by (type, id).
+
+    Bounded by entry count, age and an estimate of the memory held; the
+    oldest entries go first unless they were read since the last eviction
+    pass (second chance).  Entities parsed from a partial record (an author
+    inside a book listing, say) are stored as incomplete so they can be
+    shared by parsers without being served for a full lookup.
+
+    Reads take no lock, so the hit and miss counts are approximate when
+    many threads share the cache.
+    """
+
+    def __init__(self, max_entries=10000, ttl=3600,
+                 max_bytes=64 * 1024 * 1024, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        # keys read since they were last considered for eviction
+        self._used = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def sizeof(obj):
+        size = sys.getsizeof(obj)
+        attrs = getattr(obj, '__dict__', None)
+        if attrs is not None:
+            size += sys.getsizeof(attrs)
+            values = attrs.itervalues()
+        else:
+            # the slots themselves: reading a lazy field would build it
+            values = (getattr(obj, slot)
+                      for _, slot in getattr(obj, 'field_slots', ()))
+        for value in values:
+            size += sys.getsizeof(value)
+            # a Deferred holds its collection as serialized XML
+            data = getattr(value, 'data', None)
+            if isinstance(data, str):
+                size += len(data)
+        return size
+
+    def get(self, cls, id, complete=False):
+        key = (cls.__name__, str(id))
+        # a plain dict lookup is atomic; only expiry needs the lock
+        entry = self._entries.get(key)
+        if entry is not None and self.clock() - entry[1] >= self.ttl:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._discard(key)
+                    self.evictions += 1
+            entry = None
+        if entry is None or (complete and not entry[2]):
+            self.misses += 1
+            return None
+        self._used[key] = True
+        self.hits += 1
+        return entry[0]
+
+    def set(self, obj, complete=True):
+        key = (obj.__class__.__name__, str(obj.id))
+        size = self.sizeof(obj)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current[2] and not complete:
+                return current[0]
+            self._discard(key)
+            self._entries[key] = (obj, self.clock(), complete, size)
+            self.bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or
+                                     self.bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                if self._used.pop(oldest, False) and oldest != key:
+                    self._entries[oldest] = self._entries.pop(oldest)
+                    continue
+                self._discard(oldest)
+                self.evictions += 1
+        return obj
+
+    def _discard(self, key):
+        self._used.pop(key, None)
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[3]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._used.clear()
+            self.bytes = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,470 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Persistent local mirror of the books, authors, works and users a client
+has parsed, in one SQLite file.
+
+    >>> g = Goodreads(key, secret, catalog=Catalog('catalog.db'))
+
+The client then reads through it: a lookup that finds a fresh enough copy
+is served without a request, and whatever it fetches is written back.
+Writes are buffered and upserted in batched transactions; the database
+runs in WAL mode so any number of processes can read while one writes.
+
+Entities are stored as JSON, field by field, so a catalog written by one
+release reads in another as long as the fields it holds still exist; a row
+naming a field, model or builder this release does not know is a miss.
+Files of another layout are refused.
+"""
+from collections import OrderedDict
+from datetime import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from goodreads import (Deferred, GoodreadsAuthor, GoodreadsBook,
+                       GoodreadsReview, GoodreadsUser, GoodreadsWork, Model)
+from isbn import normalize
+
+# PRAGMA user_version of the files this version reads and writes
+LAYOUT = 1
+
+# the models rows may contain
+MODELS = dict((cls.__name__, cls) for cls in (
+    GoodreadsAuthor, GoodreadsBook, GoodreadsReview, GoodreadsUser,
+    GoodreadsWork))
+
+TABLES = OrderedDict([
+    ('GoodreadsBook', 'books'),
+    ('GoodreadsAuthor', 'authors'),
+    ('GoodreadsWork', 'works'),
+    ('GoodreadsUser', 'users'),
+])
+
+# columns every table has; books add their lookup keys
+COLUMNS = ('id', 'complete', 'stored', 'data')
+BOOK_KEYS = ('isbn', 'isbn13', 'asin')
+
+SCHEMA = ['''
+CREATE TABLE IF NOT EXISTS %s (
+    id TEXT PRIMARY KEY,
+    complete INTEGER NOT NULL,
+    stored REAL NOT NULL,
+    data TEXT NOT NULL%s
+)''' % (table, ''.join(',\n    %s TEXT' % k for k in BOOK_KEYS)
+        if table == 'books' else '') for table in TABLES.values()] + [
+    'CREATE INDEX IF NOT EXISTS books_%s ON books (%s)' % (k, k)
+    for k in BOOK_KEYS] + ['''
+CREATE TABLE IF NOT EXISTS book_authors (
+    author_id TEXT NOT NULL,
+    book_id TEXT NOT NULL,
+    PRIMARY KEY (author_id, book_id)
+)''', '''
+CREATE TABLE IF NOT EXISTS isbns (
+    isbn TEXT PRIMARY KEY,
+    book_id TEXT NOT NULL,
+    stored REAL NOT NULL
+)''', '''
+CREATE TABLE IF NOT EXISTS states (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+)''']
+
+# bound parameters per statement stay under SQLite's default limit of 999
+MAX_VARIABLES = 500
+
+DATETIME = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def _scalar(value):
+    if isinstance(value, (Model, Deferred)):
+        return False
+    if isinstance(value, (list, tuple)):
+        return not any(isinstance(v, (Model, Deferred)) for v in value)
+    return True
+
+
+def _encode(value, nested=False):
+    """
+    A model, or anything held in one, as JSON values; what JSON has no
+    type for is tagged with a '$' key.
+
+    Models held by a model keep only their scalar fields, as in export:
+    an author's books do not bring their authors along, which with an
+    EntityCache would lead back to the author itself.
+    """
+    if isinstance(value, Model):
+        fields = value.__getstate__()
+        if nested:
+            fields = dict((k, v) for k, v in fields.iteritems()
+                          if _scalar(v))
+        return {'$model': type(value).__name__,
+                'fields': dict((k, _encode(v, True)) for k, v in
+                               fields.iteritems())}
+    if isinstance(value, Deferred):
+        return {'$deferred': [value.owner.__name__, value.builder,
+                              value.data]}
+    if isinstance(value, datetime):
+        return {'$datetime': value.strftime(DATETIME)}
+    if isinstance(value, tuple):
+        return {'$tuple': [_encode(v, nested) for v in value]}
+    if isinstance(value, list):
+        return [_encode(v, nested) for v in value]
+    if isinstance(value, dict):
+        return {'$dict': [[_encode(k, nested), _encode(v, nested)]
+                          for k, v in value.iteritems()]}
+    if value is None or isinstance(value, (basestring, int, long, float)):
+        return value
+    raise TypeError('cannot store %r in the catalog' % (value,))
+
+
+def _decode_object(d):
+    if '$model' in d:
+        cls = MODELS[d['$model']]
+        obj = cls.__new__(cls)
+        # raises TypeError for a field the model no longer has
+        obj.__setstate__(d['fields'])
+        return obj
+    if '$deferred' in d:
+        owner, builder, data = d['$deferred']
+        owner = MODELS[owner]
+        if not builder.startswith('_parse_') or \
+                not hasattr(owner, builder):
+            raise ValueError('unknown builder %s' % builder)
+        deferred = Deferred.__new__(Deferred)
+        deferred.__setstate__((owner, str(builder), data.encode('utf-8')))
+        return deferred
+    if '$datetime' in d:
+        return datetime.strptime(d['$datetime'], DATETIME)
+    if '$tuple' in d:
+        return tuple(d['$tuple'])
+    if '$dict' in d:
+        return dict((k, v) for k, v in d['$dict'])
+    return d
+
+
+def dumps(value):
+    return json.dumps(_encode(value), separators=(',', ':'))
+
+
+def loads(data):
+    """
+    The value stored as `data`, or None if this release cannot read it.
+    """
+    try:
+        return json.loads(data, object_hook=_decode_object)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class Catalog(object):
+    """
+    SQLite catalog of parsed models, keyed by type and id.
+
+    Entries are stored as JSON with the time they were stored (models they
+    hold keep their scalar fields only); get() only returns entries younger
+    than the type's lifetime, `ttls` mapping type names to seconds and
+    `ttl` covering the rest.  Like EntityCache, entities parsed from a
+    partial record are kept as incomplete and never replace a complete
+    one.
+
+    add() buffers up to `batch_size` entities, or `flush_interval` seconds
+    of them, before writing them in one transaction; buffered entities are
+    already visible to get() in this process.  Call flush() or close() to
+    write the rest.  Each thread (and process) uses its own connection.
+    """
+
+    def __init__(self, path, ttl=24 * 3600, ttls=None, batch_size=500,
+                 flush_interval=1.0, timeout=30.0, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._pending = OrderedDict()
+        self._flushed = clock()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = []
+        with self._connection() as connection:
+            layout = connection.execute('PRAGMA user_version').fetchone()[0]
+            exists = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'books'").fetchone()
+            if exists and layout != LAYOUT:
+                raise ValueError('%s is a catalog of layout %d, not %d' % (
+                    path, layout, LAYOUT))
+            for statement in SCHEMA:
+                connection.execute(statement)
+            connection.execute('PRAGMA user_version = %d' % LAYOUT)
+
+    def _connection(self):
+        local = self._local
+        # a connection must not be used across fork()
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.text_factory = str
+            # readers never block the writer nor each other
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            local.connection, local.pid = connection, os.getpid()
+            with self._lock:
+                self._connections.append(connection)
+        return local.connection
+
+    def ttl_for(self, name):
+        return self.ttls.get(name, self.ttl)
+
+    @staticmethod
+    def table(cls):
+        try:
+            return TABLES[cls.__name__]
+        except KeyError:
+            raise TypeError('%s is not stored in the catalog' % cls.__name__)
+
+    # Reading
+
+    def get(self, cls, id, complete=True, max_age=None):
+        """
+        The stored entity, if it is at most `max_age` seconds old (default:
+        its type's lifetime); None otherwise.
+        """
+        key = (cls.__name__, str(id))
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            obj, stored_complete, stored = pending
+        else:
+            row = self._connection().execute(
+                'SELECT complete, stored, data FROM %s WHERE id = ?' %
+                self.table(cls), key[1:]).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            obj = None
+            stored_complete, stored, data = row
+        if max_age is None:
+            max_age = self.ttl_for(cls.__name__)
+        if (complete and not stored_complete) or \
+                self.clock() - stored >= max_age:
+            self.misses += 1
+            return None
+        if obj is None:
+            obj = loads(data)
+            if not isinstance(obj, cls):
+                self.misses += 1
+                return None
+        self.hits += 1
+        return obj
+
+    def find_books(self, isbn=None, isbn13=None, asin=None, author_id=None,
+                   max_age=None, complete=True):
+        """
+        Fresh books with the given ISBN, ISBN13, ASIN or author; like get(),
+        only complete ones unless complete=False.
+        """
+        self.flush()
+        if author_id is not None:
+            query = ('SELECT b.stored, b.data FROM books b JOIN book_authors a'
+                     ' ON a.book_id = b.id WHERE a.author_id = ?')
+            value = str(author_id)
+            if complete:
+                query += ' AND b.complete = 1'
+        else:
+            (column, value), = [(k, v) for k, v in (
+                ('isbn', isbn), ('isbn13', isbn13), ('asin', asin))
+                if v is not None]
+            query = 'SELECT stored, data FROM books WHERE %s = ?' % column
+            if complete:
+                query += ' AND complete = 1'
+        if max_age is None:
+            max_age = self.ttl_for('GoodreadsBook')
+        now = self.clock()
+        books = (loads(data) for stored, data in
+                 self._connection().execute(query, (value,))
+                 if now - stored < max_age)
+        return [book for book in books if isinstance(book, GoodreadsBook)]
+
+    def book_by_isbn(self, isbn, max_age=None, complete=True):
+        """
+        A fresh (complete) book with this ISBN-10 or ISBN-13, or None.
+        """
+        isbn = str(isbn)
+        if len(isbn) == 13:
+            books = self.find_books(isbn13=isbn, max_age=max_age,
+                                    complete=complete)
+        else:
+            books = self.find_books(isbn=isbn, max_age=max_age,
+                                    complete=complete)
+        return books[0] if books else None
+
+    def isbn_ids(self, isbns, max_age=None):
+        """
+        Book ids by ISBN-13 for those of `isbns` (ISBN-13s) in the ISBN
+        index, as fresh as books must be.
+        """
+        self.flush()
+        if max_age is None:
+            max_age = self.ttl_for('GoodreadsBook')
+        isbns = list(isbns)
+        now = self.clock()
+        ids = {}
+        for start in xrange(0, len(isbns), MAX_VARIABLES):
+            batch = isbns[start:start + MAX_VARIABLES]
+            rows = self._connection().execute(
+                'SELECT isbn, book_id, stored FROM isbns WHERE isbn IN (%s)' %
+                ', '.join('?' * len(batch)), batch)
+            ids.update((isbn, int(book_id)) for isbn, book_id, stored in rows
+                       if now - stored < max_age)
+        return ids
+
+    # Writing
+
+    def add(self, obj, complete=True):
+        """
+        Store an entity, and incomplete copies of the authors of a book or
+        the books of an author.
+        """
+        self.table(type(obj))
+        now = self.clock()
+        with self._lock:
+            self._buffer(obj, complete, now)
+            if obj.__class__.__name__ == 'GoodreadsBook':
+                for author in obj.authors or ():
+                    self._buffer(author, False, now)
+            elif obj.__class__.__name__ == 'GoodreadsAuthor':
+                for book in obj.books or ():
+                    self._buffer(book, False, now)
+            due = (len(self._pending) >= self.batch_size or
+                   now - self._flushed >= self.flush_interval)
+        if due:
+            self.flush()
+        return obj
+
+    def _buffer(self, obj, complete, now):
+        key = (obj.__class__.__name__, str(obj.id))
+        current = self._pending.get(key)
+        if current is not None and current[1] and not complete:
+            return
+        self._pending[key] = (obj, complete, now)
+
+    def flush(self):
+        """
+        Write the buffered entities in one transaction.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+            self._flushed = self.clock()
+        if not pending:
+            return
+        try:
+            self._write(pending)
+        except Exception:
+            # nothing was written: buffer the batch again, under anything
+            # added since
+            with self._lock:
+                added, self._pending = self._pending, pending
+                for obj, complete, stored in added.itervalues():
+                    self._buffer(obj, complete, stored)
+            raise
+
+    def _write(self, pending):
+        rows = dict((table, ([], [])) for table in TABLES.values())
+        links = []
+        isbns = []
+        for (name, id), (obj, complete, stored) in pending.iteritems():
+            row = (id, int(complete), stored, dumps(obj))
+            if name == 'GoodreadsBook':
+                row += tuple(getattr(obj, k) for k in BOOK_KEYS)
+                links.extend((str(a.id), id) for a in obj.authors or ())
+                isbn = normalize(obj.isbn13) or normalize(obj.isbn)
+                if isbn is not None:
+                    isbns.append((isbn, id, stored))
+            rows[TABLES[name]][0 if complete else 1].append(row)
+        # one writer per process at a time; other processes wait on the
+        # database lock for up to `timeout`
+        with self._write_lock:
+            with self._connection() as connection:
+                for table, (complete, partial) in rows.iteritems():
+                    columns = COLUMNS + (BOOK_KEYS if table == 'books' else ())
+                    statement = '%%s INTO %s (%s) VALUES (%s)' % (
+                        table, ', '.join(columns),
+                        ', '.join('?' * len(columns)))
+                    if complete:
+                        connection.executemany(
+                            statement % 'INSERT OR REPLACE', complete)
+                    if partial:
+                        # never replace a complete record with a partial one
+                        connection.executemany(
+                            statement % 'INSERT OR IGNORE', partial)
+                connection.executemany(
+                    'INSERT OR IGNORE INTO book_authors (author_id, book_id) '
+                    'VALUES (?, ?)', links)
+                connection.executemany(
+                    'INSERT OR REPLACE INTO isbns (isbn, book_id, stored) '
+                    'VALUES (?, ?, ?)', isbns)
+
+    def add_isbns(self, ids):
+        """
+        Add (ISBN-13, book id) pairs to the ISBN index, in one transaction.
+        """
+        now = self.clock()
+        rows = [(isbn, str(book_id), now) for isbn, book_id in ids]
+        with self._write_lock:
+            with self._connection() as connection:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO isbns (isbn, book_id, stored) '
+                    'VALUES (?, ?, ?)', rows)
+
+    # State kept by other components, e.g. shelfsync watermarks
+
+    def get_state(self, kind, key):
+        row = self._connection().execute(
+            'SELECT data FROM states WHERE kind = ? AND key = ?',
+            (kind, str(key))).fetchone()
+        return None if row is None else loads(row[0])
+
+    def set_state(self, kind, key, value):
+        """
+        Store a value made of what entities hold (lists, dicts, datetimes
+        ...); unlike add(), written immediately.
+        """
+        data = dumps(value)
+        with self._write_lock:
+            with self._connection() as connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO states (kind, key, data) '
+                    'VALUES (?, ?, ?)', (kind, str(key), data))
+
+    def stats(self):
+        counts = dict((table, self._connection().execute(
+            'SELECT COUNT(*) FROM %s' % table).fetchone()[0])
+            for table in TABLES.values() + ['isbns'])
+        return dict(counts, hits=self.hits, misses=self.misses,
+                    pending=len(self._pending))
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.ProgrammingError:
+                # opened by another thread; it goes with that thread
+                pass
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
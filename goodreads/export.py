@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Streaming export of paginated lists to JSON Lines, CSV or Parquet.
+
+    >>> export(lambda page: g.author_books(2001, page=page), 'books.csv',
+    ...        GoodreadsBook, format='csv', checkpoint='books.csv.json')
+    {'records': 1224, 'batches': 3, 'resumed': False}
+
+Records go from the paginator to the file `batch_size` at a time, so memory
+stays flat however long the list is.  After each batch the file is synced
+and the checkpoint rewritten; an interrupted export given the same
+checkpoint cuts the file back to the last batch written and carries on
+from the page it was on.  Parquet needs pyarrow.
+"""
+import csv
+from datetime import datetime
+import json
+import os
+
+FORMATS = ('jsonl', 'csv', 'parquet')
+
+
+def _fields(cls):
+    # lazy fields are left out: exporting them would build every one
+    return [(name, kind) for klass in reversed(cls.__mro__)
+            for name, kind in getattr(klass, 'fields', ())
+            if isinstance(kind, type)]
+
+
+def _is_model(kind):
+    return isinstance(kind, type) and hasattr(kind, 'field_names')
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, 'field_names'):
+        # a model inside a list: its scalar fields only, so that e.g. an
+        # author's books do not bring their authors along
+        return dict((name, _value(getattr(value, name)))
+                    for name, kind in _fields(type(value))
+                    if kind not in (list, dict) and not _is_model(kind))
+    if isinstance(value, list):
+        return [_value(v) for v in value]
+    if hasattr(value, '__dict__'):
+        # Bunch
+        return dict((k, _value(v)) for k, v in vars(value).iteritems())
+    return value
+
+
+def record(obj):
+    """
+    A model as a dict of JSON values, nesting the models it holds.
+    """
+    rec = {}
+    for name, kind in _fields(type(obj)):
+        value = getattr(obj, name)
+        if _is_model(kind) and value is not None:
+            rec[name] = record(value)
+        else:
+            rec[name] = _value(value)
+    return rec
+
+
+def columns(cls, prefix=''):
+    """
+    (name, kind) of each flat column of a model: nested models are spread
+    into dotted columns, lists and dicts become JSON text.
+    """
+    flat = []
+    for name, kind in _fields(cls):
+        if _is_model(kind):
+            flat.extend(columns(kind, prefix + name + '.'))
+        else:
+            flat.append((prefix + name, kind if kind in
+                         (int, float, bool, datetime) else str))
+    return flat
+
+
+def flatten(rec, columns):
+    """
+    A record as a flat dict of the given columns().
+    """
+    flat = {}
+    for name, _ in columns:
+        value = rec
+        for part in name.split('.'):
+            value = value.get(part) if value is not None else None
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value, sort_keys=True)
+        flat[name] = value
+    return flat
+
+
+class JSONLWriter(object):
+    """
+    One JSON object per line.
+    """
+
+    def __init__(self, path, columns, position=None):
+        self.path = path
+        self.columns = columns
+        self.file = open(path, 'r+b' if position is not None else 'wb')
+        if position is not None:
+            self.file.truncate(position)
+            self.file.seek(position)
+
+    def position(self):
+        return self.file.tell()
+
+    def write(self, records):
+        self.file.writelines(json.dumps(r, sort_keys=True) + '\n'
+                             for r in records)
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+class CSVWriter(JSONLWriter):
+    """
+    A header row, then one row per record in columns() order; text is
+    UTF-8 and missing values are empty.
+    """
+
+    def __init__(self, path, columns, position=None):
+        JSONLWriter.__init__(self, path, columns, position)
+        self.names = [name for name, _ in columns]
+        self.writer = csv.writer(self.file)
+        if not position:
+            self.writer.writerow(self.names)
+
+    @staticmethod
+    def _cell(value):
+        if value is None:
+            return ''
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, unicode):
+            return value.encode('utf-8')
+        return value
+
+    def write(self, records):
+        for r in records:
+            r = flatten(r, self.columns)
+            self.writer.writerow([self._cell(r.get(name))
+                                  for name in self.names])
+
+
+class ParquetWriter(object):
+    """
+    A directory of Parquet files, one per batch, typed from the model's
+    fields; its position is the number of files.
+    """
+
+    def __init__(self, path, columns, position=None):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('Parquet export requires pyarrow')
+        self.pa, self.pq = pyarrow, pyarrow.parquet
+        types = {int: pyarrow.int64(), float: pyarrow.float64(),
+                 bool: pyarrow.bool_(), datetime: pyarrow.timestamp('us'),
+                 str: pyarrow.string()}
+        self.path = path
+        self.columns = columns
+        self.schema = pyarrow.schema([(name, types[kind])
+                                      for name, kind in columns])
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.parts = position or 0
+        # files past the checkpoint belong to a batch it never recorded
+        for name in os.listdir(path):
+            if name.startswith('part-') and \
+                    int(name[5:10]) >= self.parts:
+                os.remove(os.path.join(path, name))
+
+    def position(self):
+        return self.parts
+
+    def _column(self, name, kind, rows):
+        values = [row.get(name) for row in rows]
+        if kind is datetime:
+            values = [v and datetime.strptime(v[:19], '%Y-%m-%dT%H:%M:%S')
+                      for v in values]
+        elif kind is str:
+            values = [v.decode('utf-8') if isinstance(v, str) else v
+                      for v in values]
+        return self.pa.array(values,
+                             type=self.schema.field_by_name(name).type)
+
+    def write(self, records):
+        rows = [flatten(r, self.columns) for r in records]
+        table = self.pa.Table.from_arrays(
+            [self._column(name, kind, rows) for name, kind in self.columns],
+            schema=self.schema)
+        name = os.path.join(self.path, 'part-%05d.parquet' % self.parts)
+        # written under another name first, so a part is whole or absent
+        self.pq.write_table(table, name + '.tmp')
+        os.rename(name + '.tmp', name)
+        self.parts += 1
+
+    def sync(self):
+        pass
+
+    def close(self):
+        pass
+
+
+WRITERS = {'jsonl': JSONLWriter, 'csv': CSVWriter, 'parquet': ParquetWriter}
+
+
+def _load(checkpoint):
+    if checkpoint is None or not os.path.exists(checkpoint):
+        return None
+    with open(checkpoint, 'rb') as f:
+        return json.load(f)
+
+
+def _save(checkpoint, state):
+    # replaced whole, so a crash leaves the old or the new one
+    with open(checkpoint + '.tmp', 'wb') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.rename(checkpoint + '.tmp', checkpoint)
+
+
+def export(paginate, path, model, format='jsonl', batch_size=500,
+           checkpoint=None):
+    """
+    Write every item of paginate(page) (a Paginator starting at `page`) to
+    `path` as `format`, and return counts of records and batches written.
+
+    With a `checkpoint` path the export can be resumed: run again with the
+    same arguments after an interruption and it goes on from the last batch
+    written.  Resuming relies on the list keeping its order meanwhile.
+    """
+    if format not in WRITERS:
+        raise ValueError('format must be one of %s' % ', '.join(FORMATS))
+    state = _load(checkpoint)
+    if state is not None and state['done']:
+        return {'records': state['records'], 'batches': state['batches'],
+                'resumed': True}
+    resumed = state is not None
+    if state is None:
+        state = {'page': 1, 'skip': 0, 'position': None, 'records': 0,
+                 'batches': 0, 'done': False}
+    writer = WRITERS[format](path, columns(model), state['position'])
+    try:
+        start, written = state['page'], state['skip']
+        items = paginate(start)
+        # the paginator's cursor is the page of the item just yielded;
+        # `seen` counts the items of that page so far
+        page, seen = start, 0
+        batch = []
+        for item in items:
+            if items.cursor != page:
+                page, seen = items.cursor, 0
+            seen += 1
+            if page == start and seen <= written:
+                # written before the interruption
+                continue
+            batch.append(record(item))
+            if len(batch) >= batch_size:
+                _flush(writer, batch, state, page, seen, checkpoint)
+                batch = []
+        if batch:
+            _flush(writer, batch, state, page, seen, checkpoint)
+        state['done'] = True
+        if checkpoint is not None:
+            _save(checkpoint, state)
+    finally:
+        writer.close()
+    return {'records': state['records'], 'batches': state['batches'],
+            'resumed': resumed}
+
+
+def _flush(writer, batch, state, page, skip, checkpoint):
+    writer.write(batch)
+    writer.sync()
+    state.update(page=page, skip=skip, position=writer.position(),
+                 records=state['records'] + len(batch),
+                 batches=state['batches'] + 1)
+    if checkpoint is not None:
+        _save(checkpoint, state)
@@ -1,12 +1,27 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-from urllib import urlencode
+from datetime import datetime
+import json
+import threading
 import time
 import urlparse
 
+from concurrent.futures import ThreadPoolExecutor
+
 from lxml import etree
 import oauth2 as oauth
-import requests
+
+from bulk import chunks, fetch_many
+import export
+from isbn import ISBNResolver, normalize
+from metrics import RequestInfo, endpoint_template
+from paging import Paginator
+from ratelimit import THROTTLED, RateLimiter, backoff, parse_retry_after
+from schema import Schema, coerce, native, parse
+from shelfsync import ShelfSync
+from signing import Signer
+from singleflight import SingleFlight, request_key
+from transport import Transport
 
 
 class GoodreadsException(Exception):
@@ -18,63 +33,241 @@ class Bunch:
         self.__dict__.update(kwds)
 
 
-class GoodreadsUser(Bunch):
-    def __repr__(self):
-        return '<GoodreadsUser:%s:%s>' % (self.id, self.name)
+class Lazy(object):
+    """
+    Field type marker: the value may be left as a Deferred and is built on
+    first access.
+    """
 
-    @classmethod
-    def from_object(cls, o):
-        u = cls(
-            id=o.id.text,
-            name=o.name.text,
-            link=o.link.text,
-        )
+    def __init__(self, kind):
+        self.kind = kind
+
+
+class Deferred(object):
+    """
+    A sub-collection kept as serialized XML, detached from the parsed tree,
+    and built by `owner`'s `builder` classmethod.  Pickles unbuilt; the
+    entity cache is not pickled with it.
+    """
+    __slots__ = ('owner', 'builder', 'data', 'cache')
+
+    def __init__(self, owner, builder, element, cache=None):
+        self.owner = owner
+        self.builder = builder
+        self.data = etree.tostring(element)
+        self.cache = cache
 
-        u.location = o.location.text
-        u.image = o.image_url.text
-        u.small_image = o.small_image_url.text
+    def resolve(self):
+        return getattr(self.owner, self.builder)(parse(self.data), self.cache)
 
-        u.joined = o.joined.text
-        u.last_active = o.last_active.text
+    def __getstate__(self):
+        return self.owner, self.builder, self.data
+
+    def __setstate__(self, state):
+        self.owner, self.builder, self.data = state
+        self.cache = None
+
+
+def _lazy_property(slot):
+    def get(self):
+        value = getattr(self, slot)
+        if isinstance(value, Deferred):
+            value = value.resolve()
+            setattr(self, slot, value)
+        return value
+
+    def set(self, value):
+        setattr(self, slot, value)
+    return property(get, set)
+
+
+def _children(element, path):
+    container = element.find(path)
+    return [] if container is None else container.iterchildren()
+
+
+class ModelMeta(type):
+    """
+    Turns a model's declared `fields` into its __slots__.
+    """
+
+    def __new__(mcs, name, bases, attrs):
+        fields = attrs.setdefault('fields', ())
+        slots = []
+        for field, kind in fields:
+            if isinstance(kind, Lazy):
+                slots.append('_' + field)
+                attrs[field] = _lazy_property('_' + field)
+            else:
+                slots.append(field)
+        attrs['__slots__'] = tuple(slots)
+        cls = type.__new__(mcs, name, bases, attrs)
+        cls.field_names = tuple(
+            f for klass in reversed(cls.__mro__)
+            for f, _ in getattr(klass, 'fields', ()))
+        # (field, slot holding it): a lazy field's slot may hold a Deferred
+        cls.field_slots = tuple(
+            (f, '_' + f if isinstance(kind, Lazy) else f)
+            for klass in reversed(cls.__mro__)
+            for f, kind in getattr(klass, 'fields', ()))
+        cls._slot_names = frozenset(
+            s for klass in cls.__mro__
+            for s in getattr(klass, '__slots__', ()))
+        return cls
+
+
+class Model(object):
+    """
+    Fixed-layout base for the API models.
+
+    Subclasses declare `fields` as (name, type) pairs; instances have no
+    __dict__, and unset fields read as None.
+    """
+    __metaclass__ = ModelMeta
 
-        u.about = o.about.text
-        u.age = o.age.text
+    def __init__(self, **kwds):
         try:
-            u.favorite_authors = [
-                GoodreadsAuthor.from_object(
-                    a.author) for a in o.favorite_authors]
+            for name, value in kwds.iteritems():
+                setattr(self, name, value)
         except AttributeError:
-            u.favorite_authors = None
-        # TODO: favorite books not working on api end?
-        # u.favorite_books = [GoodreadsBook.from_object(b) for b in o.favorite_books]
-        u.friends_count = o.friends_count.text
-        u.gender = o.gender.text
-        u.groups_count = o.groups_count.text
-        u.interests = o.interests.text
-        u.reviews_count = o.reviews_count.text
-        u.reviews_rss_url = o.reviews_rss_url.text
+            raise TypeError('%s has no field(s) %s' % (
+                type(self).__name__,
+                ', '.join(sorted(set(kwds) - set(self.field_names)))))
 
-        return u
+    def __getattr__(self, name):
+        # only reached for slots never assigned
+        if name in self._slot_names:
+            return None
+        raise AttributeError(name)
+
+    def __getstate__(self):
+        # by field name, and without building deferred collections
+        state = {}
+        for field, slot in self.field_slots:
+            value = getattr(self, slot)
+            if value is not None:
+                state[field] = value
+        return state
+
+    def __setstate__(self, state):
+        slots = dict(self.field_slots)
+        unknown = set(state) - set(slots)
+        if unknown:
+            raise TypeError('%s has no field(s) %s' % (
+                type(self).__name__, ', '.join(sorted(unknown))))
+        for name, value in state.iteritems():
+            setattr(self, slots[name], value)
+
+    def update(self, values):
+        for name, value in values.iteritems():
+            setattr(self, name, value)
+        return self
+
+
+class GoodreadsAuthor(Model):
+    fields = (
+        ('id', str),
+        ('name', str),
+        ('books', list),
+    )
+    record = Schema(
+        ('id', 'id', str),
+        ('name', 'name', str),
+    )
+
+    def __repr__(self):
+        return '<GoodreadsAuthor:%s:%s>' % (self.id, self.name)
 
     @classmethod
-    def from_auth_user_object(cls, o):
-        return cls(
-            id=o.attrib['id'],
-            name=o.name.text,
-            link=o.link.text
-        )
+    def from_object(cls, o, cache=None):
+        if cache is not None:
+            author = cache.get(cls, o.findtext('id'))
+            if author is not None:
+                return author
+        author = cls(**cls.record.extract(o))
+        if cache is not None:
+            cache.set(author, complete=False)
+        return author
 
+    @classmethod
+    def from_element(cls, author, cache=None):
+        return cls.from_object(author, cache)
+
+
+class GoodreadsUser(Model):
+    fields = (
+        ('id', str),
+        ('name', str),
+        ('link', str),
+        ('location', str),
+        ('image', str),
+        ('small_image', str),
+        ('joined', str),
+        ('last_active', str),
+        ('about', str),
+        ('age', int),
+        ('favorite_authors', list),
+        ('friends_count', int),
+        ('gender', str),
+        ('groups_count', int),
+        ('interests', str),
+        ('reviews_count', int),
+        ('reviews_rss_url', str),
+    )
+    record = Schema(
+        ('id', 'id', str),
+        ('name', 'name', str),
+        ('link', 'link', str),
+        ('location', 'location', str),
+        ('image', 'image_url', str),
+        ('small_image', 'small_image_url', str),
+        ('joined', 'joined', str),
+        ('last_active', 'last_active', str),
+        ('about', 'about', str),
+        ('age', 'age', int),
+        ('friends_count', 'friends_count', int),
+        ('gender', 'gender', str),
+        ('groups_count', 'groups_count', int),
+        ('interests', 'interests', str),
+        ('reviews_count', 'reviews_count', int),
+        ('reviews_rss_url', 'reviews_rss_url', str),
+    )
+    # as listed by followers, friends, members, etc.
+    small_record = Schema(
+        ('id', 'id', str),
+        ('name', 'name', str),
+        ('link', 'link', str),
+        ('image', 'image_url', str),
+        ('small_image', 'small_image_url', str),
+    )
+    auth_record = Schema(
+        ('id', '@id', str),
+        ('name', 'name', str),
+        ('link', 'link', str),
+    )
 
-class GoodreadsAuthor(Bunch):
     def __repr__(self):
-        return '<GoodreadsAuthor:%s:%s>' % (self.id, self.name)
+        return '<GoodreadsUser:%s:%s>' % (self.id, self.name)
 
     @classmethod
-    def from_object(cls, o):
-        return cls(
-            id=o.id.text,
-            name=o.name.text
-        )
+    def from_object(cls, o, cache=None):
+        u = cls(**cls.record.extract(o))
+        u.favorite_authors = [
+            GoodreadsAuthor.from_object(a, cache)
+            for a in _children(o, 'favorite_authors')]
+        # TODO: favorite books not working on api end?
+        # u.favorite_books = [GoodreadsBook.from_object(b) for b in o.favorite_books]
+        return u
+
+    @classmethod
+    def from_small_object(cls, o):
+        if o is None:
+            return None
+        return cls(**cls.small_record.extract(o))
+
+    @classmethod
+    def from_auth_user_object(cls, o):
+        return cls(**cls.auth_record.extract(o))
 
 
 class GoodreadsSeries(Bunch):
@@ -83,86 +276,253 @@ class GoodreadsSeries(Bunch):
         raise NotImplementedError
 
 
-class GoodreadsWork(Bunch):
+class GoodreadsWork(Model):
+    fields = (
+        ('id', int),
+        ('title', str),
+        ('media_type', str),
+        ('publication_day', int),
+        ('publication_month', int),
+        ('publication_year', int),
+        ('language_id', int),
+        ('best_book_id', int),
+        ('books_count', int),
+        ('default_chaptering_book_id', int),
+        ('desc_user_id', int),
+        ('rating_dist', str),
+        ('ratings_count', int),
+        ('ratings_sum', int),
+        ('reviews_count', int),
+        ('text_reviews_count', int),
+    )
+    record = Schema(
+        ('id', 'id', int),
+        ('title', 'original_title', str),
+        ('media_type', 'media_type', str),
+        ('publication_day', 'original_publication_day', int),
+        ('publication_month', 'original_publication_month', int),
+        ('publication_year', 'original_publication_year', int),
+        ('language_id', 'original_language_id', int),
+        ('best_book_id', 'best_book_id', int),
+        ('books_count', 'books_count', int),
+        ('default_chaptering_book_id', 'default_chaptering_book_id', int),
+        ('desc_user_id', 'desc_user_id', int),
+        ('rating_dist', 'rating_dist', str),
+        ('ratings_count', 'ratings_count', int),
+        ('ratings_sum', 'ratings_sum', int),
+        ('reviews_count', 'reviews_count', int),
+        ('text_reviews_count', 'text_reviews_count', int),
+    )
+
     @classmethod
     def from_object(cls, work):
-        return cls(**{
-            'id': work.id,
-            'title': work.title,
-            'media_type': work.media_type,
-            'publication_day': work.publication_day,
-            'publication_month': work.publication_month,
-            'publication_year': work.publication_year,
-            'language_id': work.language_id,
-            'best_book_id': work.best_book_id,
-            'books_count': work.books_count,
-            'default_chaptering_book_id': work.default_chaptering_book_id,
-            'desc_user_id': work.desc_user_id,
-            'rating_dist': work.rating_dist,
-            'ratings_count': work.ratings_count,
-            'ratings_sum': work.ratings_sum,
-            'reviews_count': work.reviews_count,
-            'text_reviews_count': work.text_reviews_count,
-        })
-
-
-class GoodreadsBook(Bunch):
+        return cls(**cls.record.extract(work))
+
+
+class GoodreadsBook(Model):
+    fields = (
+        # small record: author listings, shelves, similar books
+        ('id', int),
+        ('title', str),
+        ('authors', list),
+        ('format', str),
+        ('pages', int),
+        ('date', str),
+        ('publisher', str),
+        ('image', str),
+        ('isbn', str),
+        # full record: book/show
+        ('publication_year', int),
+        ('publication_month', int),
+        ('publication_day', int),
+        ('language_code', str),
+        ('edition_information', str),
+        ('is_ebook', bool),
+        ('small_image_url', str),
+        ('url', str),
+        ('link', str),
+        ('description', str),
+        ('average_rating', float),
+        ('ratings_count', int),
+        ('text_reviews_count', int),
+        ('reviews_widget', str),
+        ('popular_shelves', Lazy(list)),
+        ('book_links', list),
+        ('isbn13', str),
+        ('asin', str),
+        ('series', Lazy(list)),
+        ('similar_books', Lazy(list)),
+    )
+    small_record = Schema(
+        ('id', 'id', int),
+        ('title', 'title', str),
+        ('format', 'format', str),
+        ('pages', 'num_pages', int),
+        ('date', 'published', str),
+        ('publisher', 'publisher', str),
+        ('image', 'image_url', str),
+        ('isbn', 'isbn', str),
+    )
+    # the fields book/show adds to the small record
+    record = Schema(
+        ('publication_year', 'publication_year', int),
+        ('publication_month', 'publication_month', int),
+        ('publication_day', 'publication_day', int),
+        ('language_code', 'language_code', str),
+        ('edition_information', 'edition_information', str),
+        ('is_ebook', 'is_ebook', bool),
+        ('small_image_url', 'small_image_url', str),
+        ('url', 'url', str),
+        ('link', 'link', str),
+        ('description', 'description', str),
+        ('average_rating', 'average_rating', float),
+        ('ratings_count', 'ratings_count', int),
+        ('text_reviews_count', 'text_reviews_count', int),
+        ('reviews_widget', 'reviews_widget', str),
+        ('isbn13', 'isbn13', str),
+        ('asin', 'asin', str),
+    )
+    # user/compare
+    compared_record = Schema(
+        ('id', 'id', int),
+        ('title', 'title', str),
+        ('link', 'url', str),
+    )
+    book_link_record = Schema(
+        ('id', 'id', int),
+        ('name', 'name', str),
+        ('link', 'link', str),
+    )
+    series_record = Schema(
+        ('id', 'id', int),
+        ('position', 'user_position', str),
+        ('series_id', 'series/id', int),
+        ('title', 'series/title', str),
+    )
+
     def __repr__(self):
         return '<GoodreadsBook:%s:%s>' % (self.id, self.title)
 
     @classmethod
     def from_object(cls, o):
-        return cls(
-            id=o.id.text,
-            title=o.title.text,
-            link=o.url.text
+        return cls(**cls.compared_record.extract(o))
+
+    @classmethod
+    def from_element(cls, book, cache=None, lazy=False):
+        """
+        Full book record.  With lazy=True the popular shelves, series and
+        similar books are kept as serialized XML until first accessed.
+        """
+        b = cls.from_small_element(book, cache).update(
+            cls.record.extract(book))
+        b.book_links = [cls.book_link_record.extract(l)
+                        for l in _children(book, 'book_links')]
+
+        collections = (
+            ('popular_shelves', 'popular_shelves', '_parse_popular_shelves'),
+            ('series', 'series_works', '_parse_series'),
+            ('similar_books', 'similar_books', '_parse_similar_books'),
         )
+        for name, path, builder in collections:
+            element = book.find(path)
+            if element is None:
+                setattr(b, name, [])
+            elif lazy:
+                setattr(b, name, Deferred(cls, builder, element, cache))
+            else:
+                setattr(b, name, getattr(cls, builder)(element, cache))
+
+        if cache is not None:
+            cache.set(b)
+        return b
+
+    @classmethod
+    def from_widget(cls, d, **values):
+        """
+        Partial book from the JSON representation of book/show and
+        book/isbn, which holds only the reviews widget; `values` are the
+        fields known from the request.
+        """
+        if not isinstance(d, dict) or 'reviews_widget' not in d:
+            raise GoodreadsException('Unexpected book response')
+        return cls(reviews_widget=d['reviews_widget'], **values)
 
     @classmethod
-    def from_element(cls, book):
-        b = cls.from_small_element(book)
-        b.publication_year = book.publication_year
-        b.publication_month = book.publication_month
-        b.publication_day = book.publication_day
-        b.language_code = book.language_code
-        b.edition_information = book.edition_information
-        b.is_ebook = book.is_ebook
-        b.small_image_url = book.small_image_url
-        b.url = book.url
-        b.link = book.link
-        b.description = book.description
-        b.average_rating = book.average_rating
-        b.ratings_count = book.ratings_count
-        b.text_reviews_count = book.text_reviews_count
-        b.reviews_widget = book.reviews_widget
-        b.popular_shelves = [(s.attrib['name'], s.attrib['count'])
-                             for s in book.popular_shelves.iterate_children()]
-        b.book_links = [{'id': l.id, 'name': l.name, 'link': l.link}
-                        for l in book.book_links.iterate_children()]
-        b.isbn13 = book.isbn13
-        b.asin = book.asin
-        b.series = [{'id': sw.id,
-                     'position': sw.user_position,
-                     'series': GoodreadsSeries.from_element(
-                         sw.series)} for sw in book.series_works.iterate_children()]
-        b.similar_books = [cls.from_small_element(sb)
-                           for sb in book.similar_books.iterate_children()]
+    def _parse_popular_shelves(cls, shelves, cache=None):
+        return [(s.get('name'), native(int, s.get('count')))
+                for s in shelves.iterchildren()]
 
+    @classmethod
+    def _parse_series(cls, series_works, cache=None):
+        return [cls.series_record.extract(sw)
+                for sw in series_works.iterchildren()]
+
+    @classmethod
+    def _parse_similar_books(cls, similar_books, cache=None):
+        return [cls.from_small_element(sb, cache)
+                for sb in similar_books.iterchildren()]
+
+    @classmethod
+    def from_small_element(cls, book, cache=None):
+        if cache is not None:
+            b = cache.get(cls, book.findtext('id'))
+            if b is not None:
+                return b
+        b = cls(**cls.small_record.extract(book))
+        b.authors = [GoodreadsAuthor.from_element(author, cache)
+                     for author in _children(book, 'authors')]
+        if cache is not None:
+            cache.set(b, complete=False)
         return b
 
+
+class GoodreadsReview(Model):
+    fields = (
+        ('id', int),
+        ('book', GoodreadsBook),
+        ('rating', int),
+        ('votes', int),
+        ('spoiler', bool),
+        ('shelves', list),
+        ('started_at', datetime),
+        ('read_at', datetime),
+        ('date_added', datetime),
+        ('date_updated', datetime),
+        ('read_count', int),
+        ('body', str),
+        ('comments_count', int),
+        ('url', str),
+        ('link', str),
+        ('owned', int),
+    )
+    record = Schema(
+        ('id', 'id', int),
+        ('rating', 'rating', int),
+        ('votes', 'votes', int),
+        ('spoiler', 'spoiler_flag', bool),
+        ('started_at', 'started_at', datetime),
+        ('read_at', 'read_at', datetime),
+        ('date_added', 'date_added', datetime),
+        ('date_updated', 'date_updated', datetime),
+        ('read_count', 'read_count', int),
+        ('body', 'body', str),
+        ('comments_count', 'comments_count', int),
+        ('url', 'url', str),
+        ('link', 'link', str),
+        ('owned', 'owned', int),
+    )
+
+    def __repr__(self):
+        return '<GoodreadsReview:%s:%s>' % (self.id, self.book.title)
+
     @classmethod
-    def from_small_element(cls, book):
-        return cls(**{
-            'id': book.id,
-            'title': book.title,
-            'authors': [GoodreadsAuthor.from_element(author) for author in book.authors.iterchildren()],
-            'format': book.format,
-            'pages': book.num_pages,
-            'date': book.published,
-            'publisher': book.publisher,
-            'image': book.image_url,
-            'isbn': book.isbn,
-        })
+    def from_element(cls, review, cache=None):
+        r = cls(**cls.record.extract(review))
+        book = review.find('book')
+        if book is not None:
+            r.book = GoodreadsBook.from_small_element(book, cache)
+        r.shelves = [s.get('name') for s in _children(review, 'shelves')]
+        return r
 
 
 class GoodreadsShelf(Bunch):
@@ -171,18 +531,143 @@ class GoodreadsShelf(Bunch):
         raise NotImplementedError
 
 
+# records returned as Bunches
+
+NOTIFICATION = Schema(
+    ('created', 'created_at', datetime),
+    ('new', 'new', bool),
+    ('html', 'body/html', str),
+)
+
+COMPARISON = Schema(
+    ('common', 'common_count', int),
+    ('not_common', 'not_in_common', int),
+    ('my-percent', 'your_library_percent', float),
+    ('my-total', 'your_total_books_count', int),
+    ('their-percent', 'their_library_percent', float),
+    ('their-total', 'their_total_books_count', int),
+)
+
+COMPARED_REVIEW = Schema(
+    ('my-rating', 'your_review/rating', int),
+    ('my-review', 'your_review/text', str),
+    ('their-rating', 'their_review/rating', int),
+    ('their-review', 'their_review/text', str),
+)
+
+COMMENT = Schema(
+    ('id', 'id', str),
+    ('body', 'body', str),
+    ('created_at', 'created_at', datetime),
+    ('updated_at', 'updated_at', datetime),
+)
+
+GROUP_MEMBER = Schema(
+    ('first_joined_at', 'first_joined_at', datetime),
+    ('last_active_at', 'last_active_at', datetime),
+    ('comments_count', 'comments_count', int),
+)
+
+OWNED_BOOK = Schema(
+    ('id', 'id', str),
+    ('book_id', 'book/id', int),
+    ('title', 'book/title', str),
+    ('condition', 'condition', str),
+    ('original_purchase_date', 'original_purchase_date', datetime),
+    ('original_purchase_location', 'original_purchase_location', str),
+)
+
+# book/review_counts.json
+REVIEW_COUNTS = Schema(
+    ('id', 'id', int),
+    ('isbn', 'isbn', str),
+    ('isbn13', 'isbn13', str),
+    ('ratings_count', 'ratings_count', int),
+    ('reviews_count', 'reviews_count', int),
+    ('text_reviews_count', 'text_reviews_count', int),
+    ('work_ratings_count', 'work_ratings_count', int),
+    ('work_reviews_count', 'work_reviews_count', int),
+    ('work_text_reviews_count', 'work_text_reviews_count', int),
+    ('average_rating', 'average_rating', float),
+)
+
+TOPIC = Schema(
+    ('id', 'id', str),
+    ('title', 'title', str),
+    ('comments_count', 'comments_count', int),
+    ('author_user_id', 'author_user_id', str),
+    ('last_comment_at', 'last_comment_at', datetime),
+    ('updated_at', 'updated_at', datetime),
+)
+
+
+class ParseTimer(object):
+    """
+    Times a parse into its RequestInfo and hands the info to the client's
+    metrics and hooks.
+    """
+    __slots__ = ('client', 'info', 'started')
+
+    def __init__(self, client, info):
+        self.client = client
+        self.info = info
+
+    def __enter__(self):
+        self.started = time.time()
+        return self.info
+
+    def __exit__(self, *exc_info):
+        if self.info is not None:
+            self.info.parse = (self.info.parse or 0.0) + (
+                time.time() - self.started)
+            self.client.finish_request(self.info)
+
+
+class NotTimed(object):
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+# what parsing() returns when instrumentation is off
+NOT_TIMED = NotTimed()
+
+
 # noinspection PyUnreachableCode
 class Goodreads(object):
+    """
+    Goodreads API client.
+
+    One client may be shared by many threads: developer-key and OAuth
+    requests alike go through the pooled transport, and the rate limiter,
+    caches and metrics are shared.  Pass `threads` to size the connection
+    pool for the number of threads expected.  Credentials may be replaced
+    while other threads are making requests; each request is signed with
+    either the old or the new ones.
+    """
     base_url = 'http://www.goodreads.com'  # no slash
 
     def __init__(self, developer_key=None, developer_secret=None,
-                 user_token=None, user_secret=None):
+                 user_token=None, user_secret=None, transport=None,
+                 rate_limiter=None, cache=None, entity_cache=None,
+                 base_url=None, recorder=None, metrics=None, hooks=None,
+                 threads=None, catalog=None):
+
+        if base_url:
+            # e.g. a local goodreads.stubserver
+            self.base_url = base_url.rstrip('/')
+
+        # signs OAuth requests for the current consumer and token; replaced
+        # as a whole so threads never see half of an update
+        self.signer = None
+        self.token = None
+        self._auth_lock = threading.Lock()
 
         if developer_key and developer_secret:
             self.set_developer(developer_key, developer_secret)
-            if not (user_token and user_secret):
-                self.client = oauth.Client(self.consumer)
-
         else:
             self.developer = False
 
@@ -191,8 +676,66 @@ class Goodreads(object):
         else:
             self.oauth = False
 
-        self.last_request = time.time() - 1
-        self.client.follow_redirects = False
+        # Goodreads asks for no more than one request per second; pass a
+        # shared RateLimiter to hold several clients to one quota.
+        self.rate_limiter = rate_limiter if rate_limiter else RateLimiter()
+        # optional ResponseCache for dev_get
+        self.cache = cache
+        # optional EntityCache shared by the parsers
+        self.entity_cache = entity_cache
+        # optional catalog.Catalog: a persistent mirror read through by
+        # user(), author(), book() and book_by_isbn()
+        self.catalog = catalog
+        # resolve_isbns(): its ISBN index is the catalog's
+        self.isbn_resolver = ISBNResolver(self, catalog)
+        # sync_shelf(): watermarks are kept in the catalog, if any
+        self.shelf_sync = ShelfSync(self, catalog)
+        # optional stubserver.Recorder capturing every response
+        self.recorder = recorder
+        # optional MetricsRegistry, and callables taking each RequestInfo;
+        # with neither, requests are not timed at all
+        self.metrics = metrics
+        self.hooks = list(hooks or ())
+        self._pending = threading.local()
+        # response format per endpoint, where the API offers both
+        self.formats = {'book': 'xml', 'book_by_isbn': 'xml'}
+
+        # throttled (429/503) responses are retried this many times, backing
+        # off exponentially from `backoff` seconds up to `max_backoff`
+        self.retries = 3
+        self.backoff = 0.5
+        self.max_backoff = 30.0
+
+        # background workers used to prefetch pages
+        self.prefetch_workers = 2
+        # identical concurrent lookups share one request (see _coalesce)
+        self.inflight = SingleFlight()
+        # threads per users()/authors()/books() call
+        self.bulk_workers = 4
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+        self._owns_transport = transport is None
+        self.transport = transport if transport else Transport(
+            pool_maxsize=max(threads or 0, 10))
+
+    def close(self):
+        """
+        Release pooled connections; a shared transport is left open.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._owns_transport:
+            self.transport.close()
+        if self.catalog is not None:
+            self.catalog.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def set_developer(self, key, secret):
         self.developer_key = key
@@ -200,6 +743,7 @@ class Goodreads(object):
         self.consumer = oauth.Consumer(
             key=self.developer_key,
             secret=self.developer_secret)
+        self.signer = Signer(self.consumer, self.token)
         self.developer = True
 
     def developer_check(self):
@@ -212,63 +756,275 @@ class Goodreads(object):
         self.user_token = token
         self.user_secret = secret
         self.token = oauth.Token(self.user_token, self.user_secret)
-        self.client = oauth.Client(self.consumer, self.token)
+        self.signer = Signer(self.consumer, self.token)
         self.oauth = True
 
     def oauth_check(self):
         if not self.oauth:
             raise GoodreadsException('Operation requires OAuth; not provided')
 
+    # Instrumentation
+
+    @property
+    def instrumented(self):
+        return self.metrics is not None or bool(self.hooks)
+
+    def _begin(self, method, url):
+        """
+        A RequestInfo for a request starting on this thread, or None when
+        nothing is listening.  An earlier request whose response was never
+        parsed is finished first.
+        """
+        if self.metrics is None and not self.hooks:
+            return None
+        self.finish_request(self.take_request())
+        info = RequestInfo(method, url, time.time())
+        self._pending.info = info
+        return info
+
+    def _received(self, info, started, status, body=None, network=None):
+        info.status = status
+        total = time.time() - started
+        if network is None:
+            info.network = total
+        else:
+            info.network = network
+            if body is not None:
+                info.download = max(total - network, 0.0)
+        if body is not None:
+            info.bytes = len(body)
+
+    def take_request(self):
+        """
+        Detach the unfinished RequestInfo of this thread's last request, so
+        its parse can be timed elsewhere.
+        """
+        info = getattr(self._pending, 'info', None)
+        self._pending.info = None
+        return info
+
+    def finish_request(self, info):
+        if info is None:
+            return
+        if self.metrics is not None:
+            self.metrics.record(info)
+        for hook in self.hooks:
+            hook(info)
+
+    def parsing(self, info=None):
+        """
+        Context timing the parse of this thread's last response.
+        """
+        if self.metrics is None and not self.hooks:
+            return NOT_TIMED
+        return ParseTimer(self, info or self.take_request())
+
     # HTTP helpers
 
     def wait(self):
-        since = time.time() - self.last_request
-        if since < 1:
-            time.sleep(1 - since)
+        self.rate_limiter.acquire()
 
-    def get(self, url, data=None):
+    def _wait(self, info):
+        if info is None:
+            return self.wait()
+        started = time.time()
+        self.wait()
+        info.wait = (info.wait or 0.0) + time.time() - started
+
+    def _send(self, info, url, send):
+        """
+        Wait for the rate limiter and send(), retrying throttled (429/503)
+        responses up to self.retries times with jittered exponential
+        backoff; a Retry-After pauses the shared limiter for every thread.
+        Returns (response, time the last attempt was sent).
+        """
+        attempt = 0
+        while True:
+            self._wait(info)
+            started = time.time()
+            response = send()
+            self.rate_limiter.feedback(response.status_code,
+                                       response.elapsed.total_seconds())
+            if self.metrics is not None:
+                self.metrics.gauge('request_rate').set(self.rate_limiter.rate)
+            if response.status_code not in THROTTLED:
+                return response, started
+            if attempt >= self.retries:
+                response.close()
+                raise GoodreadsException('Request throttled (%d) after %d '
+                                         'retries' % (response.status_code,
+                                                      attempt))
+            header = response.headers.get('retry-after')
+            retry_after = parse_retry_after(header)
+            if retry_after:
+                self.rate_limiter.pause(retry_after)
+            if self.metrics is not None:
+                self.metrics.counter('retries', endpoint=endpoint_template(
+                    url), status=response.status_code).inc()
+            response.close()
+            time.sleep(backoff(attempt, self.backoff, self.max_backoff))
+            attempt += 1
+
+    def get(self, url, data=None, headers=None, stream=False):
         if not data:
             data = {}
-        self.wait()
-        return (
-            requests.get(
-                '%s/%s' %
-                (self.base_url, url), params=data)  # TODO: Bad response
-        )
+        info = self._begin('GET', url)
+        response, started = self._send(info, url, lambda: self.transport.get(
+            '%s/%s' % (self.base_url, url), params=data,
+            headers=headers, stream=stream))
+        if info is not None:
+            self._received(
+                info, started, response.status_code,
+                None if stream else response.content,
+                response.elapsed.total_seconds())
+        if self.recorder is not None:
+            self.recorder.record('GET', url, data, response.status_code,
+                                 response.headers, response.content)
+        return response
 
     def post(self, url, data=None):
         if not data:
             data = {}
-        self.wait()
-        return (
-            requests.post(
-                '%s/%s' %
-                (self.base_url, url), data)  # TODO: Bad response
-        )
-
-    def dev_get(self, url, data):
+        info = self._begin('POST', url)
+        response, started = self._send(info, url, lambda: self.transport.post(
+            '%s/%s' % (self.base_url, url), data))
+        if info is not None:
+            self._received(info, started, response.status_code,
+                           response.content, response.elapsed.total_seconds())
+            self.finish_request(self.take_request())
+        if self.recorder is not None:
+            self.recorder.record('POST', url, data, response.status_code,
+                                 response.headers, response.content)
+        return response
+
+    def dev_get(self, url, data, stream=False):
         self.developer_check()
+        if self.cache is None:
+            data.update(key=self.developer_key)
+            return self.get(url, data, stream=stream)
+
+        cached = self.cache.get(url, data)
+        if cached is not None and self.cache.fresh(url, cached):
+            info = self._begin('GET', url)
+            if info is not None:
+                info.cached = True
+                info.status = cached.status_code
+                info.bytes = len(cached.content)
+            return cached
+        headers = cached.validators() if cached is not None else None
         data.update(key=self.developer_key)
-        return self.get(url, data)
+        response = self.get(url, data, headers, stream=stream)
+        if response.status_code == 304 and cached is not None:
+            info = getattr(self._pending, 'info', None)
+            if info is not None:
+                info.cached = True
+            return self.cache.refresh(url, data, cached)
+        if response.status_code == 200:
+            self.cache.set(url, data, response)
+        return response
+
+    def prefetch(self, fn, *args, **kwargs):
+        """
+        Run fn on a background worker, returning a Future.
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.prefetch_workers)
+            return self._executor.submit(fn, *args, **kwargs)
+
+    def paginate(self, fetch, container, tag, build, page=1, limit=None):
+        return Paginator(self, fetch, container, tag, build, page=page,
+                         limit=limit)
 
     def dev_post(self, url, data):
         self.developer_check()
         data.update(key=self.developer_key)
         return self.post(url, data)
 
+    def _stored(self, cls, id):
+        """
+        A complete entity from the entity cache or a fresh one from the
+        catalog, or None.
+        """
+        if self.entity_cache is not None:
+            obj = self.entity_cache.get(cls, id, complete=True)
+            if obj is not None:
+                return obj
+        if self.catalog is not None:
+            obj = self.catalog.get(cls, id)
+            if obj is not None:
+                if self.entity_cache is not None:
+                    self.entity_cache.set(obj)
+                return obj
+        return None
+
+    def _store(self, obj):
+        if self.entity_cache is not None:
+            self.entity_cache.set(obj)
+        if self.catalog is not None:
+            self.catalog.add(obj)
+        return obj
+
+    def _coalesce(self, method, url, params, fetch):
+        """
+        Run fetch(), sharing it with concurrent calls for the same request:
+        one network request and one parse, and every caller gets the same
+        objects.  Set self.inflight to None to turn this off.
+        """
+        if self.inflight is None:
+            return fetch()
+        ran = []
+
+        def run():
+            ran.append(True)
+            return fetch()
+
+        try:
+            return self.inflight.do(request_key(method, url, params), run)
+        finally:
+            if not ran and self.metrics is not None:
+                self.metrics.counter('coalesced',
+                                     endpoint=endpoint_template(url)).inc()
+
+    def _user_key(self):
+        """
+        What tells OAuth requests for different users apart.
+        """
+        return {'oauth_token': self.token.key if self.token else None}
+
     def client_request(self, method, url, data=None, headers=None):
         if not headers:
             headers = {}
         if not data:
             data = {}
         self.oauth_check()
-        self.wait()
-        response, content = self.client.request(
-            uri='%s/%s' % (self.base_url, url),
-            method=method,
-            body=urlencode(data),
-            headers=headers)  # TODO: Bad response
-        return content
+        info = self._begin(method, url)
+        # signed per attempt: a retry needs a fresh nonce and timestamp
+        response, started = self._send(info, url, lambda: self._signed(
+            method, '%s/%s' % (self.base_url, url), self.signer, data,
+            headers))
+        if info is not None:
+            self._received(info, started, response.status_code,
+                           response.content, response.elapsed.total_seconds())
+            if method != 'GET':
+                self.finish_request(self.take_request())
+        if self.recorder is not None:
+            self.recorder.record(method, url, data, response.status_code,
+                                 response.headers, response.content)
+        return response.content
+
+    def _signed(self, method, uri, signer, data=None, headers=None):
+        """
+        Send an OAuth-signed request through the transport; `data` goes in
+        the query of GET and DELETE requests and in the body of the rest.
+        """
+        headers = dict(headers or {},
+                       Authorization=signer.sign(method, uri, data))
+        if method in ('GET', 'DELETE'):
+            return self.transport.request(method, uri, params=data,
+                                          headers=headers)
+        return self.transport.request(method, uri, data=data, headers=headers)
 
     def client_get(self, url, data=None, headers=None):
         if not headers:
@@ -301,34 +1057,35 @@ class Goodreads(object):
     # OAuth
 
     def oauth_authorize_url(self):
-        response, content = self.client.request(
-            '%s/oauth/request_token' %
-            self.base_url, 'GET')
-        if response['status'] != '200':
-            raise Exception('Invalid response: %s' % response['status'])
-        self.request_token = dict(urlparse.parse_qsl(content))
-        return (
-            '%s?oauth_token=%s' % (
-                '%s/oauth/authorize' % self.base_url,
-                self.request_token['oauth_token'])
-        )
+        with self._auth_lock:
+            response = self._signed(
+                'GET', '%s/oauth/request_token' % self.base_url,
+                Signer(self.consumer))
+            if response.status_code != 200:
+                raise Exception('Invalid response: %s' % response.status_code)
+            self.request_token = dict(urlparse.parse_qsl(response.content))
+            return (
+                '%s?oauth_token=%s' % (
+                    '%s/oauth/authorize' % self.base_url,
+                    self.request_token['oauth_token'])
+            )
 
     def oauth_retrieve_token(self):
-        token = oauth.Token(
-            self.request_token['oauth_token'],
-            self.request_token['oauth_token_secret'])
-        client = oauth.Client(self.consumer, token)
-        response, content = client.request(
-            '%s/oauth/access_token' %
-            self.base_url, 'POST')
-        if response['status'] != '200':
-            raise Exception('Invalid response: %s' % response['status'])
-        access_token = dict(urlparse.parse_qsl(content))
-        self.token = oauth.Token(
-            access_token['oauth_token'],
-            access_token['oauth_token_secret'])
-        self.client = oauth.Client(self.consumer, self.token)
-        return self.token
+        with self._auth_lock:
+            token = oauth.Token(
+                self.request_token['oauth_token'],
+                self.request_token['oauth_token_secret'])
+            response = self._signed(
+                'POST', '%s/oauth/access_token' % self.base_url,
+                Signer(self.consumer, token))
+            if response.status_code != 200:
+                raise Exception('Invalid response: %s' % response.status_code)
+            access_token = dict(urlparse.parse_qsl(response.content))
+            self.token = oauth.Token(
+                access_token['oauth_token'],
+                access_token['oauth_token_secret'])
+            self.signer = Signer(self.consumer, self.token)
+            return self.token
 
     # ############### API #################
     # http://www.goodreads.com/api
@@ -339,74 +1096,77 @@ class Goodreads(object):
         """
         if not (user_id or username):
             raise GoodreadsException('User id or username required')
-        r = self.dev_get('user/show/', {'id': user_id, 'username': username})
-        return GoodreadsUser.from_object(etree.fromstring(r.content).user)
+        if user_id:
+            user = self._stored(GoodreadsUser, user_id)
+            if user is not None:
+                return user
+        params = {'id': user_id, 'username': username}
+        return self._coalesce('GET', 'user/show/', params,
+                              lambda: self._user(dict(params)))
+
+    def _user(self, params):
+        r = self.dev_get('user/show/', params)
+        with self.parsing():
+            if r.status_code == 404:
+                raise GoodreadsException('User not found')
+            user = GoodreadsUser.from_object(
+                parse(r.content).find('user'), self.entity_cache)
+        return self._store(user)
 
     def auth_user(self):
         """
          Get id of user who authorized OAuth: http://www.goodreads.com/api#auth.user
         """
+        return self._coalesce('GET', 'api/auth_user', self._user_key(),
+                              self._auth_user)
+
+    def _auth_user(self):
         xml = self.client_get('api/auth_user')
-        return (
-            GoodreadsUser.from_auth_user_object(etree.fromstring(xml).user)
-        )
+        with self.parsing():
+            return GoodreadsUser.from_auth_user_object(
+                parse(xml).find('user'))
 
-    def user_notifications(self, ):
+    def user_notifications(self, page=1):
         """
         See the current user's notifications: http://www.goodreads.com/api#notifications
         """
-        xml = self.client_get('notifications?format=xml')
-        # TODO: Paging:  Parameters:     page: page number (optional, default
-        # 1)
-        o = etree.fromstring(xml)
-        try:
-            return [
-                Bunch(**{
-                    'created': n.created_at,
-                    'new': n.new.pyval,
-                    'html': n.body.html.text
-                })
-                for n in o.notifications.notification
-            ]
-        except AttributeError:
-            return None
+        return self.paginate(
+            lambda p: self.client_get(
+                'notifications', {'format': 'xml', 'page': p}),
+            'notifications', 'notification',
+            lambda n: Bunch(**NOTIFICATION.extract(n)), page=page)
 
     def user_compare(self, other_user_id):
         """
         Compare books with another member: http://www.goodreads.com/api#user.compare
         """
+        return self._coalesce(
+            'GET', 'user/compare/1.xml',
+            dict(self._user_key(), id=other_user_id),
+            lambda: self._user_compare(other_user_id))
+
+    def _user_compare(self, other_user_id):
         xml = self.client_get('user/compare/1.xml', {'id': other_user_id})
-        o = etree.fromstring(xml)
-        return Bunch(**{
-            'common': o.compare.common_count,
-            'not_common': o.compare.not_in_common,
-            'my-percent': o.compare.your_library_percent,
-            'my-total': o.compare.your_total_books_count,
-            'their-percent': o.compare.their_library_percent,
-            'their-total': o.compare.their_total_books_count,
-            'books': [Bunch(**{
-                'book': GoodreadsBook.from_object(r.book),
-                'my-rating': r.your_review.rating,
-                'my-review': r.your_review.text,
-                'their-rating': r.their_review.rating,
-                'their-review': r.their_review.text,
-            }) for r in o.compare.reviews.review],
-        })
+        with self.parsing():
+            o = parse(xml).find('compare')
+            comparison = COMPARISON.extract(o)
+            comparison['books'] = [
+                Bunch(book=GoodreadsBook.from_object(r.find('book')),
+                      **COMPARED_REVIEW.extract(r))
+                for r in o.iterfind('reviews/review')]
+            return Bunch(**comparison)
 
     # User Followers
-    def user_followers(self, user_id):
+    def user_followers(self, user_id, page=1):
         """
         Get a user's followers.
 
         Get an xml file with the given user's followers.
         """
-        raise NotImplementedError
-        # TODO: Paging: # Parameters:     key: Developer key (required).    id: Goodreads user_id    page: 1-N (optional, default 1)
-        # 302 with OATH, 401 with dev
-        xml = self.client_get(
-            'user/%s/following' %
-            user_id, {'id': user_id, 'format': 'xml'})
-        o = etree.fromstring(xml)
+        return self.paginate(
+            lambda p: self.client_get(
+                'user/%s/followers' % user_id, {'format': 'xml', 'page': p}),
+            'followers', 'user', GoodreadsUser.from_small_object, page=page)
 
     def user_following(self, ):
         """
@@ -430,14 +1190,19 @@ class Goodreads(object):
         # Parameters:     id: Goodreads user id of user to follow
 
     # User Friends
-    def user_friends(self, ):
+    def user_friends(self, user_id, sort=None, page=1):
         """
         Get a user's friends.
 
         Get an xml file with the given user's friends using OAuth.
         """
-        raise NotImplementedError
-        self.get('friend/user.xml')
+        data = {'format': 'xml'}
+        if sort:
+            data.update(sort=sort)
+        return self.paginate(
+            lambda p: self.client_get(
+                'friend/user/%s' % user_id, dict(data, page=p)),
+            'friends', 'user', GoodreadsUser.from_small_object, page=page)
 
     # Parameters:     id: Goodreads user_id (required)    page: 1-N (optional, default 1)    sort: first_name|date_added|last_online (optional)
     #
@@ -516,9 +1281,23 @@ class Goodreads(object):
         """
         Get info about an author by id: http://www.goodreads.com/api#author.show
         """
+        author = self._stored(GoodreadsAuthor, author_id)
+        if author is not None:
+            return author
+        return self._coalesce('GET', 'author/show.xml', {'id': author_id},
+                              lambda: self._author(author_id))
+
+    def _author(self, author_id):
         response = self.dev_get('author/show.xml', {'id': author_id})
-        xml = etree.fromstring(response.content)
-        books = [GoodreadsBook.from_element(book) for book in xml.author.books.iterchildren()]
+        with self.parsing():
+            if response.status_code == 404:
+                raise GoodreadsException('Author not found')
+            xml = parse(response.content).find('author')
+            author = GoodreadsAuthor.from_object(xml, self.entity_cache)
+            author.books = [
+                GoodreadsBook.from_small_element(book, self.entity_cache)
+                for book in xml.iterfind('books/book')]
+        return self._store(author)
 
     def author_search(self, name):
         """
@@ -528,28 +1307,32 @@ class Goodreads(object):
         self.dev_get('api/author_url/<ID>')
         # Parameters:     id: Author name    key: Developer key (required).
 
-    def author_books(self, author_id, limit=None):
+    def author_books(self, author_id, limit=None, prefetch=1, page=1):
         """
         Paginate an author's books: http://www.goodreads.com/api#author.books
+
+        While a page is consumed the next `prefetch` pages are fetched in the
+        background; no page past `limit` or the reported total is requested.
         """
-        page = 1
-        counter = 0
-        while True:
-            response = self.dev_get(
-                'author/list.xml',
-                {'id': author_id,
-                 'page': page})
-            # @UndefinedVariable
-            author_list = etree.fromstring(response.content)
-            for book in author_list.author.books.iterchildren():
-                yield self.book_from_element(book)
-                counter += 1
-                if counter <= limit:
-                    return
-            if author_list.author.books.attrib['total'] < author_list.author.books.attrib['end']:
-                page += 1
-            else:
-                return
+        paginator = self.paginate(
+            lambda p: self.dev_get(
+                'author/list.xml', {'id': author_id, 'page': p}, stream=True),
+            'books', 'book',
+            lambda b: GoodreadsBook.from_small_element(b, self.entity_cache),
+            page=page, limit=limit)
+        paginator.concurrency = prefetch
+        return paginator
+
+    def export_author_books(self, author_id, path, format='jsonl',
+                            checkpoint=None, batch_size=500):
+        """
+        Write all of an author's books to `path` as JSON Lines, CSV or
+        Parquet, in batches; see export.export() for resuming from a
+        checkpoint.
+        """
+        return export.export(
+            lambda page: self.author_books(author_id, page=page), path,
+            GoodreadsBook, format, batch_size, checkpoint)
 
     def fanship_create(self, ):
         """
@@ -594,29 +1377,112 @@ class Goodreads(object):
         # (required).    search[field]: Field to search, one of 'title',
         # 'author', or 'genre' (default is 'all')
 
-    def book(self, book_id):
+    def book(self, book_id, format=None, lazy=False):
         """
         Get the reviews for a book given a Goodreads book id: http://www.goodreads.com/api#book.show.
         XML responses also include shelves and book meta-data (title, author, et cetera).
+
+        `format` is 'xml' or 'json' (default: self.formats['book']).  JSON
+        responses hold only the reviews widget, so a JSON book has just its
+        id and reviews_widget.  With lazy=True an XML book defers its
+        shelves, series and similar books.
         """
-        raise NotImplementedError
-        self.dev_get('book/show?format=FORMAT')
-        # Parameters:     format: xml or json    key: Developer key (required).
-        # id: A Goodreads internal book_id    text_only: Only show reviews that
-        # have text (default false)    rating: Show only reviews with a
-        # particular rating (optional)
+        book = self._stored(GoodreadsBook, book_id)
+        if book is not None:
+            return book
+        format = format or self.formats['book']
+        params = {'id': book_id, 'format': format}
+        return self._coalesce(
+            'GET', 'book/show', dict(params, lazy=lazy),
+            lambda: self._book(self.dev_get('book/show', dict(params)),
+                               format, lazy, id=coerce(int, book_id)))
 
-    def book_by_isbn(self, isbn):
+    # Parameters:     format: xml or json    key: Developer key (required).
+    # id: A Goodreads internal book_id    text_only: Only show reviews that
+    # have text (default false)    rating: Show only reviews with a
+    # particular rating (optional)
+
+    def book_by_isbn(self, isbn, format=None, lazy=False, user_id=None):
         """
         Get the reviews for a book given an ISBN: http://www.goodreads.com/api#book.show_by_isbn
-        """
-        raise NotImplementedError
-        self.dev_get('book/isbn?format=FORMAT&isbn=ISBN')
-        # Parameters:     format: xml or json    callback: function to wrap JSON
-        # response if format=json    key: Developer key (required only for XML).
-        # user_id: 16193727 (required only for JSON)    isbn: The ISBN of the
-        # book to lookup.    rating: Show only reviews with a particular rating
-        # (optional)
+
+        As with book(), a JSON response holds only the reviews widget; JSON
+        also requires `user_id`.
+        """
+        format = format or self.formats['book_by_isbn']
+        if format == 'json' and user_id is None:
+            raise GoodreadsException('JSON book_by_isbn requires user_id')
+        if self.catalog is not None and format != 'json':
+            book = self.catalog.book_by_isbn(isbn)
+            if book is not None:
+                return book
+        params = {'isbn': isbn, 'format': format}
+        if format == 'json':
+            params['user_id'] = user_id
+        return self._coalesce(
+            'GET', 'book/isbn', dict(params, lazy=lazy),
+            lambda: self._book(self.dev_get('book/isbn', dict(params)),
+                               format, lazy, isbn=isbn))
+
+    # Parameters:     format: xml or json    callback: function to wrap JSON
+    # response if format=json    key: Developer key (required only for XML).
+    # user_id: 16193727 (required only for JSON)    isbn: The ISBN of the
+    # book to lookup.    rating: Show only reviews with a particular rating
+    # (optional)
+
+    def _book(self, response, format, lazy, **known):
+        with self.parsing():
+            if response.status_code == 404:
+                raise GoodreadsException('Book not found')
+            if format == 'json':
+                try:
+                    body = json.loads(response.content)
+                except ValueError:
+                    raise GoodreadsException('Unexpected book response')
+                # a partial record: neither cached nor cataloged
+                return GoodreadsBook.from_widget(body, **known)
+            element = parse(response.content).find('book')
+            if element is None:
+                raise GoodreadsException('Unexpected book response')
+            book = GoodreadsBook.from_element(element, self.entity_cache, lazy)
+        if self.catalog is not None:
+            self.catalog.add(book)
+        return book
+
+    # Bulk lookups
+
+    def _bulk(self, fetch, cls, ids, workers, stream):
+        cached = None
+        if self.entity_cache is not None:
+            def cached(id):
+                return self.entity_cache.get(cls, id, complete=True)
+        results = fetch_many(fetch, ids, workers or self.bulk_workers, cached)
+        return results if stream else list(results)
+
+    def users(self, user_ids, workers=None, stream=False):
+        """
+        Look up many members by id: a bulk.Result per id, in input order.
+
+        Lookups run concurrently within the rate limit, repeated ids are
+        fetched once and a failed id does not stop the others; stream=True
+        returns a generator instead of a list (see bulk.fetch_many).
+        """
+        return self._bulk(lambda id: self.user(user_id=id), GoodreadsUser,
+                          user_ids, workers, stream)
+
+    def authors(self, author_ids, workers=None, stream=False):
+        """
+        Look up many authors by id, like users().
+        """
+        return self._bulk(self.author, GoodreadsAuthor, author_ids, workers,
+                          stream)
+
+    def books(self, book_ids, format=None, workers=None, stream=False):
+        """
+        Look up many books by id, like users().
+        """
+        return self._bulk(lambda id: self.book(id, format), GoodreadsBook,
+                          book_ids, workers, stream)
 
     # Shelves
 
@@ -691,14 +1557,21 @@ class Goodreads(object):
     # 'user_status', 'video'    id: Id of resource given as type param
     # comment[body]: This review was really insightful!
 
-    def comment_list(self, ):
+    def comment_list(self, resource_type, resource_id, page=1):
         """
         List comments on a subject.
 
         Lists comments
         """
-        raise NotImplementedError
-        self.get('comment.xml')
+        return self.paginate(
+            lambda p: self.dev_get(
+                'comment/index.xml',
+                {'type': resource_type, 'id': resource_id, 'page': p},
+                stream=True),
+            'comments', 'comment',
+            lambda c: Bunch(
+                user=GoodreadsUser.from_small_object(c.find('user')),
+                **COMMENT.extract(c)), page=page)
 
     # Parameters:     type: one of 'author_blog_post', 'book_news_post',
     # 'blog', 'chapter', 'comment', 'event_response', 'fanship', 'interview',
@@ -734,14 +1607,24 @@ class Goodreads(object):
     # 'title' ('members' will sort by number of members in the group)    key:
     # Developer key (required).
 
-    def group_members(self, ):
+    def group_members(self, group_id, sort=None, q=None, page=1):
         """
         Return members of a particular group.
 
         Returns an XML list of members of the group
         """
-        raise NotImplementedError
-        self.get('group/members.xml?id=GROUP_ID')
+        data = {'id': group_id}
+        if sort:
+            data.update(sort=sort)
+        if q:
+            data.update(q=q)
+        return self.paginate(
+            lambda p: self.dev_get('group/members.xml', dict(data, page=p),
+                                   stream=True),
+            'group_users', 'group_user',
+            lambda m: Bunch(
+                user=GoodreadsUser.from_small_object(m.find('user')),
+                **GROUP_MEMBER.extract(m)), page=page)
 
     # Parameters:     sort: One of 'last_online', 'num_comments',
     # 'date_joined', 'num_books', 'first_name'    q: List of names to search
@@ -780,14 +1663,18 @@ class Goodreads(object):
     # owned_book[original_purchase_location]: where this book was purchased
     # owned_book[unique_code]: BookCrossing id (BCID)
 
-    def owned_books_list(self, ):
+    def owned_books_list(self, user_id, page=1):
         """
         List books owned by a user.
 
         Get an xml file with a list of owned books using OAuth. You'll need to register your app (required).
         """
-        raise NotImplementedError
-        self.get('owned_books/user?format=xml')
+        return self.paginate(
+            lambda p: self.client_get(
+                'owned_books/user', {'format': 'xml', 'id': user_id,
+                                     'page': p}),
+            'owned_books', 'owned_book',
+            lambda o: Bunch(**OWNED_BOOK.extract(o)), page=page)
 
     # Parameters:     id: Goodreads user_id    page: 1-N (optional, default 1)
 
@@ -858,14 +1745,42 @@ class Goodreads(object):
 
     # Parameters: (self,): Book_id: Goodreads book_id (required)
 
-    def reviews_list(self, ):
+    def reviews_list(self, user_id, shelf=None, sort=None, order=None,
+                     query=None, per_page=None, page=1, limit=None):
         """
         Get the books on a members shelf.
 
         Get the books on a members shelf. Customize the feed with the below variables. Viewing members with profiles who have set them as visible to members only or just their friends requires using OAuth.
         """
-        raise NotImplementedError
-        self.get('review/list?format=xml&v=2')
+        data = {'v': 2, 'format': 'xml', 'id': user_id, 'shelf': shelf,
+                'sort': sort, 'order': order, 'search[query]': query,
+                'per_page': per_page}
+        data = dict((k, v) for k, v in data.items() if v is not None)
+        return self.paginate(
+            lambda p: self.dev_get('review/list', dict(data, page=p),
+                                   stream=True),
+            'reviews', 'review',
+            lambda r: GoodreadsReview.from_element(r, self.entity_cache),
+            page=page, limit=limit)
+
+    def sync_shelf(self, user_id, shelf=None, full=None):
+        """
+        What changed on a member's shelf since it was last synced: a
+        shelfsync.Changeset of reviews added and updated, and of reviews
+        removed when the whole shelf was read (see shelfsync.ShelfSync).
+        """
+        return self.shelf_sync.sync(user_id, shelf, full)
+
+    def export_reviews(self, user_id, path, shelf=None, format='jsonl',
+                       checkpoint=None, batch_size=500):
+        """
+        Write the reviews on a member's shelf (all of them by default) to
+        `path`, like export_author_books().
+        """
+        return export.export(
+            lambda page: self.reviews_list(user_id, shelf=shelf,
+                                           per_page=200, page=page),
+            path, GoodreadsReview, format, batch_size, checkpoint)
 
     # Parameters:     v: 2    id: Goodreads id of the user    shelf: read, currently-reading, to-read, etc. (optional)    sort: title, author, cover, rating, year_pub, date_pub, date_pub_edition, date_started, date_read, date_updated, date_added, recommender, avg_rating, num_ratings, review, read_count, votes, random, comments, notes, isbn, isbn13, asin, num_pages, format, position, shelves, owned, date_purchased, purchase_location, condition (optional)    search[query]: query text to match against member's books (optional)    order: a, d (optional)    page: 1-N (optional)    per_page: 1-200 (optional)    key: Developer key (required).
     #
@@ -920,14 +1835,51 @@ class Goodreads(object):
     # review[rating]: Rating (0-5) (optional, 0 means no rating)
     # review[read_at]: Date (optional, YYYY-MM-DD format, e.g. 2008-02-01)
 
-    def book_review_counts(self, ):
+    def book_review_counts(self, isbns, workers=None, stream=False,
+                           chunk_size=1000):
         """
         Get review statistics given a list of ISBNs.
 
         Get review statistics for books given a list of ISBNs. ISBNs can be specified as an array (e.g. isbns[]=0441172717&isbns[]=0141439602) or a single, comma-separated string (e.g. isbns=0441172717,0141439602). You can mix ISBN10s and ISBN13s, but you'll receive a 422 error if you don't specify any, and you'll receive a 404 if none are found.
-        """
-        raise NotImplementedError
-        self.get('book/review_counts.json')
+
+        `isbns` may also be any iterable, however long: it is read lazily
+        and sent `chunk_size` ISBNs per request, up to `workers` requests
+        at a time within the rate limit.  Returns the statistics of every
+        book found, in input order; stream=True returns a generator
+        instead of a list.  A chunk answered 404 or 422 only leaves its
+        ISBNs out, like any other ISBN Goodreads does not know.
+        """
+        if isinstance(isbns, basestring):
+            isbns = isbns.split(',')
+        if isinstance(isbns, (list, tuple)) and not isbns:
+            raise GoodreadsException('ISBNs required')
+        counts = self._review_counts(isbns, workers, chunk_size)
+        return counts if stream else list(counts)
+
+    def _review_counts(self, isbns, workers, chunk_size):
+        isbns = (isbn for isbn in (str(i).strip() for i in isbns) if isbn)
+        requests = (','.join(chunk) for chunk in chunks(isbns, chunk_size))
+        # chunks are never repeated, so fetch_many need not remember them
+        for result in fetch_many(self._review_counts_chunk, requests,
+                                 workers or self.bulk_workers, memo=0):
+            if not result.ok:
+                raise result.error
+            for counts in result.value:
+                yield counts
+
+    def _review_counts_chunk(self, isbns):
+        return self._coalesce(
+            'GET', 'book/review_counts.json', {'isbns': isbns},
+            lambda: self._book_review_counts(isbns))
+
+    def _book_review_counts(self, isbns):
+        response = self.dev_get('book/review_counts.json', {'isbns': isbns})
+        with self.parsing():
+            # none found, or none valid
+            if response.status_code in (404, 422):
+                return []
+            return [Bunch(**REVIEW_COUNTS.decode(b))
+                    for b in json.loads(response.content)['books']]
 
     # Parameters:     key: Developer key (required).    isbns: Array of ISBNs
     # or a comma seperated string of ISBNs (1000 ISBNs per request max.)
@@ -951,9 +1903,39 @@ class Goodreads(object):
     def book_isbn_to_id(self, isbn):
         """
         Get the Goodreads book ID given an ISBN: http://www.goodreads.com/api#book.isbn_to_id
+
+        None if Goodreads does not know the ISBN; see resolve_isbns() for
+        many at once.
         """
-        raise NotImplementedError
-        response = self.get('book/isbn_to_id', {'isbn': isbn})
+        key = normalize(isbn)
+        if key is not None and self.catalog is not None:
+            book_id = self.catalog.isbn_ids([key]).get(key)
+            if book_id is not None:
+                return book_id
+        return self._coalesce(
+            'GET', 'book/isbn_to_id', {'isbn': isbn},
+            lambda: self._book_isbn_to_id(isbn, key))
+
+    def _book_isbn_to_id(self, isbn, key):
+        response = self.dev_get('book/isbn_to_id', {'isbn': isbn})
+        with self.parsing():
+            if response.status_code == 404:
+                return None
+            book_id = int(response.content.strip())
+        if key is not None and self.catalog is not None:
+            self.catalog.add_isbns([(key, book_id)])
+        return book_id
+
+    def resolve_isbns(self, isbns):
+        """
+        Map many ISBNs to book ids: an OrderedDict from each distinct ISBN
+        to its id, or None for an invalid or unknown one.
+
+        ISBN-10s and ISBN-13s may be mixed and hyphenated.  Ids already in
+        the catalog and ISBNs already found unknown cost no request; the
+        rest go out in batches of 1000 (see isbn.ISBNResolver).
+        """
+        return self.isbn_resolver.resolve(isbns)
 
     # Series
     def series_show(self, ):
@@ -1011,21 +1993,21 @@ class Goodreads(object):
         # to the topic (user will get one email only). To enable, set to 'on';
         # otherwise, default is not to add to update feed
 
-    def topic_group_folder(self, ):
+    def topic_group_folder(self, folder_id, group_id=None, sort=None,
+                           order=None, page=1):
         """
         Get list of topics in a group's folder.
 
         Returns a list of topics in a group's folder specified either by folder id or by group id.
         """
-        raise NotImplementedError
-        self.get('topic/group_folder/FOLDER_ID.xml')
-        # Parameters:     group_id: If supplied and id is set to 0, then will
-        # return topics from the general folder for the group indicated by
-        # group_id. If id is non-zero, this param is ignored. Note: may return
-        # 404 if there are no topics in the general folder for the specified
-        # group    page: Page in results to show, 1-N (default 1)    sort: One
-        # of 'comments_count', 'title', 'updated_at', 'views'    order: 'a' for
-        # ascending, 'd' for descending    key: Developer key (required).
+        data = {'group_id': group_id, 'sort': sort, 'order': order}
+        data = dict((k, v) for k, v in data.items() if v is not None)
+        return self.paginate(
+            lambda p: self.dev_get(
+                'topic/group_folder/%s.xml' % folder_id, dict(data, page=p),
+                stream=True),
+            'topics', 'topic',
+            lambda t: Bunch(**TOPIC.extract(t)), page=page)
 
     def topic_show(self, ):
         """
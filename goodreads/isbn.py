@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ISBN normalization and bulk ISBN to book id resolution.
+
+    >>> resolver = ISBNResolver(g, catalog=Catalog('catalog.db'))
+    >>> resolver.resolve(['0-06-105488-7', '9780553575378', 'not an isbn'])
+    OrderedDict([('0-06-105488-7', 3001), ('9780553575378', 3002),
+                 ('not an isbn', None)])
+
+Every ISBN is reduced to its ISBN-13 form, so the ISBN-10 and ISBN-13 of
+a book are the same key.  Known ids come from the catalog's ISBN index,
+ISBNs Goodreads did not know are remembered in a Bloom filter, and only
+the rest are sent, up to 1000 per book_review_counts request.
+"""
+from collections import OrderedDict
+import hashlib
+import math
+import re
+import struct
+
+# hyphens, spaces and a leading 'ISBN' label are not part of the number
+_SEPARATORS = re.compile(r'^\s*ISBN(?:-1[03])?:?|[\s-]', re.IGNORECASE)
+
+
+def isbn10_check(digits):
+    total = sum((10 - i) * int(d) for i, d in enumerate(digits[:9]))
+    check = (11 - total % 11) % 11
+    return 'X' if check == 10 else str(check)
+
+
+def isbn13_check(digits):
+    total = sum((3 if i % 2 else 1) * int(d)
+                for i, d in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def normalize(isbn):
+    """
+    The ISBN-13 form of an ISBN-10 or ISBN-13, or None if it is not a valid
+    one (wrong length, characters or check digit).
+    """
+    if isbn is None:
+        return None
+    isbn = _SEPARATORS.sub('', str(isbn)).upper()
+    if len(isbn) == 10 and isbn[:9].isdigit() and \
+            (isbn[9].isdigit() or isbn[9] == 'X'):
+        if isbn10_check(isbn) != isbn[9]:
+            return None
+        isbn = '978' + isbn[:9]
+        return isbn + isbn13_check(isbn)
+    if len(isbn) == 13 and isbn.isdigit() and isbn[:3] in ('978', '979'):
+        if isbn13_check(isbn) != isbn[12]:
+            return None
+        return isbn
+    return None
+
+
+class BloomFilter(object):
+    """
+    Compact set membership with no false negatives and, up to `capacity`
+    members, false positives at about `error_rate`.  A million members at
+    0.1% take under 2 MB.  Instances pickle.
+    """
+
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = int(math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, int(round(self.size / float(capacity) *
+                                       math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # double hashing: h1 + i * h2 stands in for `hashes` hash functions
+        h1, h2 = struct.unpack('<QQ', hashlib.md5(key).digest())
+        return ((h1 + i * h2) % self.size for i in xrange(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(key))
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+
+
+class ISBNResolver(object):
+    """
+    Maps ISBNs to Goodreads book ids in bulk for a Goodreads client.
+
+    With a catalog.Catalog, ids found are kept in its ISBN index and read
+    back from it (along with the ISBNs of every book stored there), so they
+    survive restarts.  `negative` is the filter of ISBNs Goodreads did not
+    know; it never forgets, so an ISBN added to Goodreads later stays
+    unresolved until it is cleared, and about `error_rate` of unseen ISBNs
+    are wrongly taken as unknown.
+    """
+
+    def __init__(self, client, catalog=None, negative=None, batch_size=1000):
+        self.client = client
+        self.catalog = catalog
+        self.negative = negative if negative is not None else BloomFilter()
+        # book_review_counts takes up to 1000 ISBNs per request
+        self.batch_size = batch_size
+        self.indexed = 0
+        self.known_missing = 0
+        self.requested = 0
+        self.found = 0
+        self.invalid = 0
+
+    def resolve(self, isbns):
+        """
+        An OrderedDict mapping each distinct input ISBN to its book id, or
+        to None if it is invalid or Goodreads does not know it.
+        """
+        keys = OrderedDict()
+        for isbn in isbns:
+            if isbn not in keys:
+                keys[isbn] = normalize(isbn)
+        wanted = sorted(set(key for key in keys.itervalues() if key))
+        self.invalid += sum(1 for key in keys.itervalues() if not key)
+
+        ids = {}
+        if self.catalog is not None and wanted:
+            ids = self.catalog.isbn_ids(wanted)
+            self.indexed += len(ids)
+        misses = []
+        for key in wanted:
+            if key in ids:
+                continue
+            if key in self.negative:
+                self.known_missing += 1
+            else:
+                misses.append(key)
+
+        if misses:
+            found = self._request(misses)
+            for key in misses:
+                if key not in found:
+                    self.negative.add(key)
+            ids.update(found)
+        return OrderedDict((isbn, ids.get(key))
+                           for isbn, key in keys.iteritems())
+
+    def _request(self, misses):
+        self.requested += len(misses)
+        wanted = set(misses)
+        found = {}
+        for counts in self.client.book_review_counts(
+                misses, stream=True, chunk_size=self.batch_size):
+            for isbn in (counts.isbn13, counts.isbn):
+                key = normalize(isbn)
+                if key in wanted:
+                    found[key] = counts.id
+        self.found += len(found)
+        if self.catalog is not None and found:
+            self.catalog.add_isbns(found.iteritems())
+        return found
+
+    def stats(self):
+        return {'indexed': self.indexed, 'known_missing': self.known_missing,
+                'requested': self.requested, 'found': self.found,
+                'invalid': self.invalid, 'negative': len(self.negative)}
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from bisect import bisect_left
+import re
+import threading
+
+# upper bounds (seconds) of the default histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+           2.5, 5.0, 10.0, 30.0)
+
+_ID = re.compile(r'(?<=/)\d+(?=[/.]|$)')
+
+
+def endpoint_template(url):
+    """
+    Metric label for a request url: query dropped, numeric ids replaced.
+
+    >>> endpoint_template('user/1000001/followers?page=2')
+    'user/:id/followers'
+    """
+    return _ID.sub(':id', url.split('?', 1)[0].lstrip('/'))
+
+
+class Counter(object):
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge(object):
+
+    def __init__(self):
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return self.value
+
+
+class Histogram(object):
+    """
+    Fixed-bucket histogram; percentiles are estimated as the upper bound of
+    the bucket they fall in.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def percentile(self, q):
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q / 100.0 * self.count
+            seen = 0
+            for bound, count in zip(self.buckets + (self.max,), self.counts):
+                seen += count
+                if seen >= rank and count:
+                    return min(bound, self.max)
+            return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+
+class MetricsRegistry(object):
+    """
+    In-process counters and histograms, keyed by name and labels.
+
+    Pass one to Goodreads(metrics=...) to have every request recorded under
+    its endpoint template:
+
+        requests{endpoint,status}  bytes{endpoint}  cache_hits{endpoint}
+        wait_seconds  network_seconds  download_seconds  parse_seconds
+
+    and, as they happen, retries{endpoint,status} and the request_rate
+    gauge (the rate limiter's current requests per second).
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name, labels):
+        if not labels:
+            return name
+        return '%s{%s}' % (name, ','.join(
+            '%s=%s' % item for item in sorted(labels.items())))
+
+    def _get(self, factory, name, labels):
+        key = self.key(name, labels)
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = self._metrics[key] = factory()
+        return metric
+
+    def counter(self, name, **labels):
+        return self._get(Counter, name, labels)
+
+    def gauge(self, name, **labels):
+        return self._get(Gauge, name, labels)
+
+    def histogram(self, name, **labels):
+        return self._get(lambda: Histogram(self.buckets), name, labels)
+
+    def snapshot(self):
+        """
+        {'counters': {key: value}, 'gauges': {key: value},
+         'histograms': {key: summary}}
+        """
+        with self._lock:
+            metrics = self._metrics.items()
+        snapshot = {'counters': {}, 'gauges': {}, 'histograms': {}}
+        kinds = {Counter: 'counters', Gauge: 'gauges', Histogram: 'histograms'}
+        for key, metric in metrics:
+            snapshot[kinds[type(metric)]][key] = metric.snapshot()
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def record(self, info):
+        """
+        Fold one finished RequestInfo into the registry.
+        """
+        endpoint = info.endpoint
+        self.counter('requests', endpoint=endpoint,
+                     status=info.status).inc()
+        if info.cached:
+            self.counter('cache_hits', endpoint=endpoint).inc()
+        if info.bytes:
+            self.counter('bytes', endpoint=endpoint).inc(info.bytes)
+        for name in ('wait', 'network', 'download', 'parse'):
+            value = getattr(info, name)
+            if value is not None:
+                self.histogram('%s_seconds' % name,
+                               endpoint=endpoint).observe(value)
+
+
+class RequestInfo(object):
+    """
+    What one request cost, handed to hooks once its response is parsed.
+
+    Times are in seconds; `network` runs to the response headers,
+    `download` is the rest of the body (None when streamed, in which case
+    it is part of `parse`).
+    """
+    __slots__ = ('method', 'endpoint', 'status', 'bytes', 'cached', 'wait',
+                 'network', 'download', 'parse', 'started')
+
+    def __init__(self, method, url, started):
+        self.method = method
+        self.endpoint = endpoint_template(url)
+        self.started = started
+        self.status = None
+        self.bytes = None
+        self.cached = False
+        self.wait = None
+        self.network = None
+        self.download = None
+        self.parse = None
+
+    def __repr__(self):
+        return '<RequestInfo:%s %s:%s>' % (self.method, self.endpoint,
+                                           self.status)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from collections import deque
+import time
+
+from streaming import CHUNK_SIZE, StreamParser
+
+
+class Paginator(object):
+    """
+    Lazily iterate the items of a paged list endpoint.
+
+    `fetch(page)` returns a response (or its body) for one page; each `tag`
+    element under `container` is passed to `build` and yielded.  Once a page
+    reports start/end/total, up to `concurrency` following pages are fetched
+    in the background, never past the total or `limit`.  Lists without those
+    attributes are walked one page at a time until a short or empty page.
+
+    A page needed right away (the first one, and every page of a list
+    without those attributes) is fetched on the consumer's thread and
+    parsed as its body streams in.  Prefetched pages are downloaded whole
+    on the worker, which trades their memory for overlapping the download.
+
+    `cursor` is the first page not yet fully consumed; iterating again, or a
+    new Paginator started at that page, resumes from there.
+    """
+
+    def __init__(self, client, fetch, container, tag, build, page=1,
+                 limit=None, concurrency=None):
+        self.client = client
+        self.fetch = fetch
+        self.container = container
+        self.tag = tag
+        self.build = build
+        self.cursor = page
+        self.limit = limit
+        self.concurrency = concurrency
+        self.total = None
+        self._iterator = None
+
+    def _fetch(self, page, buffer=True):
+        response = self.fetch(page)
+        if buffer and not isinstance(response, basestring):
+            response.content  # download on the worker, not the consumer
+        # the page is parsed on the consumer's thread
+        return response, self.client.take_request()
+
+    def _prefetch(self, page):
+        return self.client.prefetch(self._fetch, page)
+
+    def _items(self, response):
+        parser = StreamParser(self.container, self.tag)
+        if isinstance(response, basestring):
+            return parser, parser.parse([response])
+        return parser, parser.parse_response(response, CHUNK_SIZE)
+
+    def _last_page(self, attrib, page, first_start):
+        """
+        Last page worth requesting, or None if the list is not annotated.
+        """
+        try:
+            start, end, total = [int(attrib[a])
+                                 for a in ('start', 'end', 'total')]
+        except (KeyError, ValueError):
+            return None
+        self.total = total
+        if self.limit:
+            total = min(total, first_start - 1 + self.limit)
+        if end >= total:
+            return page
+        return -(-total // (end - start + 1))
+
+    def next(self):
+        if self._iterator is None:
+            self._iterator = iter(self)
+        return next(self._iterator)
+
+    def close(self):
+        if self._iterator is not None:
+            self._iterator.close()
+
+    def _build(self, elements, info):
+        """
+        Models built from one page.  With a RequestInfo, the time spent
+        parsing and building (not in the consumer) becomes its parse time.
+        """
+        if info is None:
+            for element in elements:
+                yield self.build(element)
+            return
+        info.parse = 0.0
+        try:
+            started = time.time()
+            for element in elements:
+                item = self.build(element)
+                info.parse += time.time() - started
+                yield item
+                started = time.time()
+            info.parse += time.time() - started
+        finally:
+            self.client.finish_request(info)
+
+    def __iter__(self):
+        concurrency = max(self.concurrency or self.client.prefetch_workers, 1)
+        # (page, future), where a future of None is fetched when reached
+        pending = deque([(self.cursor, None)])
+        next_page = self.cursor + 1
+        first_start = None
+        page_size = None
+        count = 0
+        elements = items = None
+        try:
+            while pending:
+                page, future = pending.popleft()
+                if future is None:
+                    response, info = self._fetch(page, buffer=False)
+                else:
+                    response, info = future.result()
+                parser, elements = self._items(response)
+                items = self._build(elements, info)
+                last_page = None
+                size = 0
+                for item in items:
+                    if size == 0:
+                        if first_start is None:
+                            first_start = int(parser.attrib.get('start', 1))
+                        last_page = self._last_page(
+                            parser.attrib, page, first_start)
+                        if last_page is not None:
+                            last_page = min(last_page, page + concurrency)
+                            while next_page <= last_page:
+                                pending.append(
+                                    (next_page, self._prefetch(next_page)))
+                                next_page += 1
+                    size += 1
+                    yield item
+                    count += 1
+                    if self.limit and count >= self.limit:
+                        return
+                self.cursor = page + 1
+                if (last_page is None and not pending and size and
+                        (page_size is None or size >= page_size)):
+                    page_size = page_size or size
+                    pending.append((next_page, None))
+                    next_page += 1
+        finally:
+            if items is not None:
+                items.close()
+                # closes a streamed response read only in part
+                elements.close()
+            for _, future in pending:
+                if future is None:
+                    continue
+                if (not future.cancel() and future.done() and
+                        future.exception() is None):
+                    # fetched but never parsed
+                    self.client.finish_request(future.result()[1])
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from email.utils import mktime_tz, parsedate_tz
+import random
+import threading
+import time
+
+# statuses meaning "slow down"
+THROTTLED = (429, 503)
+
+
+def parse_retry_after(value, now=None):
+    """
+    Seconds to wait from a Retry-After header (delay-seconds or HTTP-date),
+    or None.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    return max(mktime_tz(date) - (now or time.time()), 0.0)
+
+
+def backoff(attempt, base, cap, rand=random.random):
+    """
+    Delay before retry number `attempt` (from 0): exponential from `base`,
+    capped, with the upper half jittered so retries spread out.
+    """
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + rand() * delay / 2
+
+
+class RateLimiter(object):
+    """
+    Thread-safe token bucket.
+
+    Tokens accrue at `rate` per second up to `burst`.  Blocking callers reserve
+    their tokens under the lock and sleep outside of it, so waiters are served
+    in arrival order and one instance can be shared by any number of clients.
+    """
+
+    def __init__(self, rate=1.0, burst=1, clock=time.time, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+        self.rate = float(rate)
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def _refill(self, now):
+        # nothing accrues while paused
+        elapsed = now - max(self._updated, self._paused_until)
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    @property
+    def available(self):
+        with self._lock:
+            self._refill(self.clock())
+            return self._tokens
+
+    def reserve(self, tokens=1, timeout=None):
+        """
+        Take tokens, returning how long the caller must wait before using
+        them, or None if that would exceed timeout.
+        """
+        if tokens > self.burst:
+            raise ValueError('cannot acquire more tokens than burst')
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            paused = max(self._paused_until - now, 0.0)
+            if self._tokens >= tokens and not paused:
+                self._tokens -= tokens
+                return 0.0
+            delay = paused + max(tokens - self._tokens, 0.0) / self.rate
+            if timeout is not None and delay > timeout:
+                return None
+            self._tokens -= tokens
+            return delay
+
+    def acquire(self, tokens=1, blocking=True, timeout=None):
+        """
+        Take tokens from the bucket; returns False if they could not be had
+        without blocking (or within timeout).
+        """
+        delay = self.reserve(tokens, timeout=timeout if blocking else 0)
+        if delay is None:
+            return False
+        if delay > 0:
+            self.sleep(delay)
+        return True
+
+    def try_acquire(self, tokens=1):
+        return self.acquire(tokens, blocking=False)
+
+    def pause(self, seconds):
+        """
+        Hand out no tokens for `seconds`, e.g. for a server's Retry-After;
+        the bucket is emptied so requests resume one at a time.
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._paused_until = max(self._paused_until, now + seconds)
+
+    def feedback(self, status, latency=None):
+        """
+        Told the outcome of each request; a fixed-rate bucket ignores it.
+        """
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    Token bucket whose rate follows the server (AIMD).
+
+    The rate only grows while healthy responses come back and the bucket is
+    empty, i.e. while the limit is what holds requests back.  Until the
+    first backoff it doubles about every second (slow start); after that it
+    grows by about `increase` requests per second every second (rate +=
+    increase / rate per response), up to `max_rate`.  A 429 or 503, or a
+    response slower than `latency` seconds (default: three times the
+    fastest smoothed latency seen, and at least a quarter second more),
+    cuts it by `decrease`, at most once per
+    `cooldown` seconds so that a burst of concurrent failures counts as one
+    congestion signal.  The rate never drops below `min_rate`.
+    """
+    throttled = THROTTLED
+
+    def __init__(self, rate=1.0, burst=1, min_rate=0.1, max_rate=None,
+                 increase=0.5, decrease=0.5, latency=None, cooldown=1.0,
+                 clock=time.time, sleep=time.sleep):
+        RateLimiter.__init__(self, rate, burst, clock=clock, sleep=sleep)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate) if max_rate else None
+        self.increase = increase
+        self.decrease = decrease
+        self.latency = latency
+        self.cooldown = cooldown
+        self.smoothed = None
+        self.fastest = None
+        self.backoffs = 0
+        self._decreased = None
+
+    def _slow(self, latency):
+        if latency is None:
+            return False
+        if self.smoothed is None:
+            self.smoothed = latency
+        else:
+            self.smoothed = 0.8 * self.smoothed + 0.2 * latency
+        if self.latency is not None:
+            return self.smoothed > self.latency
+        if self.fastest is None or self.smoothed < self.fastest:
+            self.fastest = self.smoothed
+        return self.smoothed > max(3 * self.fastest, self.fastest + 0.25)
+
+    def _set_rate(self, rate):
+        if self.max_rate is not None:
+            rate = min(rate, self.max_rate)
+        self.rate = max(rate, self.min_rate)
+
+    def feedback(self, status, latency=None):
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            if status in self.throttled or self._slow(latency):
+                if (self._decreased is None or
+                        now - self._decreased >= self.cooldown):
+                    self._decreased = now
+                    self.backoffs += 1
+                    self._set_rate(self.rate * self.decrease)
+                    # the slowdown was measured against the old rate
+                    self.smoothed = None
+            elif status < 500 and self._tokens < 1:
+                if self.backoffs:
+                    self._set_rate(self.rate + self.increase / self.rate)
+                else:
+                    self._set_rate(self.rate + 1)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+import threading
+
+from lxml import etree
+
+_local = threading.local()
+
+
+def parse(content):
+    """
+    Plain (non-objectify) tree of a whole response body.
+
+    Blank text is dropped and ids are not collected; each thread keeps its
+    own parser since lxml parsers must not be shared across threads.
+    """
+    parser = getattr(_local, 'parser', None)
+    if parser is None:
+        parser = _local.parser = etree.XMLParser(
+            remove_blank_text=True, collect_ids=False)
+    return etree.fromstring(content, parser)
+
+
+def parse_datetime(text):
+    """
+    Naive UTC datetime from the API's 'Tue Feb 18 10:21:03 -0800 2014' or
+    ISO 8601 '2014-02-18T10:21:03-08:00' timestamps.
+    """
+    text = text.strip()
+    try:
+        if text[:4].isdigit():
+            stamp, offset = text[:19], text[19:].replace(':', '')
+            value = datetime.strptime(stamp, '%Y-%m-%dT%H:%M:%S')
+        else:
+            parts = text.split()
+            offset = parts.pop(4)
+            value = datetime.strptime(' '.join(parts), '%a %b %d %H:%M:%S %Y')
+    except (ValueError, IndexError):
+        return None
+    if offset and offset not in ('Z', 'UTC'):
+        sign = -1 if offset[0] == '-' else 1
+        minutes = int(offset[1:3]) * 60 + int(offset[3:5])
+        value -= sign * timedelta(minutes=minutes)
+    return value
+
+
+def _text(text):
+    return text or None
+
+
+def _bool(text):
+    text = text.strip().lower()
+    return text in ('true', '1') if text else None
+
+
+def _number(kind):
+    def convert(text):
+        try:
+            return kind(text)
+        except ValueError:
+            return None
+    return convert
+
+
+def _datetime(text):
+    return parse_datetime(text) if text.strip() else None
+
+
+# text -> value for each field type; None text never reaches them
+CONVERTERS = {
+    str: _text,
+    int: _number(int),
+    float: _number(float),
+    bool: _bool,
+    datetime: _datetime,
+}
+
+
+def native(kind, element):
+    """
+    The text of an element (or an attribute value) as a plain Python `kind`,
+    or None when missing, empty or malformed.
+    """
+    if element is None:
+        return None
+    text = element if isinstance(element, basestring) else element.text
+    if text is None:
+        return None
+    return CONVERTERS[kind](text)
+
+
+def coerce(kind, value):
+    """
+    A decoded JSON value as a plain Python `kind`, or None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, basestring):
+        return CONVERTERS[kind](value)
+    if kind is datetime or isinstance(value, (dict, list)):
+        return None
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Schema(object):
+    """
+    Precompiled field map for one kind of record.
+
+    Fields are (name, path, type) or (name, path, type, default) tuples; the
+    path is a child tag, a nested path ('series/title') or an attribute
+    ('@id').  Direct children are picked out in a single pass over the
+    element, filtered by tag inside lxml, so a record costs one walk however
+    many fields it has.  Missing, empty or malformed values come back as the
+    field's default.
+
+    The same schema decodes the JSON form of a record, where each path step
+    is a key (attributes are plain keys).
+    """
+
+    def __init__(self, *fields):
+        self.fields = fields
+        self.defaults = {}
+        self._children = {}
+        self._nested = []
+        self._attributes = []
+        self._keys = []
+        for field in fields:
+            name, path, kind = field[:3]
+            default = field[3] if len(field) > 3 else None
+            self.defaults[name] = default
+            self._keys.append(
+                (name, tuple(path.lstrip('@').split('/')), kind, default))
+            entry = (name, CONVERTERS[kind], default)
+            if path.startswith('@'):
+                self._attributes.append((path[1:],) + entry)
+            elif '/' in path or path in self._children:
+                self._nested.append((path,) + entry)
+            else:
+                self._children[path] = entry
+        self._tags = tuple(self._children)
+
+    def extract(self, element):
+        """
+        Dict of field name to native value for `element`.
+        """
+        values = self.defaults.copy()
+        if element is None:
+            return values
+        pending = self._children.copy()
+        for child in element.iterchildren(*self._tags) if pending else ():
+            entry = pending.pop(child.tag, None)
+            if entry is None:
+                continue
+            text = child.text
+            if text is not None:
+                value = entry[1](text)
+                if value is not None:
+                    values[entry[0]] = value
+        for path, name, convert, default in self._nested:
+            text = element.findtext(path)
+            if text is not None:
+                value = convert(text)
+                if value is not None:
+                    values[name] = value
+        for attribute, name, convert, default in self._attributes:
+            text = element.get(attribute)
+            if text is not None:
+                value = convert(text)
+                if value is not None:
+                    values[name] = value
+        return values
+
+    def decode(self, record):
+        """
+        Dict of field name to native value for a decoded JSON object.
+        """
+        values = {}
+        for name, keys, kind, default in self._keys:
+            value = record
+            for key in keys:
+                value = value.get(key) if isinstance(value, dict) else None
+            value = coerce(kind, value)
+            values[name] = default if value is None else value
+        return values
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Incremental sync of members' shelves.
+
+    >>> sync = ShelfSync(g)
+    >>> changes = sync.sync(1000001, shelf='read')
+    >>> changes.added, changes.updated, changes.removed
+
+A shelf is read most recently updated first, and reading stops at the
+first review no newer than the shelf's watermark: the last update seen by
+the previous sync.  A shelf that changed little since costs one request.
+
+Removals cannot be seen that way, so every `reconcile_every` seconds (and
+on the first sync of a shelf) the whole shelf is read and compared with
+the reviews known to be on it.
+"""
+import threading
+import time
+
+from bulk import fetch_many
+
+
+class Changeset(object):
+    """
+    What changed on a shelf since its last sync: reviews added and updated,
+    and the ids of reviews removed (only known after a full sync).
+    """
+    __slots__ = ('user_id', 'shelf', 'added', 'updated', 'removed', 'full')
+
+    def __init__(self, user_id, shelf, full):
+        self.user_id = user_id
+        self.shelf = shelf
+        self.added = []
+        self.updated = []
+        self.removed = []
+        self.full = full
+
+    def __len__(self):
+        return len(self.added) + len(self.updated) + len(self.removed)
+
+    def __repr__(self):
+        return '<Changeset:%s/%s +%d ~%d -%d%s>' % (
+            self.user_id, self.shelf or 'all', len(self.added),
+            len(self.updated), len(self.removed), ' full' if self.full else '')
+
+
+class ShelfState(object):
+    """
+    A shelf as of its last sync: the newest update seen, the update time of
+    every review on it, and when it was last read in full.
+    """
+
+    def __init__(self, watermark=None, reviews=None, reconciled=None):
+        self.watermark = watermark
+        self.reviews = reviews if reviews is not None else {}
+        self.reconciled = reconciled
+
+
+class ShelfSync(object):
+    """
+    Syncs shelves through a Goodreads client's reviews_list().
+
+    State is kept per member and shelf in `catalog` (a catalog.Catalog)
+    when given, so syncs pick up where the last process left off, and in
+    memory otherwise.  Run one sync per shelf at a time.
+    """
+
+    def __init__(self, client, catalog=None, reconcile_every=7 * 24 * 3600,
+                 per_page=200, clock=time.time):
+        self.client = client
+        self.catalog = catalog
+        self.reconcile_every = reconcile_every
+        self.per_page = per_page
+        self.clock = clock
+        self._states = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(user_id, shelf):
+        return '%s/%s' % (user_id, shelf or '')
+
+    def state(self, user_id, shelf=None):
+        """
+        The stored ShelfState of a shelf, or None if it was never synced.
+        """
+        key = self.key(user_id, shelf)
+        if self.catalog is not None:
+            state = self.catalog.get_state('shelf', key)
+            return ShelfState(**state) if state is not None else None
+        with self._lock:
+            return self._states.get(key)
+
+    def _save(self, user_id, shelf, state):
+        key = self.key(user_id, shelf)
+        if self.catalog is not None:
+            self.catalog.set_state('shelf', key, vars(state))
+        else:
+            with self._lock:
+                self._states[key] = state
+
+    def sync(self, user_id, shelf=None, full=None):
+        """
+        Changeset of a member's shelf (all their books by default) since
+        its last sync.  full=True reads the whole shelf and reports
+        removals, full=False never does; by default a full sync happens on
+        the first sync and every `reconcile_every` seconds.
+        """
+        state = self.state(user_id, shelf)
+        now = self.clock()
+        if full is None:
+            full = (state is None or state.reconciled is None or
+                    now - state.reconciled >= self.reconcile_every)
+        if state is None:
+            state = ShelfState()
+        changes = Changeset(user_id, shelf, full)
+        if full:
+            self._full(user_id, shelf, state, changes)
+            state.reconciled = now
+        else:
+            self._incremental(user_id, shelf, state, changes)
+        self._save(user_id, shelf, state)
+        return changes
+
+    def sync_many(self, user_ids, shelf=None, full=None, workers=None):
+        """
+        Sync the shelf of many members concurrently: a bulk.Result per
+        member, holding its Changeset, in input order (see fetch_many).
+        """
+        return fetch_many(lambda id: self.sync(id, shelf, full), user_ids,
+                          workers or self.client.bulk_workers, memo=0)
+
+    def _list(self, user_id, shelf, **kwargs):
+        return self.client.reviews_list(
+            user_id, shelf=shelf, sort='date_updated', order='d',
+            per_page=self.per_page, **kwargs)
+
+    def _pages(self, user_id, shelf):
+        """
+        Reviews newest first, requesting one page at a time; the limit
+        keeps the paginator from prefetching pages that may not be needed.
+        """
+        page = 1
+        while True:
+            reviews = list(self._list(user_id, shelf, page=page,
+                                      limit=self.per_page))
+            for review in reviews:
+                yield review
+            if len(reviews) < self.per_page:
+                return
+            page += 1
+
+    def _see(self, review, state, changes):
+        known = state.reviews.get(review.id, False)
+        if known is False:
+            changes.added.append(review)
+        elif known != review.date_updated:
+            changes.updated.append(review)
+        updated = review.date_updated
+        state.reviews[review.id] = updated
+        if updated is not None and (state.watermark is None or
+                                    updated > state.watermark):
+            state.watermark = updated
+
+    def _incremental(self, user_id, shelf, state, changes):
+        watermark = state.watermark
+        pages = self._pages(user_id, shelf)
+        try:
+            for review in pages:
+                if watermark is not None and (
+                        review.date_updated is None or
+                        review.date_updated < watermark):
+                    break
+                # reviews updated at the watermark itself may be new
+                self._see(review, state, changes)
+        finally:
+            pages.close()
+
+    def _full(self, user_id, shelf, state, changes):
+        previous = state.reviews
+        state.reviews = {}
+        for review in self._list(user_id, shelf):
+            if review.id in state.reviews:
+                # moved down a page while the shelf was being read
+                continue
+            # so _see() compares it with the last sync
+            state.reviews[review.id] = previous.get(review.id, False)
+            self._see(review, state, changes)
+        changes.removed = sorted(set(previous) - set(state.reviews))
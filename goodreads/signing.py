@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+OAuth 1.0a HMAC-SHA1 signing (RFC 5849 section 3), so OAuth requests can go
+through the pooled Transport like the developer-key ones.
+"""
+from binascii import b2a_base64
+import hashlib
+import hmac
+import random
+import time
+import urllib
+import urlparse
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+
+def escape(value):
+    """
+    Percent-encode a parameter as OAuth requires: everything but unreserved
+    characters, after encoding unicode as UTF-8.
+    """
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    elif not isinstance(value, str):
+        value = str(value)
+    return urllib.quote(value, safe='~')
+
+
+def normalize_url(url):
+    """
+    (base string URI, query) of a request url: scheme and host lower-cased,
+    default port dropped.
+    """
+    scheme, netloc, path, query, _ = urlparse.urlsplit(url)
+    scheme, netloc = scheme.lower(), netloc.lower()
+    host, _, port = netloc.partition(':')
+    if port == DEFAULT_PORTS.get(scheme):
+        netloc = host
+    return '%s://%s%s' % (scheme, netloc, path or '/'), query
+
+
+class Signer(object):
+    """
+    Signs requests for one consumer and, optionally, one token (anything
+    with `key` and `secret`, such as oauth2.Consumer and oauth2.Token).
+
+    What does not change between requests -- the HMAC key and the escaped
+    oauth_* parameters -- is prepared here once; make a new Signer when the
+    credentials change.  A Signer is safe to share between threads.
+    """
+
+    def __init__(self, consumer, token=None):
+        self.consumer = consumer
+        self.token = token
+        key = '%s&%s' % (escape(consumer.secret),
+                         escape(token.secret) if token is not None else '')
+        self._hmac = hmac.new(key, digestmod=hashlib.sha1)
+        static = [('oauth_consumer_key', consumer.key),
+                  ('oauth_signature_method', 'HMAC-SHA1'),
+                  ('oauth_version', '1.0')]
+        if token is not None:
+            static.append(('oauth_token', token.key))
+        self._static = [(escape(k), escape(v)) for k, v in static]
+        self._header = ', '.join('%s="%s"' % p for p in self._static)
+
+    def signature(self, method, url, params=None, nonce=None, timestamp=None):
+        """
+        (signature, nonce, timestamp) for a request; `params` are the
+        parameters sent in the query or a form-encoded body, besides any
+        already in the url's query.
+        """
+        nonce = nonce or '%016x' % random.getrandbits(64)
+        timestamp = timestamp or str(int(time.time()))
+        url, query = normalize_url(url)
+        pairs = self._static + [('oauth_nonce', escape(nonce)),
+                                ('oauth_timestamp', escape(timestamp))]
+        if query:
+            pairs.extend((escape(k), escape(v)) for k, v in
+                         urlparse.parse_qsl(query, keep_blank_values=True))
+        if params:
+            pairs.extend((escape(k), escape(v)) for k, v in params.items()
+                         if v is not None)
+        pairs.sort()
+        digest = self._hmac.copy()
+        digest.update('%s&%s&%s' % (
+            method.upper(), escape(url),
+            escape('&'.join('%s=%s' % p for p in pairs))))
+        return b2a_base64(digest.digest())[:-1], nonce, timestamp
+
+    def sign(self, method, url, params=None, nonce=None, timestamp=None):
+        """
+        Value of the Authorization header for a request.
+        """
+        signature, nonce, timestamp = self.signature(
+            method, url, params, nonce, timestamp)
+        return 'OAuth %s, oauth_nonce="%s", oauth_timestamp="%s", ' \
+               'oauth_signature="%s"' % (self._header, escape(nonce),
+                                         timestamp, escape(signature))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+
+from concurrent.futures import Future
+
+
+def request_key(method, url, params=None):
+    """
+    Canonical identity of a request: parameter order, unset values and the
+    developer key do not matter.
+    """
+    # strings are kept as given: unicode() fails on non-ASCII byte strings
+    params = tuple(sorted((k, v if isinstance(v, basestring) else str(v))
+                          for k, v in (params or {}).items()
+                          if v is not None and k != 'key'))
+    return method.upper(), url.lstrip('/'), params
+
+
+class SingleFlight(object):
+    """
+    Lets concurrent identical calls share one execution: the first caller
+    for a key runs it, callers arriving while it runs wait for its result
+    (or exception) instead of running it again.  Nothing is kept once the
+    call returns.
+
+    `calls` counts calls made through it and `coalesced` those that were
+    answered by another caller's execution.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key):
+        with self._lock:
+            del self._inflight[key]
+
+    def stats(self):
+        return {'calls': self.calls, 'coalesced': self.coalesced,
+                'inflight': len(self._inflight)}
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from lxml import etree
+
+CHUNK_SIZE = 16 * 1024
+
+
+class StreamParser(object):
+    """
+    Incrementally parse a list response, yielding each `tag` element directly
+    under `container` as soon as it is complete.
+
+    Yielded elements are cleared and unlinked once the consumer moves on, so
+    only one item is held in the tree at a time whatever the page size.  The
+    container's attributes (start, end, total) are available in `attrib` from
+    the first item on.
+    """
+
+    def __init__(self, container, tag):
+        self.container = container
+        self.tag = tag
+        self.attrib = {}
+
+    def parse(self, chunks):
+        parser = etree.XMLPullParser(
+            events=('end',), tag=(self.container, self.tag),
+            remove_blank_text=True, collect_ids=False)
+        for chunk in chunks:
+            parser.feed(chunk)
+            for item in self._items(parser):
+                yield item
+        parser.close()
+        for item in self._items(parser):
+            yield item
+
+    def _items(self, parser):
+        for _, element in parser.read_events():
+            if element.tag == self.container:
+                if not self.attrib:
+                    self.attrib = dict(element.attrib)
+                continue
+            parent = element.getparent()
+            if parent is None or parent.tag != self.container:
+                continue
+            if not self.attrib:
+                self.attrib = dict(parent.attrib)
+            yield element
+            element.clear()
+            while element.getprevious() is not None:
+                parent.remove(element.getprevious())
+            parent.remove(element)
+
+    def parse_response(self, response, chunk_size=CHUNK_SIZE):
+        try:
+            for item in self.parse(response.iter_content(chunk_size)):
+                yield item
+        finally:
+            response.close()
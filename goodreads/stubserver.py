@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the Goodreads API, for offline and load testing.
+
+Responses come from a directory written by Recorder (point a client's
+`recorder` at one while it talks to the real site) and/or from a route
+table of path -> file name patterns.  The server can add latency and
+jitter, inject error statuses and enforce a request rate; all randomness
+comes from one seeded generator so a run can be reproduced.
+
+    $ python -m goodreads.stubserver recordings/ --port 8000 --latency 0.05 \\
+          --error 429=0.01 --error 503=0.005 --rate 50
+
+    >>> g = Goodreads(key, secret, base_url='http://127.0.0.1:8000')
+"""
+import argparse
+import BaseHTTPServer
+import hashlib
+import json
+import os
+import random
+import socket
+import SocketServer
+import threading
+import time
+import urlparse
+
+from cache import IGNORED_PARAMS
+from ratelimit import RateLimiter
+
+REASONS = BaseHTTPServer.BaseHTTPRequestHandler.responses
+
+
+def request_key(method, path, params):
+    """
+    Identity of a request for recording and replay: credentials, OAuth
+    signing parameters and unset values are left out.
+    """
+    params = sorted((k, v) for k, v in params.items()
+                    if v is not None and k not in IGNORED_PARAMS and
+                    not k.startswith('oauth_'))
+    return hashlib.sha1(json.dumps(
+        [method.upper(), '/' + path.lstrip('/'), params])).hexdigest()
+
+
+def split_url(url, params=None):
+    """
+    (path, params) of a url relative to the API root, merging its query.
+    """
+    url = urlparse.urlparse(url)
+    merged = dict(urlparse.parse_qsl(url.query))
+    merged.update((k, v.encode('utf-8') if isinstance(v, unicode) else str(v))
+                  for k, v in (params or {}).items() if v is not None)
+    return url.path, merged
+
+
+class Recorder(object):
+    """
+    Writes each response a client receives to `path`, one JSON file per
+    distinct request; StubServer replays the directory.
+    """
+    kept_headers = ('content-type', 'retry-after')
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def record(self, method, url, params, status, headers, body):
+        path, params = split_url(url, params)
+        key = request_key(method, path, params)
+        entry = {
+            'method': method.upper(),
+            'path': '/' + path.lstrip('/'),
+            'params': dict((k, v) for k, v in params.items()
+                           if k not in IGNORED_PARAMS and
+                           not k.startswith('oauth_')),
+            'status': int(status),
+            'headers': dict((h, headers[h]) for h in self.kept_headers
+                            if h in headers),
+            'body': body.decode('utf-8'),
+        }
+        tmp = os.path.join(self.path, '%s.tmp' % key)
+        with open(tmp, 'wb') as f:
+            json.dump(entry, f, indent=1, sort_keys=True)
+        os.rename(tmp, os.path.join(self.path, '%s.json' % key))
+
+    def __len__(self):
+        return len([n for n in os.listdir(self.path) if n.endswith('.json')])
+
+
+def load_recordings(path):
+    recordings = {}
+    for name in os.listdir(path):
+        if name.endswith('.json'):
+            with open(os.path.join(path, name), 'rb') as f:
+                entry = json.load(f)
+            recordings[name[:-5]] = (entry['status'], entry['headers'],
+                                     entry['body'].encode('utf-8'))
+    return recordings
+
+
+class StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # send each response in one write, flushed after the handler returns
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        path, params = split_url(self.path)
+        if self.command == 'POST':
+            length = int(self.headers.get('Content-Length') or 0)
+            params.update(urlparse.parse_qsl(self.rfile.read(length)))
+        self.server.log(self.command, path, params)
+
+        delay = self.server.next_delay()
+        if delay > 0:
+            time.sleep(delay)
+
+        throttled = self.server.throttle()
+        if throttled is not None:
+            return self.respond(429, {'Retry-After': throttled})
+        status = self.server.inject_error()
+        if status is not None:
+            headers = {'Retry-After': '1'} if status in (429, 503) else {}
+            return self.respond(status, headers)
+
+        response = self.server.lookup(self.command, path, params)
+        if response is None:
+            return self.respond(404)
+        status, headers, body = response
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        headers = dict(headers, ETag=etag)
+        if self.headers.get('If-None-Match') == etag:
+            self.server.count('not_modified')
+            return self.respond(304, {'ETag': etag})
+        self.respond(status, headers, body)
+
+    do_POST = do_GET
+    do_PUT = do_GET
+    do_DELETE = do_GET
+
+    def respond(self, status, headers=None, body=''):
+        self.send_response(status, REASONS.get(status, ('',))[0])
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Threaded replay server; use as a context manager to run it in the
+    background, and point a client's base_url at `url`.
+
+    `errors` maps a status code to the fraction of requests that get it;
+    `rate`/`burst` enforce a token bucket per server and answer 429 with
+    Retry-After when it is exceeded.  `requests` logs (method, path,
+    params) and `counts` what was served.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, recordings=None, routes=None, fixtures=None,
+                 latency=0, jitter=0, errors=None, rate=None, burst=1,
+                 seed=None, host='127.0.0.1', port=0):
+        BaseHTTPServer.HTTPServer.__init__(self, (host, port), StubHandler)
+        self.recordings = load_recordings(recordings) if recordings else {}
+        self.routes = routes or {}
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.errors = sorted((errors or {}).items())
+        self.limiter = RateLimiter(rate, burst) if rate else None
+        self.random = random.Random(seed)
+        self.requests = []
+        self.counts = dict.fromkeys(
+            ('served', 'not_modified', 'throttled', 'injected'), 0)
+        self._lock = threading.Lock()
+        self._connections = set()
+        self.thread = threading.Thread(target=self.serve_forever,
+                                       kwargs={'poll_interval': 0.05})
+        self.thread.daemon = True
+
+    def get_request(self):
+        request, address = BaseHTTPServer.HTTPServer.get_request(self)
+        with self._lock:
+            self._connections.add(request)
+        return request, address
+
+    def shutdown_request(self, request):
+        with self._lock:
+            self._connections.discard(request)
+        BaseHTTPServer.HTTPServer.shutdown_request(self, request)
+
+    @property
+    def url(self):
+        return 'http://%s:%s' % self.server_address
+
+    def log(self, method, path, params):
+        self.requests.append((method, path, params))
+        self.count('served')
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def next_delay(self):
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self.random.uniform(-self.jitter,
+                                                      self.jitter)
+
+    def throttle(self):
+        """
+        Seconds the client should wait, if it is over the rate limit.
+        """
+        if self.limiter is None or self.limiter.try_acquire():
+            return None
+        self.count('throttled')
+        return '%d' % max(1, round(1 / self.limiter.rate))
+
+    def inject_error(self):
+        if not self.errors:
+            return None
+        with self._lock:
+            roll = self.random.random()
+        for status, fraction in self.errors:
+            if roll < fraction:
+                self.count('injected')
+                return status
+            roll -= fraction
+        return None
+
+    def lookup(self, method, path, params):
+        """
+        (status, headers, body) for a request, or None.
+        """
+        recorded = self.recordings.get(request_key(method, path, params))
+        if recorded is not None:
+            return recorded
+        pattern = self.routes.get(path)
+        if pattern is None or self.fixtures is None:
+            return None
+        name = pattern % dict({'page': 1, 'format': 'xml'}, **params)
+        try:
+            with open(os.path.join(self.fixtures, name), 'rb') as f:
+                body = f.read()
+        except IOError:
+            return None
+        kind = {'.json': 'application/json', '.txt': 'text/plain'}.get(
+            os.path.splitext(name)[1], 'application/xml')
+        headers = {'Content-Type': '%s; charset=utf-8' % kind}
+        return 200, headers, body
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+        # end kept-alive connections so their handler threads exit too
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Replay recorded Goodreads responses.')
+    parser.add_argument('recordings', help='directory written by Recorder')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0,
+                        help='latency varies uniformly by +/- this')
+    parser.add_argument('--error', action='append', default=[],
+                        metavar='STATUS=FRACTION',
+                        help='answer this fraction of requests with STATUS')
+    parser.add_argument('--rate', type=float,
+                        help='requests per second before answering 429')
+    parser.add_argument('--burst', type=int, default=1)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    errors = dict((int(s), float(f)) for s, f in
+                  (e.split('=', 1) for e in args.error))
+    server = StubServer(args.recordings, latency=args.latency,
+                        jitter=args.jitter, errors=errors, rate=args.rate,
+                        burst=args.burst, seed=args.seed, host=args.host,
+                        port=args.port)
+    print 'Serving %d recordings on %s' % (len(server.recordings), server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
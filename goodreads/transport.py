@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class Transport(object):
+    """
+    Pooled, keep-alive HTTP transport owned by a Goodreads client.
+
+    pool_connections is the number of per-host pools to keep, pool_maxsize the
+    number of connections kept alive for each host.  timeout is passed to
+    requests as-is, so either a number or a (connect, read) tuple.
+    """
+
+    def __init__(self, pool_connections=4, pool_maxsize=10, pool_block=False,
+                 max_retries=0, timeout=(5, 30), keep_alive=True,
+                 headers=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.headers = headers or {}
+        self.session = None
+        self.open()
+
+    def open(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=self.max_retries)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['Connection'] = (
+            'keep-alive' if self.keep_alive else 'close')
+        session.headers.update(self.headers)
+        self.session = session
+
+    @property
+    def closed(self):
+        return self.session is None
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                timeout=None, stream=False):
+        if self.closed:
+            self.open()
+        return self.session.request(
+            method, url,
+            params=params,
+            data=data,
+            headers=headers,
+            timeout=timeout if timeout is not None else self.timeout,
+            stream=stream)
+
+    def get(self, url, params=None, **kwargs):
+        return self.request('GET', url, params=params, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        return self.request('POST', url, data=data, **kwargs)
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -30,7 +30,8 @@ setup(
     ],
     package_dir={'Goodreads': 'goodreads'},
     include_package_data=True,
-    install_requires=['oauth2', 'requests', 'lxml'],
+    install_requires=['futures', 'oauth2', 'requests', 'lxml'],
+    extras_require={'parquet': ['pyarrow']},
     license="BSD",
     zip_safe=False,
     keywords='goodreads',
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+The bundled stub server, replaying the recorded fixtures.
+"""
+import os
+
+from goodreads import stubserver
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+ROUTES = {
+    '/user/show/': 'user_show.xml',
+    '/api/auth_user': 'auth_user.xml',
+    '/notifications': 'notifications_%(page)s.xml',
+    '/user/compare/1.xml': 'user_compare.xml',
+    '/author/show.xml': 'author_show.xml',
+    '/author/list.xml': 'author_list_%(page)s.xml',
+    '/review/list': 'review_list_%(page)s.xml',
+    '/book/show': 'book_show.%(format)s',
+    '/book/isbn': 'book_show.%(format)s',
+    '/book/review_counts.json': 'review_counts.json',
+    '/book/isbn_to_id': 'isbn_to_id.txt',
+}
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+class StubServer(stubserver.StubServer):
+
+    def __init__(self, delay=0, **kwargs):
+        stubserver.StubServer.__init__(self, routes=ROUTES, fixtures=FIXTURES,
+                                       latency=delay, **kwargs)
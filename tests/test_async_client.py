@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_async_client
+----------------------------------
+
+Tests for `async_client` module.
+"""
+
+import time
+import unittest
+
+from goodreads.async_client import AsyncGoodreads
+from goodreads.ratelimit import RateLimiter
+
+from tests.stub import StubServer
+
+
+class TestAsyncGoodreads(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(delay=0.2).__enter__()
+        self.g = AsyncGoodreads('key', 'secret', 'token', 'token_secret',
+                                concurrency=10,
+                                rate_limiter=RateLimiter(1000, 10))
+        self.g.client.base_url = self.server.url
+
+    def tearDown(self):
+        self.g.close()
+        self.server.__exit__()
+
+    def test_user(self):
+        user = self.g.user(user_id=1000001).result()
+        self.assertEqual(user.id, '1000001')
+        self.assertEqual(user.name, 'Jane Reader')
+        self.assertEqual(self.server.requests[0][2]['key'], 'key')
+
+    def test_requests_overlap(self):
+        started = time.time()
+        futures = [self.g.user(user_id=i) for i in range(1, 11)]
+        users = [f.result() for f in futures]
+        self.assertEqual(len(users), 10)
+        self.assertTrue(time.time() - started < 1.0)
+
+    def test_oauth_endpoints(self):
+        auth_user = self.g.auth_user()
+        notifications = self.g.user_notifications()
+        compare = self.g.user_compare(1000002)
+        self.assertEqual(auth_user.result().id, '1000001')
+        self.assertEqual(len(notifications.result()), 2)
+        self.assertEqual(len(compare.result().books), 2)
+
+    def test_author(self):
+        author = self.g.author(2001).result()
+        self.assertEqual(author.name, 'Ursula K. Le Guin')
+        self.assertEqual(len(author.books), 10)
+
+    def test_identical_lookups_coalesce(self):
+        futures = [self.g.author(2001) for _ in range(5)]
+        self.assertTrue(all(f is futures[0] for f in futures))
+        self.assertEqual(futures[0].result().name, 'Ursula K. Le Guin')
+        self.assertEqual(self.g.coalesced, 4)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_author_books(self):
+        titles = [b.title for b in self.g.author_books(2001, limit=12)]
+        self.assertEqual(len(titles), 12)
+        self.assertEqual(titles[0], 'The Left Hand of Darkness')
+
+    def test_error_propagates(self):
+        future = self.g.user()
+        self.assertRaises(Exception, future.result)
+
+if __name__ == '__main__':
+    unittest.main()
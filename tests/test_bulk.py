@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_bulk
+----------------------------------
+
+Tests for `bulk` module and the bulk lookups.
+"""
+
+import itertools
+import threading
+import time
+import unittest
+
+from goodreads import goodreads
+from goodreads.bulk import chunks, fetch_many
+from goodreads.cache import EntityCache
+from goodreads.ratelimit import RateLimiter
+
+from tests.stub import StubServer
+
+
+class TestFetchMany(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def fetch(self, id):
+        with self.lock:
+            self.calls.append(id)
+        time.sleep(0.01 * (id % 3))
+        if id < 0:
+            raise ValueError(id)
+        return id * 10
+
+    def test_input_order(self):
+        results = list(fetch_many(self.fetch, range(12), workers=4))
+        self.assertEqual([r.id for r in results], range(12))
+        self.assertEqual([r.value for r in results], range(0, 120, 10))
+
+    def test_failures_are_per_id(self):
+        results = list(fetch_many(self.fetch, [1, -2, 3]))
+        self.assertEqual([r.ok for r in results], [True, False, True])
+        self.assertTrue(isinstance(results[1].error, ValueError))
+        self.assertEqual(results[2].value, 30)
+
+    def test_repeated_ids_fetched_once(self):
+        results = list(fetch_many(self.fetch, [1, 2, 1, 2, 1]))
+        self.assertEqual([r.value for r in results], [10, 20, 10, 20, 10])
+        self.assertEqual(sorted(self.calls), [1, 2])
+
+    def test_cached(self):
+        results = list(fetch_many(
+            self.fetch, [1, 2, 3],
+            cached=lambda id: 'hit' if id == 2 else None))
+        self.assertEqual([r.value for r in results], [10, 'hit', 30])
+        self.assertEqual(sorted(self.calls), [1, 3])
+
+    def test_streams_lazily(self):
+        results = fetch_many(self.fetch, itertools.count(1), workers=2,
+                             window=4)
+        self.assertEqual([next(results).value for _ in range(3)],
+                         [10, 20, 30])
+        results.close()
+        self.assertTrue(len(self.calls) <= 3 + 4)
+
+    def test_chunks(self):
+        self.assertEqual(list(chunks(xrange(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(chunks([], 2)), [])
+
+
+class TestBulkLookups(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer().__enter__()
+        self.g = goodreads.Goodreads('key', 'secret', base_url=self.server.url,
+                                     rate_limiter=RateLimiter(1000, 10),
+                                     entity_cache=EntityCache())
+
+    def tearDown(self):
+        self.g.close()
+        self.server.__exit__()
+
+    def test_users(self):
+        results = self.g.users([1000001, 1000001, None])
+        self.assertEqual([r.ok for r in results], [True, True, False])
+        self.assertTrue(results[0].value is results[1].value)
+        self.assertTrue(isinstance(results[2].error,
+                                   goodreads.GoodreadsException))
+        self.assertEqual(self.server.counts['served'], 1)
+
+    def test_served_from_cache(self):
+        author = self.g.author(2001)
+        results = self.g.authors([2001], stream=True)
+        self.assertTrue(next(results).value is author)
+        self.assertEqual(self.server.counts['served'], 1)
+
+    def test_books(self):
+        results = self.g.books([3001, 3002], format='json')
+        self.assertEqual([r.value.id for r in results], [3001, 3002])
+        self.assertEqual(self.server.counts['served'], 2)
+
+    def test_review_counts_in_chunks(self):
+        isbns = ('%010d' % i for i in xrange(2500))
+        counts = self.g.book_review_counts(isbns, stream=True)
+        self.assertEqual(next(counts).id, 3001)
+        self.assertEqual(len(list(counts)), 5)
+        sent = [r[2]['isbns'].split(',') for r in self.server.requests]
+        self.assertEqual(sorted(len(chunk) for chunk in sent),
+                         [500, 1000, 1000])
+        self.assertEqual(sorted(sum(sent, [])),
+                         ['%010d' % i for i in xrange(2500)])
+
+
+class TestReviewCountMisses(unittest.TestCase):
+
+    def test_404_and_422_are_misses(self):
+        for status in (404, 422):
+            with StubServer(errors={status: 1.0}) as server:
+                g = goodreads.Goodreads('key', 'secret', base_url=server.url,
+                                        rate_limiter=RateLimiter(1000, 10))
+                self.assertEqual(
+                    g.book_review_counts(['0061054887', '0553575376'],
+                                         chunk_size=1), [])
+                self.assertEqual(server.counts['injected'], 2)
+                g.close()
+
+if __name__ == '__main__':
+    unittest.main()
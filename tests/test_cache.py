@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_cache
+----------------------------------
+
+Tests for `cache` module.
+"""
+
+import shutil
+import tempfile
+import unittest
+
+from goodreads import goodreads
+from goodreads.cache import ResponseCache
+from goodreads.ratelimit import RateLimiter
+
+from tests.stub import StubServer
+
+
+class FakeResponse(object):
+
+    def __init__(self, content, headers=None):
+        self.status_code = 200
+        self.content = content
+        self.headers = headers or {}
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.now = 1000.0
+        self.cache = ResponseCache(self.path, max_size=600, ttl=10,
+                                   ttls={'author/': 100},
+                                   clock=lambda: self.now)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_key_ignores_developer_key_and_order(self):
+        self.assertEqual(
+            ResponseCache.key('user/show/', {'id': 1, 'username': None}),
+            ResponseCache.key('user/show/', {'key': 'abc', 'id': 1}))
+        self.assertNotEqual(ResponseCache.key('user/show/', {'id': 1}),
+                            ResponseCache.key('user/show/', {'id': 2}))
+
+    def test_ttls(self):
+        self.cache.set('user/show/', {'id': 1}, FakeResponse('u'))
+        self.cache.set('author/list.xml', {'id': 1}, FakeResponse('a'))
+        self.now += 50
+        user = self.cache.get('user/show/', {'id': 1})
+        author = self.cache.get('author/list.xml', {'id': 1})
+        self.assertFalse(self.cache.fresh('user/show/', user))
+        self.assertTrue(self.cache.fresh('author/list.xml', author))
+
+    def test_validators(self):
+        modified = 'Tue, 18 Feb 2014 10:00:00 GMT'
+        self.cache.set('user/show/', {'id': 1}, FakeResponse('u', {
+            'etag': '"abc"', 'last-modified': modified}))
+        cached = self.cache.get('user/show/', {'id': 1})
+        self.assertEqual(cached.validators(), {
+            'If-None-Match': '"abc"', 'If-Modified-Since': modified})
+
+    def test_lru_eviction(self):
+        for i in range(3):
+            self.cache.set('user/show/', {'id': i}, FakeResponse('x' * 100))
+        self.cache.get('user/show/', {'id': 0})
+        self.cache.set('user/show/', {'id': 3}, FakeResponse('x' * 100))
+        self.assertTrue(self.cache.size <= 600)
+        self.assertEqual(self.cache.get('user/show/', {'id': 1}), None)
+        self.assertNotEqual(self.cache.get('user/show/', {'id': 0}), None)
+
+    def test_persistent(self):
+        self.cache.set('user/show/', {'id': 1}, FakeResponse('u'))
+        reopened = ResponseCache(self.path)
+        self.assertEqual(reopened.get('user/show/', {'id': 1}).content, 'u')
+        self.assertEqual(reopened.size, self.cache.size)
+
+
+class TestCachedClient(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.now = 1000.0
+        self.server = StubServer().__enter__()
+        self.limiter = RateLimiter(1, 1, clock=lambda: self.now)
+        self.g = goodreads.Goodreads(
+            'key', 'secret', rate_limiter=self.limiter,
+            cache=ResponseCache(self.path, ttl=60, clock=lambda: self.now))
+        self.g.base_url = self.server.url
+
+    def tearDown(self):
+        self.g.close()
+        self.server.__exit__()
+        shutil.rmtree(self.path)
+
+    def test_hit_skips_network_and_limiter(self):
+        self.g.user(user_id=1000001)
+        user = self.g.user(user_id=1000001)
+        self.assertEqual(user.name, 'Jane Reader')
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.limiter.available, 0)
+
+    def test_revalidates_stale_entry(self):
+        self.g.user(user_id=1000001)
+        self.now += 120
+        user = self.g.user(user_id=1000001)
+        self.assertEqual(user.name, 'Jane Reader')
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.server.counts['not_modified'], 1)
+        cached = self.g.cache.get('user/show/', {'id': 1000001})
+        self.assertEqual(cached.stored, self.now)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_catalog
+----------------------------------
+
+Tests for `catalog` module.
+"""
+
+from datetime import datetime
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from lxml import etree
+
+from goodreads import goodreads
+from goodreads.cache import EntityCache
+from goodreads.catalog import Catalog, dumps, loads
+from goodreads.goodreads import (Deferred, GoodreadsAuthor, GoodreadsBook,
+                                 GoodreadsReview, GoodreadsUser)
+from goodreads.ratelimit import RateLimiter
+
+from tests.stub import StubServer, fixture
+
+
+def book(id, **kwargs):
+    return GoodreadsBook(id=id, title='Book %d' % id, **kwargs)
+
+
+def read_title(path, queue):
+    with Catalog(path) as catalog:
+        # stored at the test's clock time, so ignore its age
+        queue.put(catalog.get(GoodreadsBook, 1, max_age=float('inf')).title)
+
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'catalog.db')
+        self.now = 1000.0
+        self.catalog = Catalog(self.path, ttl=60,
+                               ttls={'GoodreadsUser': 10},
+                               clock=lambda: self.now)
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.dir)
+
+    def reopen(self):
+        self.catalog.close()
+        self.catalog = Catalog(self.path, ttl=60, clock=lambda: self.now)
+
+    def test_round_trip(self):
+        self.catalog.add(book(1, authors=[GoodreadsAuthor(id='7', name='A')]))
+        self.assertEqual(self.catalog.get(GoodreadsBook, 1).title, 'Book 1')
+        self.reopen()
+        stored = self.catalog.get(GoodreadsBook, '1')
+        self.assertEqual((stored.title, stored.authors[0].name),
+                         ('Book 1', 'A'))
+        # the author came along as a partial record
+        self.assertEqual(self.catalog.get(GoodreadsAuthor, 7), None)
+        self.assertEqual(
+            self.catalog.get(GoodreadsAuthor, 7, complete=False).name, 'A')
+
+    def test_stored_as_json(self):
+        xml = etree.fromstring(fixture('book_show.xml')).find('book')
+        self.catalog.add(GoodreadsBook.from_element(xml, lazy=True))
+        self.reopen()
+        stored = self.catalog.get(GoodreadsBook, 3001)
+        self.assertTrue(isinstance(stored._popular_shelves, Deferred))
+        self.assertEqual(stored.popular_shelves[0], ('to-read', 51234))
+        self.assertEqual(stored.authors[0].name, 'Ursula K. Le Guin')
+        connection = sqlite3.connect(self.path)
+        data, = connection.execute(
+            "SELECT data FROM books WHERE id = '3001'").fetchone()
+        self.assertEqual(json.loads(data)['fields']['title'],
+                         'The Dispossessed')
+        connection.close()
+        review = loads(dumps(GoodreadsReview(
+            id=4001, book=book(2), shelves=['read'],
+            date_updated=datetime(2014, 2, 18, 18, 21, 3))))
+        self.assertEqual((review.book.title, review.date_updated),
+                         ('Book 2', datetime(2014, 2, 18, 18, 21, 3)))
+        self.assertRaises(TypeError, self.catalog.add, review)
+
+    def test_unknown_fields_are_misses(self):
+        self.catalog.add(book(1))
+        self.catalog.flush()
+        connection = sqlite3.connect(self.path)
+        with connection:
+            connection.execute(
+                "UPDATE books SET data = ? WHERE id = '1'",
+                ('{"$model": "GoodreadsBook", "fields": {"gone": 1}}',))
+        connection.close()
+        self.assertEqual(self.catalog.get(GoodreadsBook, 1), None)
+
+    def test_failed_flush_keeps_the_batch(self):
+        self.catalog.add(book(1))
+        self.catalog.add(GoodreadsBook(id=2, title=object()))
+        self.assertRaises(TypeError, self.catalog.flush)
+        self.catalog.add(book(2))
+        self.catalog.flush()
+        self.reopen()
+        self.assertEqual([self.catalog.get(GoodreadsBook, id).title
+                          for id in (1, 2)], ['Book 1', 'Book 2'])
+
+    def test_other_layouts_are_refused(self):
+        path = os.path.join(self.dir, 'old.db')
+        connection = sqlite3.connect(path)
+        connection.execute('CREATE TABLE books (id TEXT, data BLOB)')
+        connection.close()
+        self.assertRaises(ValueError, Catalog, path)
+
+    def test_batched_writes(self):
+        catalog = Catalog(self.path, batch_size=3, flush_interval=60,
+                          clock=lambda: self.now)
+        catalog.add(book(1))
+        catalog.add(book(2))
+        self.assertEqual(catalog.stats()['books'], 0)
+        self.assertEqual(catalog.get(GoodreadsBook, 2).title, 'Book 2')
+        catalog.add(book(3))
+        self.assertEqual(catalog.stats()['books'], 3)
+        catalog.close()
+
+    def test_freshness(self):
+        self.catalog.add(book(1))
+        self.catalog.add(GoodreadsUser(id='5', name='U'))
+        self.catalog.flush()
+        self.now += 30
+        self.assertNotEqual(self.catalog.get(GoodreadsBook, 1), None)
+        self.assertEqual(self.catalog.get(GoodreadsUser, 5), None)
+        self.assertNotEqual(self.catalog.get(GoodreadsUser, 5, max_age=60),
+                            None)
+        self.now += 30
+        self.assertEqual(self.catalog.get(GoodreadsBook, 1), None)
+
+    def test_partial_never_replaces_complete(self):
+        self.catalog.add(GoodreadsAuthor(id='7', name='Full', books=[]))
+        self.catalog.flush()
+        self.catalog.add(GoodreadsAuthor(id='7', name='Partial'),
+                         complete=False)
+        self.catalog.flush()
+        self.assertEqual(self.catalog.get(GoodreadsAuthor, 7).name, 'Full')
+
+    def test_find_books(self):
+        self.catalog.add(book(1, isbn='0061054887', isbn13='9780061054884',
+                              asin='B000FC1KZK',
+                              authors=[GoodreadsAuthor(id='7')]))
+        self.catalog.add(book(2, authors=[GoodreadsAuthor(id='7')]))
+        self.assertEqual(self.catalog.book_by_isbn('0061054887').id, 1)
+        self.assertEqual(self.catalog.book_by_isbn('9780061054884').id, 1)
+        self.assertEqual(
+            [b.id for b in self.catalog.find_books(asin='B000FC1KZK')], [1])
+        self.assertEqual(
+            sorted(b.id for b in self.catalog.find_books(author_id=7)), [1, 2])
+        self.assertEqual(self.catalog.book_by_isbn('0000000000'), None)
+
+    def test_find_books_skips_partial_records(self):
+        self.catalog.add(GoodreadsAuthor(id='7', books=[
+            book(1, isbn='0061054887')]))
+        self.assertEqual(self.catalog.book_by_isbn('0061054887'), None)
+        self.assertEqual(self.catalog.find_books(author_id=7), [])
+        self.assertEqual(self.catalog.book_by_isbn(
+            '0061054887', complete=False).id, 1)
+
+    def test_concurrent_processes(self):
+        self.catalog.add(book(1))
+        self.catalog.flush()
+        queue = multiprocessing.Queue()
+        readers = [multiprocessing.Process(target=read_title,
+                                           args=(self.path, queue))
+                   for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        self.catalog.add(book(2))
+        self.catalog.flush()
+        for reader in readers:
+            reader.join()
+        self.assertEqual([queue.get(timeout=10) for _ in readers],
+                         ['Book 1'] * 3)
+        journal_mode = self.catalog._connection().execute(
+            'PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(journal_mode, 'wal')
+
+
+class TestReadThrough(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'catalog.db')
+        self.server = StubServer().__enter__()
+
+    def tearDown(self):
+        self.server.__exit__()
+        shutil.rmtree(self.dir)
+
+    def client(self, **kwargs):
+        return goodreads.Goodreads('key', 'secret', base_url=self.server.url,
+                                   rate_limiter=RateLimiter(1000, 10),
+                                   catalog=Catalog(self.path), **kwargs)
+
+    def test_served_from_the_catalog(self):
+        with self.client() as g:
+            g.book(3001)
+            g.author(2001)
+            g.catalog.close()
+        with self.client() as g:
+            self.assertEqual(g.book(3001).title, 'The Dispossessed')
+            self.assertEqual(g.book_by_isbn('9780061054884').id, 3001)
+            self.assertEqual(g.author(2001).name, 'Ursula K. Le Guin')
+            g.catalog.close()
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_with_entity_cache(self):
+        with self.client(entity_cache=EntityCache()) as g:
+            author = g.author(2001)
+            # the cache links the author's books back to the author
+            self.assertTrue(author.books[0].authors[0] is author)
+            g.catalog.close()
+        with self.client() as g:
+            author = g.author(2001)
+            self.assertEqual((author.name, len(author.books)),
+                             ('Ursula K. Le Guin', 10))
+            self.assertEqual(author.books[0].authors, None)
+            g.catalog.close()
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_listing_is_not_a_hit(self):
+        with self.client() as g:
+            author = g.author(2001)
+            isbn = author.books[0].isbn
+            self.assertEqual(g.catalog.book_by_isbn(isbn), None)
+            book = g.book_by_isbn(isbn)
+            self.assertNotEqual(book.description, None)
+            g.catalog.close()
+        self.assertEqual([r[1] for r in self.server.requests],
+                         ['/author/show.xml', '/book/isbn'])
+
+if __name__ == '__main__':
+    unittest.main()
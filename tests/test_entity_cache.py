@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_entity_cache
+----------------------------------
+
+Tests for `cache.EntityCache`.
+"""
+
+import unittest
+
+from goodreads import goodreads
+from goodreads.cache import EntityCache
+from goodreads.goodreads import GoodreadsAuthor, GoodreadsUser
+from goodreads.ratelimit import RateLimiter
+
+from tests.stub import StubServer
+
+
+class TestEntityCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.cache = EntityCache(max_entries=3, ttl=60,
+                                 clock=lambda: self.now)
+
+    def test_keyed_by_type_and_id(self):
+        author = self.cache.set(GoodreadsAuthor(id='1', name='A'))
+        self.assertTrue(self.cache.get(GoodreadsAuthor, 1) is author)
+        self.assertEqual(self.cache.get(GoodreadsUser, 1), None)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_incomplete_entities(self):
+        partial = self.cache.set(GoodreadsAuthor(id='1'), complete=False)
+        self.assertTrue(self.cache.get(GoodreadsAuthor, 1) is partial)
+        self.assertEqual(self.cache.get(GoodreadsAuthor, 1, complete=True),
+                         None)
+        full = self.cache.set(GoodreadsAuthor(id='1', books=[]))
+        self.assertTrue(self.cache.set(GoodreadsAuthor(id='1'),
+                                       complete=False) is full)
+
+    def test_ttl(self):
+        self.cache.set(GoodreadsAuthor(id='1'))
+        self.now += 60
+        self.assertEqual(self.cache.get(GoodreadsAuthor, 1), None)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_lru(self):
+        for i in range(3):
+            self.cache.set(GoodreadsAuthor(id=str(i)))
+        self.cache.get(GoodreadsAuthor, 0)
+        self.cache.set(GoodreadsAuthor(id='3'))
+        self.assertEqual(self.cache.get(GoodreadsAuthor, 1), None)
+        self.assertNotEqual(self.cache.get(GoodreadsAuthor, 0), None)
+        self.assertEqual(len(self.cache), 3)
+
+    def test_memory_ceiling(self):
+        author = GoodreadsAuthor(id='1', name='x' * 1000)
+        cache = EntityCache(max_bytes=EntityCache.sizeof(author) * 2)
+        for i in range(5):
+            cache.set(GoodreadsAuthor(id=str(i), name='x' * 1000))
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.bytes <= cache.max_bytes)
+
+
+class TestCachedEntities(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer().__enter__()
+        self.g = goodreads.Goodreads('key', 'secret',
+                                     rate_limiter=RateLimiter(1000, 10),
+                                     entity_cache=EntityCache())
+        self.g.base_url = self.server.url
+
+    def tearDown(self):
+        self.g.close()
+        self.server.__exit__()
+
+    def test_user_served_from_cache(self):
+        user = self.g.user(user_id=1000001)
+        self.assertTrue(self.g.user(user_id=1000001) is user)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_author_shared_with_books(self):
+        author = self.g.author(2001)
+        self.assertTrue(author.books[0].authors[0] is author)
+        self.assertTrue(author.books[1].authors[0] is author)
+        self.assertTrue(self.g.author(2001) is author)
+        self.assertEqual(len(self.server.requests), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_export
+----------------------------------
+
+Tests for `export` module.
+"""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from goodreads import goodreads
+from goodreads.export import columns, export, record
+from goodreads.goodreads import GoodreadsAuthor, GoodreadsBook, GoodreadsReview
+from goodreads.ratelimit import RateLimiter
+
+from tests.stub import StubServer
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class Interrupted(Exception):
+    pass
+
+
+class Crash(object):
+    """
+    A paginator that fails after `after` items.
+    """
+
+    def __init__(self, items, after):
+        self.items = items
+        self.after = after
+
+    @property
+    def cursor(self):
+        return self.items.cursor
+
+    def __iter__(self):
+        for count, item in enumerate(self.items):
+            if count == self.after:
+                raise Interrupted()
+            yield item
+
+
+class TestRecords(unittest.TestCase):
+
+    def test_record(self):
+        book = GoodreadsBook(id=1, title='T', authors=[
+            GoodreadsAuthor(id='7', name='A', books=[GoodreadsBook(id=2)])])
+        rec = record(GoodreadsReview(id=5, book=book, shelves=['read']))
+        self.assertEqual(rec['book']['authors'], [{'id': '7', 'name': 'A'}])
+        self.assertEqual((rec['id'], rec['shelves'], rec['rating']),
+                         (5, ['read'], None))
+        self.assertFalse('similar_books' in rec['book'])
+
+    def test_columns(self):
+        names = dict(columns(GoodreadsReview))
+        self.assertEqual((names['id'], names['book.title'],
+                          names['book.authors']), (int, str, str))
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.server = StubServer().__enter__()
+        self.g = goodreads.Goodreads('key', 'secret', base_url=self.server.url,
+                                     rate_limiter=RateLimiter(1000, 10))
+
+    def tearDown(self):
+        self.g.close()
+        self.server.__exit__()
+        shutil.rmtree(self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def lines(self, name):
+        with open(self.path(name), 'rb') as f:
+            return f.read().splitlines()
+
+    def test_jsonl(self):
+        counts = self.g.export_author_books(2001, self.path('books.jsonl'),
+                                            batch_size=4)
+        self.assertEqual((counts['records'], counts['batches']), (25, 7))
+        books = [json.loads(line) for line in self.lines('books.jsonl')]
+        self.assertEqual(books[24]['title'], 'Orsinian Tales')
+        self.assertEqual(books[0]['authors'][0]['name'], 'Ursula K. Le Guin')
+
+    def test_csv(self):
+        self.g.export_reviews(1000001, self.path('reviews.csv'), 'read',
+                              format='csv')
+        with open(self.path('reviews.csv'), 'rb') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([r['book.title'] for r in rows], [
+            'The Left Hand of Darkness', 'The Dispossessed',
+            'A Wizard of Earthsea'])
+        self.assertEqual((rows[0]['rating'], rows[0]['shelves'],
+                          rows[0]['started_at']), ('5', '["read"]', ''))
+
+    def test_resume(self):
+        self.g.export_author_books(2001, self.path('clean.jsonl'))
+        checkpoint = self.path('books.json')
+        self.assertRaises(
+            Interrupted, export,
+            lambda page: Crash(self.g.author_books(2001, page=page), 14),
+            self.path('books.jsonl'), GoodreadsBook, batch_size=4,
+            checkpoint=checkpoint)
+        with open(checkpoint) as f:
+            state = json.load(f)
+        self.assertEqual((state['page'], state['skip'], state['records']),
+                         (2, 2, 12))
+        counts = self.g.export_author_books(2001, self.path('books.jsonl'),
+                                            checkpoint=checkpoint,
+                                            batch_size=4)
+        self.assertEqual((counts['records'], counts['resumed']), (25, True))
+        self.assertEqual(self.lines('books.jsonl'), self.lines('clean.jsonl'))
+        # page 1 was fetched by the clean and the interrupted export only
+        pages = [r[2]['page'] for r in self.server.requests]
+        self.assertEqual(pages.count('1'), 2)
+
+    def test_unknown_format(self):
+        self.assertRaises(ValueError, self.g.export_author_books, 2001,
+                          self.path('books.xls'), format='xls')
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        self.g.export_author_books(2001, self.path('books'), format='parquet',
+                                   batch_size=10)
+        self.assertEqual(sorted(os.listdir(self.path('books'))), [
+            'part-00000.parquet', 'part-00001.parquet', 'part-00002.parquet'])
+        table = pyarrow.parquet.read_table(self.path('books'))
+        self.assertEqual(table.num_rows, 25)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,21 +8,184 @@ test_goodreads
 Tests for `goodreads` module.
 """
 
+from datetime import datetime
+import time
 import unittest
 
+import pickle
+
+from lxml import etree
+
 from goodreads import goodreads
+from goodreads.cache import EntityCache
+from goodreads.goodreads import (Deferred, GoodreadsAuthor, GoodreadsBook,
+                                 GoodreadsReview, native)
+from goodreads.ratelimit import RateLimiter
+
+from tests.stub import StubServer, fixture
 
 
 class TestGoodreads(unittest.TestCase):
 
     def setUp(self):
-        pass
+        self.server = StubServer().__enter__()
+        self.g = goodreads.Goodreads('key', 'secret',
+                                     rate_limiter=RateLimiter(1000, 10))
+        self.g.base_url = self.server.url
 
     def test_something(self):
         pass
 
+    def pages(self):
+        return [int(r[2]['page']) for r in self.server.requests]
+
+    def test_author_books(self):
+        books = list(self.g.author_books(2001))
+        self.assertEqual(len(books), 25)
+        self.assertEqual(books[24].title, 'Orsinian Tales')
+        self.assertEqual(sorted(self.pages()), [1, 2, 3])
+
+    def test_author_books_limit(self):
+        self.assertEqual(len(list(self.g.author_books(2001, limit=15))), 15)
+        self.assertEqual(sorted(self.pages()), [1, 2])
+
+    def test_author_books_limit_within_page(self):
+        self.assertEqual(len(list(self.g.author_books(2001, limit=10))), 10)
+        self.assertEqual(self.pages(), [1])
+
+    def test_author_books_prefetches(self):
+        books = self.g.author_books(2001)
+        for _ in range(10):
+            next(books)
+            time.sleep(0.01)
+        self.assertEqual(sorted(self.pages()), [1, 2])
+        books.close()
+
+    def test_reviews_list(self):
+        reviews = list(self.g.reviews_list(1000001, shelf='read'))
+        self.assertEqual([r.book.title for r in reviews], [
+            'The Left Hand of Darkness', 'The Dispossessed',
+            'A Wizard of Earthsea'])
+        self.assertEqual(reviews[0].rating, 5)
+        self.assertEqual(reviews[0].shelves, ['read'])
+        self.assertEqual(self.server.requests[0][2]['shelf'], 'read')
+        self.assertEqual(self.pages(), [1])
+
+    def test_user_notifications(self):
+        g = goodreads.Goodreads('key', 'secret', 'token', 'token_secret',
+                                rate_limiter=RateLimiter(1000, 10))
+        g.base_url = self.server.url
+        notifications = list(g.user_notifications())
+        self.assertEqual(len(notifications), 2)
+        self.assertTrue(notifications[0].new)
+        self.assertEqual(self.pages(), [1, 2])
+        g.close()
+
+    def test_book_formats(self):
+        json = self.g.book(3001, format='json')
+        xml = self.g.book(3001)
+        self.assertEqual((json.id, json.reviews_widget),
+                         (xml.id, xml.reviews_widget))
+        self.assertEqual((json.title, json.authors), (None, None))
+        self.assertEqual([r[2]['format'] for r in self.server.requests],
+                         ['json', 'xml'])
+        self.assertRaises(goodreads.GoodreadsException,
+                          GoodreadsBook.from_widget, {'book': {}})
+
+    def test_book_by_isbn(self):
+        self.g.formats['book_by_isbn'] = 'json'
+        self.assertRaises(goodreads.GoodreadsException,
+                          self.g.book_by_isbn, '0061054887')
+        book = self.g.book_by_isbn('0061054887', user_id=1000001)
+        self.assertEqual((book.isbn, book.reviews_widget),
+                         ('0061054887', '<div id="goodreads-widget"></div>'))
+        params = self.server.requests[0][2]
+        self.assertEqual((params['format'], params['user_id']),
+                         ('json', '1000001'))
+
+    def test_book_review_counts(self):
+        counts = self.g.book_review_counts(['0061054887', '0553575376'])
+        self.assertEqual([(c.id, c.average_rating) for c in counts],
+                         [(3001, 4.21), (3002, 4.24)])
+        self.assertEqual(self.server.requests[0][2]['isbns'],
+                         '0061054887,0553575376')
+        self.assertRaises(goodreads.GoodreadsException,
+                          self.g.book_review_counts, [])
+
     def tearDown(self):
-        pass
+        self.g.close()
+        self.server.__exit__()
+
+
+class TestModels(unittest.TestCase):
+
+    def test_fixed_layout(self):
+        book = GoodreadsBook(id=1, title='Tehanu')
+        self.assertFalse(hasattr(book, '__dict__'))
+        self.assertEqual(book.title, 'Tehanu')
+        self.assertEqual(book.isbn, None)
+        self.assertRaises(AttributeError, setattr, book, 'nonsense', 1)
+        self.assertRaises(TypeError, GoodreadsBook, nonsense=1)
+
+    def test_pickle(self):
+        author = GoodreadsAuthor(id='2001', name='Ursula K. Le Guin')
+        copy = pickle.loads(pickle.dumps(author))
+        self.assertEqual((copy.id, copy.name, copy.books),
+                         ('2001', 'Ursula K. Le Guin', None))
+
+    def book(self, **kwargs):
+        xml = etree.fromstring(fixture('book_show.xml'))
+        return GoodreadsBook.from_element(xml.find('book'), **kwargs)
+
+    def test_native_values(self):
+        book = self.book()
+        self.assertEqual(book.id, 3001)
+        self.assertEqual(book.pages, 387)
+        self.assertEqual(book.average_rating, 4.21)
+        self.assertEqual(book.is_ebook, False)
+        self.assertEqual(book.asin, None)
+        self.assertEqual(book.popular_shelves[0], ('to-read', 51234))
+        self.assertEqual(book.series, [{'id': 5001, 'position': '5',
+                                        'series_id': 6001,
+                                        'title': 'Hainish Cycle'}])
+        self.assertEqual([b.pages for b in book.similar_books], [451, None])
+        self.assertEqual(book.authors[0].name, 'Ursula K. Le Guin')
+        for value in (getattr(book, f) for f in book.field_names):
+            self.assertFalse(isinstance(value, etree._Element))
+
+    def test_lazy_collections(self):
+        book = self.book(lazy=True)
+        self.assertTrue(isinstance(book._similar_books, Deferred))
+        self.assertEqual([b.id for b in book.similar_books], [3002, 3003])
+        self.assertFalse(isinstance(book._similar_books, Deferred))
+        copy = pickle.loads(pickle.dumps(book))
+        self.assertTrue(isinstance(copy._series, Deferred))
+        self.assertEqual(copy.series[0]['title'], 'Hainish Cycle')
+        self.assertEqual([b.id for b in copy.similar_books], [3002, 3003])
+
+    def test_lazy_with_entity_cache(self):
+        cache = EntityCache()
+        book = self.book(lazy=True, cache=cache)
+        self.assertTrue(cache.get(GoodreadsBook, 3001) is book)
+        self.assertTrue(isinstance(book._similar_books, Deferred))
+        self.assertTrue(isinstance(book._popular_shelves, Deferred))
+        self.assertTrue(cache.bytes > len(book._similar_books.data))
+        copy = pickle.loads(pickle.dumps(book, 2))
+        self.assertTrue(isinstance(copy._popular_shelves, Deferred))
+        self.assertEqual(copy.popular_shelves[0], ('to-read', 51234))
+
+    def test_review_dates(self):
+        xml = etree.fromstring(fixture('review_list_1.xml'))
+        review = GoodreadsReview.from_element(xml.find('reviews/review'))
+        self.assertEqual(review.rating, 5)
+        self.assertEqual(review.date_updated, datetime(2014, 2, 18, 18, 21, 3))
+
+    def test_native(self):
+        self.assertEqual(native(int, etree.fromstring('<a> 7 </a>')), 7)
+        self.assertEqual(native(int, etree.fromstring('<a>x</a>')), None)
+        self.assertEqual(native(int, None), None)
+        self.assertEqual(native(datetime, '2014-02-18T10:21:03-08:00'),
+                         datetime(2014, 2, 18, 18, 21, 3))
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_isbn
+----------------------------------
+
+Tests for `isbn` module and ISBN lookups.
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from goodreads import goodreads
+from goodreads.catalog import Catalog
+from goodreads.isbn import BloomFilter, ISBNResolver, normalize
+from goodreads.ratelimit import RateLimiter
+
+from tests.stub import StubServer
+
+# valid, but not in the review_counts fixture
+UNKNOWN = '9780000000002'
+
+
+class TestNormalize(unittest.TestCase):
+
+    def test_isbn10_to_isbn13(self):
+        self.assertEqual(normalize('0061054887'), '9780061054884')
+        self.assertEqual(normalize('0-553-57537-6'), '9780553575378')
+        self.assertEqual(normalize('ISBN 0-8044-2957-x'), '9780804429573')
+
+    def test_isbn13(self):
+        self.assertEqual(normalize('978-0-06-105488-4'), '9780061054884')
+        self.assertEqual(normalize(9780061054884), '9780061054884')
+
+    def test_invalid(self):
+        for isbn in ('0061054888', '9780061054885', '1234567890123',
+                     '06105488', 'abcdefghij', '', None):
+            self.assertEqual(normalize(isbn), None, isbn)
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add('in-%d' % i)
+        self.assertTrue(all('in-%d' % i in bloom for i in range(1000)))
+        false = sum(1 for i in range(10000) if 'out-%d' % i in bloom)
+        self.assertTrue(false < 300, false)
+        self.assertEqual(len(bloom), 1000)
+
+    def test_pickles(self):
+        bloom = BloomFilter(capacity=100)
+        bloom.add('a')
+        copy = pickle.loads(pickle.dumps(bloom, 2))
+        self.assertTrue('a' in copy)
+        self.assertFalse('b' in copy)
+
+
+class TestResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'catalog.db')
+        self.server = StubServer().__enter__()
+        self.catalog = Catalog(self.path)
+        self.g = goodreads.Goodreads('key', 'secret', base_url=self.server.url,
+                                     rate_limiter=RateLimiter(1000, 10),
+                                     catalog=self.catalog)
+
+    def tearDown(self):
+        self.g.close()
+        self.catalog.close()
+        self.server.__exit__()
+        shutil.rmtree(self.dir)
+
+    def test_resolve(self):
+        ids = self.g.resolve_isbns(['0-06-105488-7', '9780061054884',
+                                    '0553575376', UNKNOWN, 'bad'])
+        self.assertEqual(ids.items(), [
+            ('0-06-105488-7', 3001), ('9780061054884', 3001),
+            ('0553575376', 3002), (UNKNOWN, None), ('bad', None)])
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.g.isbn_resolver.stats()['requested'], 3)
+
+    def test_hits_and_misses_are_remembered(self):
+        isbns = ['0061054887', '0553575376', UNKNOWN]
+        self.g.resolve_isbns(isbns)
+        self.assertEqual(self.g.resolve_isbns(isbns).values(),
+                         [3001, 3002, None])
+        self.assertEqual(len(self.server.requests), 1)
+        stats = self.g.isbn_resolver.stats()
+        self.assertEqual((stats['indexed'], stats['known_missing']), (2, 1))
+
+    def test_index_persists(self):
+        self.g.resolve_isbns(['0061054887'])
+        self.catalog.close()
+        resolver = ISBNResolver(self.g, Catalog(self.path))
+        self.assertEqual(resolver.resolve(['9780061054884']).values(), [3001])
+        self.assertEqual(len(self.server.requests), 1)
+        resolver.catalog.close()
+
+    def test_stored_books_are_indexed(self):
+        self.g.book(3001)
+        self.assertEqual(self.g.resolve_isbns(['0061054887']).values(), [3001])
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_batches(self):
+        resolver = ISBNResolver(self.g, batch_size=2)
+        resolver.resolve(['0061054887', '0553575376', UNKNOWN])
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_isbn_to_id(self):
+        self.assertEqual(self.g.book_isbn_to_id('0061054887'), 3001)
+        self.assertEqual(self.g.book_isbn_to_id('978-0-06-105488-4'), 3001)
+        self.assertEqual(len(self.server.requests), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_metrics
+----------------------------------
+
+Tests for `metrics` module.
+"""
+
+import shutil
+import tempfile
+import unittest
+
+from goodreads import goodreads
+from goodreads.cache import ResponseCache
+from goodreads.metrics import Histogram, MetricsRegistry, endpoint_template
+from goodreads.ratelimit import RateLimiter
+
+from tests.stub import StubServer
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_counters_and_histograms(self):
+        metrics = MetricsRegistry()
+        metrics.counter('requests', endpoint='user/show/', status=200).inc()
+        metrics.counter('requests', status=200, endpoint='user/show/').inc()
+        for value in (0.002, 0.004, 0.2):
+            metrics.histogram('network_seconds').observe(value)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['counters'],
+                         {'requests{endpoint=user/show/,status=200}': 2})
+        network = snapshot['histograms']['network_seconds']
+        self.assertEqual((network['count'], network['max']), (3, 0.2))
+        self.assertEqual(network['p50'], 0.005)
+
+    def test_histogram_overflow(self):
+        histogram = Histogram(buckets=(1, 2))
+        histogram.observe(7)
+        self.assertEqual(histogram.percentile(99), 7)
+        self.assertEqual(Histogram().percentile(50), None)
+
+    def test_endpoint_template(self):
+        self.assertEqual(endpoint_template('user/1000001/followers?page=2'),
+                         'user/:id/followers')
+        self.assertEqual(endpoint_template('/user/compare/1.xml'),
+                         'user/compare/:id.xml')
+        self.assertEqual(endpoint_template('author/list.xml'),
+                         'author/list.xml')
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(delay=0.01).__enter__()
+        self.metrics = MetricsRegistry()
+        self.infos = []
+        self.g = goodreads.Goodreads('key', 'secret',
+                                     rate_limiter=RateLimiter(1000, 10),
+                                     base_url=self.server.url,
+                                     metrics=self.metrics,
+                                     hooks=[self.infos.append])
+
+    def tearDown(self):
+        self.g.close()
+        self.server.__exit__()
+
+    def test_request_info(self):
+        self.g.user(user_id=1000001)
+        info, = self.infos
+        self.assertEqual((info.method, info.endpoint, info.status),
+                         ('GET', 'user/show/', 200))
+        self.assertTrue(info.bytes > 0)
+        self.assertTrue(info.network >= 0.01)
+        self.assertTrue(info.parse > 0)
+        self.assertTrue(info.wait is not None)
+        counters = self.metrics.snapshot()['counters']
+        self.assertEqual(counters['requests{endpoint=user/show/,status=200}'],
+                         1)
+
+    def test_paged_requests(self):
+        self.assertEqual(len(list(self.g.author_books(2001))), 25)
+        self.assertEqual(len(self.infos), 3)
+        self.assertTrue(all(i.parse > 0 for i in self.infos))
+        histograms = self.metrics.snapshot()['histograms']
+        self.assertEqual(
+            histograms['parse_seconds{endpoint=author/list.xml}']['count'], 3)
+
+    def test_unparsed_request_is_finished(self):
+        self.g.dev_get('author/show.xml', {'id': 2001})
+        self.g.user(user_id=1000001)
+        self.assertEqual([i.endpoint for i in self.infos],
+                         ['author/show.xml', 'user/show/'])
+        self.assertEqual(self.infos[0].parse, None)
+
+    def test_cache_hits(self):
+        path = tempfile.mkdtemp()
+        try:
+            self.g.cache = ResponseCache(path)
+            self.g.author(2001)
+            self.g.author(2001)
+        finally:
+            shutil.rmtree(path)
+        self.assertEqual([i.cached for i in self.infos], [False, True])
+
+    def test_disabled(self):
+        g = goodreads.Goodreads('key', 'secret', base_url=self.server.url)
+        self.assertFalse(g.instrumented)
+        g.user(user_id=1000001)
+        self.assertEqual(g.take_request(), None)
+        g.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_paging
+----------------------------------
+
+Tests for `paging` module.
+"""
+
+import threading
+import unittest
+
+from goodreads import goodreads
+from goodreads.paging import Paginator
+
+
+class FakeList(object):
+
+    def __init__(self, total, per_page=10, annotated=True):
+        self.total = total
+        self.per_page = per_page
+        self.annotated = annotated
+        self.fetched = []
+        self.lock = threading.Lock()
+
+    def __call__(self, page):
+        with self.lock:
+            self.fetched.append(page)
+        start = (page - 1) * self.per_page
+        end = min(start + self.per_page, self.total)
+        attrs = ''
+        if self.annotated:
+            attrs = ' start="%d" end="%d" total="%d"' % (
+                start + 1, end, self.total)
+        items = ''.join('<item><id>%d</id></item>' % i
+                        for i in range(start, end))
+        return '<response><items%s>%s</items></response>' % (attrs, items)
+
+
+class FakeResponse(object):
+    """
+    A response to a stream=True request, recording how its body was read.
+    """
+
+    def __init__(self, body):
+        self.body = body
+        self.buffered = False
+        self.closed = False
+
+    @property
+    def content(self):
+        self.buffered = True
+        return self.body
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class TestPaginator(unittest.TestCase):
+
+    def setUp(self):
+        self.client = goodreads.Goodreads('key', 'secret')
+
+    def tearDown(self):
+        self.client.close()
+
+    def paginator(self, fetch, **kwargs):
+        return Paginator(self.client, fetch, 'items', 'item',
+                         lambda e: int(e.findtext('id')), **kwargs)
+
+    def test_all_items_in_order(self):
+        fetch = FakeList(95)
+        self.assertEqual(list(self.paginator(fetch, concurrency=4)),
+                         range(95))
+        self.assertEqual(sorted(fetch.fetched), range(1, 11))
+
+    def test_limit_fetches_only_needed_pages(self):
+        fetch = FakeList(95)
+        self.assertEqual(list(self.paginator(fetch, limit=25,
+                                             concurrency=4)), range(25))
+        self.assertEqual(sorted(fetch.fetched), [1, 2, 3])
+
+    def test_early_termination(self):
+        fetch = FakeList(95)
+        items = iter(self.paginator(fetch, concurrency=2))
+        next(items)
+        items.close()
+        self.assertTrue(max(fetch.fetched) <= 3)
+
+    def test_resume_from_cursor(self):
+        fetch = FakeList(95)
+        paginator = self.paginator(fetch)
+        for item in paginator:
+            if item == 24:
+                break
+        self.assertEqual(paginator.cursor, 3)
+        resumed = self.paginator(fetch, page=paginator.cursor)
+        self.assertEqual(list(resumed), range(20, 95))
+        self.assertEqual(resumed.total, 95)
+
+    def test_unannotated_list_stops_on_short_page(self):
+        fetch = FakeList(25, annotated=False)
+        self.assertEqual(list(self.paginator(fetch)), range(25))
+        self.assertEqual(fetch.fetched, [1, 2, 3])
+
+    def test_unannotated_list_stops_on_empty_page(self):
+        fetch = FakeList(20, annotated=False)
+        self.assertEqual(list(self.paginator(fetch)), range(20))
+        self.assertEqual(fetch.fetched, [1, 2, 3])
+
+    def test_first_page_streams(self):
+        fetch = FakeList(25)
+        responses = {}
+
+        def streamed(page):
+            responses[page] = FakeResponse(fetch(page))
+            return responses[page]
+        self.assertEqual(list(self.paginator(streamed, concurrency=2)),
+                         range(25))
+        self.assertEqual([(r.buffered, r.closed) for _, r in
+                          sorted(responses.items())],
+                         [(False, True), (True, True), (True, True)])
+
+    def test_iterator_protocol(self):
+        paginator = self.paginator(FakeList(5))
+        self.assertEqual(next(paginator), 0)
+        self.assertEqual(next(paginator), 1)
+        paginator.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_ratelimit
+----------------------------------
+
+Tests for `ratelimit` module.
+"""
+
+import threading
+import unittest
+
+from goodreads import goodreads
+from goodreads.cache import CachedResponse
+from goodreads.metrics import MetricsRegistry
+from goodreads.ratelimit import (AdaptiveRateLimiter, RateLimiter, backoff,
+                                 parse_retry_after)
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = RateLimiter(rate=2, burst=3, clock=self.clock,
+                                   sleep=self.clock.sleep)
+
+    def test_burst_then_blocks(self):
+        for _ in range(3):
+            self.assertTrue(self.limiter.try_acquire())
+        self.assertFalse(self.limiter.try_acquire())
+        self.assertTrue(self.limiter.acquire())
+        self.assertEqual(self.clock.slept, [0.5])
+
+    def test_refill_capped_at_burst(self):
+        self.limiter.acquire(3)
+        self.clock.now += 60
+        self.assertEqual(self.limiter.available, 3)
+
+    def test_timeout(self):
+        self.limiter.acquire(3)
+        self.assertFalse(self.limiter.acquire(timeout=0.1))
+        self.assertEqual(self.clock.slept, [])
+        self.assertTrue(self.limiter.acquire(timeout=0.5))
+
+    def test_reservations_are_queued(self):
+        self.limiter.acquire(3)
+        self.assertEqual(self.limiter.reserve(), 0.5)
+        self.assertEqual(self.limiter.reserve(), 1.0)
+        self.assertEqual(self.limiter.reserve(), 1.5)
+
+    def test_too_many_tokens(self):
+        self.assertRaises(ValueError, self.limiter.acquire, 4)
+
+    def test_thread_safe(self):
+        limiter = RateLimiter(rate=1000, burst=50)
+        granted = []
+
+        def worker():
+            granted.append(sum(limiter.try_acquire() for _ in range(20)))
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertTrue(50 <= sum(granted) < 100)
+
+    def test_shared_between_clients(self):
+        a = goodreads.Goodreads('key', 'secret', rate_limiter=self.limiter)
+        b = goodreads.Goodreads('key', 'secret', rate_limiter=self.limiter)
+        for _ in range(3):
+            a.wait()
+        b.wait()
+        self.assertEqual(self.clock.slept, [0.5])
+
+    def test_pause(self):
+        self.limiter.pause(2)
+        self.assertEqual(self.limiter.reserve(), 2.5)
+        self.clock.now += 10
+        self.assertEqual(self.limiter.available, 3)
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = AdaptiveRateLimiter(
+            rate=4, min_rate=1, max_rate=10, increase=2, cooldown=1,
+            clock=self.clock, sleep=self.clock.sleep)
+
+    def healthy(self, count=1):
+        for _ in range(count):
+            self.limiter.acquire()
+            self.limiter.feedback(200)
+
+    def test_slow_start(self):
+        self.healthy()
+        self.assertEqual(self.limiter.rate, 5)
+        self.healthy(100)
+        self.assertEqual(self.limiter.rate, 10)
+
+    def test_additive_increase(self):
+        self.limiter.feedback(429)
+        self.healthy()
+        self.assertEqual(self.limiter.rate, 3)
+        self.healthy()
+        self.assertAlmostEqual(self.limiter.rate, 3 + 2 / 3.0)
+
+    def test_no_growth_without_demand(self):
+        self.limiter.feedback(200)
+        self.clock.now += 60
+        self.limiter.feedback(200)
+        self.assertEqual(self.limiter.rate, 4)
+
+    def test_multiplicative_decrease(self):
+        self.limiter.feedback(429)
+        self.assertEqual(self.limiter.rate, 2)
+        # within the cooldown: the same congestion event
+        self.limiter.feedback(503)
+        self.assertEqual(self.limiter.rate, 2)
+        self.clock.now += 1
+        self.limiter.feedback(503)
+        self.clock.now += 1
+        self.limiter.feedback(503)
+        self.assertEqual((self.limiter.rate, self.limiter.backoffs), (1, 3))
+
+    def test_latency(self):
+        for _ in range(5):
+            self.limiter.acquire()
+            self.limiter.feedback(200, latency=0.1)
+        rate = self.limiter.rate
+        for _ in range(5):
+            self.limiter.feedback(200, latency=1.0)
+        self.assertTrue(self.limiter.rate < rate)
+        self.assertEqual(self.limiter.backoffs, 1)
+
+    def test_latency_threshold(self):
+        limiter = AdaptiveRateLimiter(rate=4, latency=0.5, clock=self.clock)
+        limiter.acquire()
+        limiter.feedback(200, latency=0.4)
+        self.assertTrue(limiter.rate > 4)
+        limiter.feedback(200, latency=2.0)
+        self.assertTrue(limiter.rate < 4)
+
+    def test_retry_after(self):
+        self.assertEqual(parse_retry_after('3'), 3)
+        self.assertEqual(parse_retry_after('Tue, 18 Feb 2014 18:21:13 GMT',
+                                           now=1392747663), 10)
+        self.assertEqual(parse_retry_after('soon'), None)
+        self.assertEqual(parse_retry_after(None), None)
+
+    def test_backoff(self):
+        self.assertEqual(backoff(0, 0.5, 30, rand=lambda: 0), 0.25)
+        self.assertEqual(backoff(3, 0.5, 30, rand=lambda: 1), 4)
+        self.assertEqual(backoff(10, 0.5, 30, rand=lambda: 1), 30)
+
+
+class ScriptedTransport(object):
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, params=None, **kwargs):
+        self.calls += 1
+        status, headers = self.responses.pop(0)
+        return CachedResponse(url, status, headers, '', 0)
+
+    def close(self):
+        pass
+
+
+class TestRetries(unittest.TestCase):
+
+    def client(self, transport, **kwargs):
+        g = goodreads.Goodreads('key', 'secret', transport=transport,
+                                rate_limiter=RateLimiter(1000, 10), **kwargs)
+        g.backoff = 0.001
+        return g
+
+    def test_throttled_requests_are_retried(self):
+        transport = ScriptedTransport((503, {}), (429, {'retry-after': '0'}),
+                                      (200, {}))
+        metrics = MetricsRegistry()
+        g = self.client(transport, metrics=metrics)
+        self.assertEqual(g.dev_get('user/show/', {}).status_code, 200)
+        self.assertEqual(transport.calls, 3)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['counters'][
+            'retries{endpoint=user/show/,status=503}'], 1)
+        self.assertEqual(snapshot['gauges']['request_rate'], 1000)
+
+    def test_retries_exhausted(self):
+        transport = ScriptedTransport(*[(429, {})] * 4)
+        g = self.client(transport)
+        self.assertRaises(goodreads.GoodreadsException, g.dev_get,
+                          'user/show/', {})
+        self.assertEqual(transport.calls, 4)
+
+    def test_retry_after_pauses_the_limiter(self):
+        clock = FakeClock()
+        limiter = RateLimiter(1000, 10, clock=clock, sleep=clock.sleep)
+        g = self.client(ScriptedTransport((429, {'retry-after': '2'}),
+                                          (200, {})))
+        g.rate_limiter = limiter
+        g.dev_get('user/show/', {})
+        self.assertEqual(len(clock.slept), 1)
+        self.assertAlmostEqual(clock.slept[0], 2, places=2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_schema
+----------------------------------
+
+Tests for `schema` module.
+"""
+
+from datetime import datetime
+import unittest
+
+from lxml import etree, objectify
+
+from goodreads.schema import Schema, parse_datetime
+
+BOOK = Schema(
+    ('id', 'id', int),
+    ('title', 'title', str),
+    ('rating', 'average_rating', float, 0.0),
+    ('ebook', 'is_ebook', bool),
+    ('series', 'series/title', str),
+    ('kind', '@type', str, 'book'),
+)
+
+XML = ('<book type="edition"><id> 12 </id><title>Tehanu</title>'
+       '<average_rating>n/a</average_rating><is_ebook>true</is_ebook>'
+       '<series><title>Earthsea</title></series><id>13</id></book>')
+
+
+class TestSchema(unittest.TestCase):
+
+    def test_extract(self):
+        self.assertEqual(BOOK.extract(etree.fromstring(XML)), {
+            'id': 12, 'title': 'Tehanu', 'rating': 0.0, 'ebook': True,
+            'series': 'Earthsea', 'kind': 'edition'})
+
+    def test_missing_fields_use_defaults(self):
+        self.assertEqual(BOOK.extract(etree.fromstring('<book/>')), {
+            'id': None, 'title': None, 'rating': 0.0, 'ebook': None,
+            'series': None, 'kind': 'book'})
+        self.assertEqual(BOOK.extract(None)['kind'], 'book')
+
+    def test_objectify_elements(self):
+        values = BOOK.extract(objectify.fromstring(XML))
+        self.assertEqual((values['id'], values['series']), (12, 'Earthsea'))
+
+    def test_decode(self):
+        record = {'id': 12, 'title': 'Tehanu', 'average_rating': 'n/a',
+                  'is_ebook': True, 'series': {'title': 'Earthsea'},
+                  'type': 'edition'}
+        self.assertEqual(BOOK.decode(record), {
+            'id': 12, 'title': 'Tehanu', 'rating': 0.0, 'ebook': True,
+            'series': 'Earthsea', 'kind': 'edition'})
+        self.assertEqual(BOOK.decode({'id': '12', 'series': None})['id'], 12)
+
+    def test_parse_datetime(self):
+        expected = datetime(2014, 2, 18, 18, 21, 3)
+        self.assertEqual(parse_datetime('Tue Feb 18 10:21:03 -0800 2014'),
+                         expected)
+        self.assertEqual(parse_datetime('2014-02-18T18:21:03Z'), expected)
+        self.assertEqual(parse_datetime('yesterday'), None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_shelfsync
+----------------------------------
+
+Tests for `shelfsync` module.
+"""
+
+from datetime import datetime, timedelta
+import os
+import shutil
+import tempfile
+import unittest
+
+from goodreads import goodreads
+from goodreads.catalog import Catalog
+from goodreads.goodreads import GoodreadsReview
+from goodreads.ratelimit import RateLimiter
+from goodreads.shelfsync import ShelfSync
+
+from tests.stub import StubServer
+
+START = datetime(2014, 1, 1)
+
+
+class FakeShelf(object):
+    """
+    Stands in for a client: reviews_list() over an in-memory shelf,
+    recording the pages requested.
+    """
+    bulk_workers = 2
+
+    def __init__(self, count):
+        self.reviews = dict((id, START + timedelta(days=id))
+                            for id in range(1, count + 1))
+        self.pages = []
+
+    def touch(self, id, days=1000):
+        self.reviews[id] = START + timedelta(days=days)
+
+    def reviews_list(self, user_id, shelf=None, sort=None, order=None,
+                     per_page=None, page=1, limit=None):
+        assert (sort, order) == ('date_updated', 'd')
+        ordered = sorted(self.reviews.items(), key=lambda r: r[1],
+                         reverse=True)
+        reviews = [GoodreadsReview(id=id, date_updated=updated)
+                   for id, updated in ordered]
+        if limit is None:
+            self.pages.extend(range(page, page + len(reviews) // per_page + 1))
+            return reviews[(page - 1) * per_page:]
+        self.pages.append(page)
+        return reviews[(page - 1) * per_page:page * per_page][:limit]
+
+
+class TestShelfSync(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.shelf = FakeShelf(450)
+        self.sync = ShelfSync(self.shelf, reconcile_every=100,
+                              clock=lambda: self.now)
+
+    def changes(self, **kwargs):
+        del self.shelf.pages[:]
+        return self.sync.sync(1, 'read', **kwargs)
+
+    def test_first_sync_is_full(self):
+        changes = self.changes()
+        self.assertTrue(changes.full)
+        self.assertEqual(len(changes.added), 450)
+        self.assertEqual(self.sync.state(1, 'read').watermark,
+                         START + timedelta(days=450))
+
+    def test_unchanged_shelf_costs_one_request(self):
+        self.changes()
+        changes = self.changes()
+        self.assertEqual((len(changes), changes.full), (0, False))
+        self.assertEqual(self.shelf.pages, [1])
+
+    def test_added_and_updated(self):
+        self.changes()
+        self.shelf.touch(7)
+        self.shelf.touch(451, days=1001)
+        changes = self.changes()
+        self.assertEqual([r.id for r in changes.added], [451])
+        self.assertEqual([r.id for r in changes.updated], [7])
+        self.assertEqual(changes.removed, [])
+        self.assertEqual(self.shelf.pages, [1])
+
+    def test_stops_at_the_watermark_across_pages(self):
+        self.changes()
+        for id in range(200, 451):
+            self.shelf.touch(id, days=1000 + id)
+        changes = self.changes()
+        self.assertEqual(len(changes.updated), 251)
+        self.assertEqual(self.shelf.pages, [1, 2])
+
+    def test_removals_need_a_full_sync(self):
+        self.changes()
+        del self.shelf.reviews[3]
+        self.assertEqual(self.changes().removed, [])
+        self.now = 100
+        changes = self.changes()
+        self.assertTrue(changes.full)
+        self.assertEqual((changes.removed, len(changes.added),
+                          len(changes.updated)), ([3], 0, 0))
+        self.assertFalse(self.changes(full=False).full)
+
+    def test_sync_many(self):
+        results = list(self.sync.sync_many([1, 2, 3]))
+        self.assertEqual([r.value.user_id for r in results], [1, 2, 3])
+        self.assertEqual([len(r.value.added) for r in results], [450] * 3)
+        self.assertEqual(self.sync.state(2, None).watermark,
+                         START + timedelta(days=450))
+
+
+class TestSyncShelf(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'catalog.db')
+        self.server = StubServer().__enter__()
+
+    def tearDown(self):
+        self.server.__exit__()
+        shutil.rmtree(self.dir)
+
+    def client(self):
+        return goodreads.Goodreads('key', 'secret', base_url=self.server.url,
+                                   rate_limiter=RateLimiter(1000, 10),
+                                   catalog=Catalog(self.path))
+
+    def test_watermark_persists(self):
+        with self.client() as g:
+            changes = g.sync_shelf(1000001, 'read')
+            self.assertEqual([r.id for r in changes.added], [4001, 4002, 4003])
+            g.catalog.close()
+        with self.client() as g:
+            changes = g.sync_shelf(1000001, 'read')
+            self.assertEqual((len(changes), changes.full), (0, False))
+            state = g.shelf_sync.state(1000001, 'read')
+            self.assertEqual(state.reviews[4001], state.watermark)
+            g.catalog.close()
+        params = self.server.requests[-1][2]
+        self.assertEqual((params['sort'], params['order'], params['page']),
+                         ('date_updated', 'd', '1'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_signing
+----------------------------------
+
+Tests for `signing` module.
+"""
+
+import unittest
+
+import oauth2 as oauth
+
+from goodreads import goodreads
+from goodreads.ratelimit import RateLimiter
+from goodreads.signing import Signer, normalize_url
+from goodreads.transport import Transport
+
+from tests.stub import StubServer
+
+CONSUMER = oauth.Consumer('key', 'secret')
+TOKEN = oauth.Token('token', 'token secret')
+
+
+def reference(method, url, params, token=TOKEN):
+    """
+    oauth2's signature for the same request.
+    """
+    params = dict(params, oauth_nonce='abc', oauth_timestamp='1392747663',
+                  oauth_version='1.0')
+    request = oauth.Request(method, url, params, is_form_encoded=True)
+    request.sign_request(oauth.SignatureMethod_HMAC_SHA1(), CONSUMER, token)
+    return request['oauth_signature']
+
+
+class RecordingTransport(Transport):
+
+    def __init__(self, **kwargs):
+        Transport.__init__(self, **kwargs)
+        self.sent = []
+
+    def request(self, method, url, **kwargs):
+        self.sent.append((method, url, kwargs.get('headers') or {}))
+        return Transport.request(self, method, url, **kwargs)
+
+
+class TestSigner(unittest.TestCase):
+
+    def signature(self, signer, method, url, params):
+        return signer.signature(method, url, params, nonce='abc',
+                                timestamp='1392747663')[0]
+
+    def test_matches_oauth2(self):
+        signer = Signer(CONSUMER, TOKEN)
+        for method, url, params in [
+                ('GET', 'http://www.goodreads.com/notifications', {}),
+                ('GET', 'http://www.goodreads.com/user/compare/1.xml',
+                 {'id': 1000002, 'page': None}),
+                ('POST', 'http://www.goodreads.com/shelf/add_to_shelf.xml',
+                 {'name': u'to-r\xe9ad', 'book_id': '3001'}),
+                ('DELETE', 'https://www.goodreads.com:443/user_shelves/'
+                 'destroy.xml?id=12', {})]:
+            expected = reference(method, url, dict(
+                (k, v) for k, v in params.items() if v is not None))
+            self.assertEqual(self.signature(signer, method, url, params),
+                             expected)
+
+    def test_without_token(self):
+        url = 'http://www.goodreads.com/oauth/request_token'
+        self.assertEqual(self.signature(Signer(CONSUMER), 'GET', url, {}),
+                         reference('GET', url, {}, token=None))
+
+    def test_header(self):
+        header = Signer(CONSUMER, TOKEN).sign(
+            'GET', 'http://www.goodreads.com/notifications', nonce='abc',
+            timestamp='1392747663')
+        self.assertTrue(header.startswith('OAuth oauth_consumer_key="key"'))
+        self.assertTrue('oauth_token="token"' in header)
+        self.assertTrue('oauth_signature="' in header)
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url('HTTP://Example.com:80?a=1'),
+                         ('http://example.com/', 'a=1'))
+        self.assertEqual(normalize_url('http://example.com:8080/a'),
+                         ('http://example.com:8080/a', ''))
+
+
+class TestSignedRequests(unittest.TestCase):
+
+    def test_oauth_requests_use_the_transport(self):
+        transport = RecordingTransport()
+        with StubServer() as server:
+            with goodreads.Goodreads('key', 'secret', 'token', 'token_secret',
+                                     transport=transport,
+                                     base_url=server.url,
+                                     rate_limiter=RateLimiter(1000, 10)) as g:
+                self.assertEqual(len(list(g.user_notifications())), 2)
+                g.user_compare(1000002)
+        self.assertEqual(len(transport.sent), 3)
+        for method, url, headers in transport.sent:
+            self.assertTrue(headers['Authorization'].startswith('OAuth '))
+        # signing parameters travel in the header, not the query
+        self.assertEqual(server.requests[-1][2], {'id': '1000002'})
+        transport.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_singleflight
+----------------------------------
+
+Tests for `singleflight` module and request coalescing.
+"""
+
+import threading
+import time
+import unittest
+
+from goodreads import goodreads
+from goodreads.metrics import MetricsRegistry
+from goodreads.ratelimit import RateLimiter
+from goodreads.singleflight import SingleFlight, request_key
+
+from tests.stub import StubServer
+
+
+def concurrently(call, count):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(call()))
+               for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        runs = []
+
+        def slow():
+            runs.append(1)
+            time.sleep(0.1)
+            return object()
+
+        results = concurrently(lambda: flight.do('k', slow), 5)
+        self.assertEqual(len(runs), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(flight.stats(),
+                         {'calls': 5, 'coalesced': 4, 'inflight': 0})
+
+    def test_exceptions_are_shared(self):
+        flight = SingleFlight()
+
+        def fail():
+            time.sleep(0.1)
+            raise ValueError('no')
+
+        errors = []
+
+        def call():
+            try:
+                flight.do('k', fail)
+            except ValueError as e:
+                errors.append(e)
+
+        concurrently(call, 3)
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(flight.coalesced, 2)
+
+    def test_nothing_kept_afterwards(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do('k', lambda: 1), 1)
+        self.assertEqual(flight.do('k', lambda: 2), 2)
+        self.assertEqual(flight.coalesced, 0)
+
+    def test_request_key(self):
+        self.assertEqual(
+            request_key('get', '/author/show.xml',
+                        {'id': 1, 'page': None, 'key': 'k'}),
+            request_key('GET', 'author/show.xml', {'id': '1'}))
+        self.assertEqual(
+            request_key('GET', 'user/show/', {'username': 'Jos\xc3\xa9'}),
+            ('GET', 'user/show/', (('username', 'Jos\xc3\xa9'),)))
+
+
+class TestCoalescedRequests(unittest.TestCase):
+
+    def test_identical_lookups_share_a_request(self):
+        metrics = MetricsRegistry()
+        with StubServer(delay=0.2) as server:
+            with goodreads.Goodreads('key', 'secret', base_url=server.url,
+                                     rate_limiter=RateLimiter(1000, 10),
+                                     metrics=metrics) as g:
+                authors = concurrently(lambda: g.author(2001), 8)
+        self.assertEqual(len(server.requests), 1)
+        self.assertTrue(all(a is authors[0] for a in authors))
+        self.assertEqual(g.inflight.coalesced, 7)
+        self.assertEqual(metrics.snapshot()['counters'][
+            'coalesced{endpoint=author/show.xml}'], 7)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_streaming
+----------------------------------
+
+Tests for `streaming` module.
+"""
+
+import unittest
+
+from goodreads.cache import CachedResponse
+from goodreads.goodreads import GoodreadsBook
+from goodreads.streaming import StreamParser
+
+from tests.stub import fixture
+
+
+def document(count):
+    yield '<GoodreadsResponse><author><id>1</id>'
+    yield '<books start="1" end="%d" total="%d">' % (count, count)
+    for i in xrange(count):
+        yield ('<book><id>%d</id><title>Book %d</title>'
+               '<similar_books><book><id>0</id></book></similar_books>'
+               '</book>' % (i, i))
+    yield '</books></author></GoodreadsResponse>'
+
+
+class TestStreamParser(unittest.TestCase):
+
+    def test_yields_direct_children_only(self):
+        books = StreamParser('books', 'book')
+        ids = [int(b.findtext('id')) for b in books.parse(document(5))]
+        self.assertEqual(ids, range(5))
+        self.assertEqual(books.attrib,
+                         {'start': '1', 'end': '5', 'total': '5'})
+
+    def test_processed_items_are_released(self):
+        books = StreamParser('books', 'book')
+        for book in books.parse(document(2000)):
+            self.assertEqual(len(book.getparent()), 1)
+
+    def test_books_from_response(self):
+        response = CachedResponse('author/list.xml', 200, {},
+                                  fixture('author_list_1.xml'), 0)
+        books = StreamParser('books', 'book')
+        parsed = [GoodreadsBook.from_small_element(b)
+                  for b in books.parse_response(response, chunk_size=512)]
+        self.assertEqual(len(parsed), 10)
+        self.assertEqual(parsed[0].title, 'The Left Hand of Darkness')
+        self.assertEqual(parsed[9].authors[0].name, 'Ursula K. Le Guin')
+        self.assertEqual(books.attrib['total'], '25')
+
+    def test_empty_container(self):
+        books = StreamParser('books', 'book')
+        self.assertEqual(list(books.parse(['<a><books total="0"/></a>'])), [])
+        self.assertEqual(books.attrib, {'total': '0'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_stubserver
+----------------------------------
+
+Tests for `stubserver` module.
+"""
+
+import shutil
+import tempfile
+import time
+import unittest
+
+from goodreads import goodreads
+from goodreads.ratelimit import RateLimiter
+from goodreads.stubserver import Recorder, StubServer
+from goodreads.transport import Transport
+
+from tests.stub import StubServer as FixtureServer
+
+
+class TestStubServer(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.transport = Transport()
+
+    def tearDown(self):
+        self.transport.close()
+        shutil.rmtree(self.path)
+
+    def client(self, server, **kwargs):
+        return goodreads.Goodreads('key', 'secret', base_url=server.url,
+                                   rate_limiter=RateLimiter(1000, 10),
+                                   **kwargs)
+
+    def statuses(self, server, count):
+        return [self.transport.get(server.url + '/user/show/',
+                                   {'id': 1}).status_code
+                for _ in range(count)]
+
+    def test_record_and_replay(self):
+        with FixtureServer() as live:
+            with self.client(live, recorder=Recorder(self.path)) as g:
+                recorded = g.user(user_id=1000001)
+                g.book(3001, format='json')
+                g.user(username='Jos\xc3\xa9')
+        self.assertEqual(len(Recorder(self.path)), 3)
+
+        with StubServer(recordings=self.path) as replay:
+            with self.client(replay) as g:
+                user = g.user(user_id=1000001)
+                book = g.book(3001, format='json')
+                self.assertRaises(goodreads.GoodreadsException, g.book, 3002)
+        self.assertEqual((user.id, user.name), (recorded.id, recorded.name))
+        self.assertEqual(book.reviews_widget,
+                         '<div id="goodreads-widget"></div>')
+        self.assertEqual(replay.requests[0][2]['key'], 'key')
+
+    def test_error_injection_is_reproducible(self):
+        runs = []
+        for _ in range(2):
+            with FixtureServer(errors={503: 0.3, 404: 0.2}, seed=7) as server:
+                runs.append(self.statuses(server, 30))
+        self.assertEqual(runs[0], runs[1])
+        self.assertEqual(set(runs[0]), set([200, 404, 503]))
+        self.assertEqual(server.counts['injected'],
+                         len([s for s in runs[0] if s != 200]))
+
+    def test_rate_limit(self):
+        with FixtureServer(rate=1, burst=2) as server:
+            response = None
+            for _ in range(3):
+                response = self.transport.get(server.url + '/user/show/')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['retry-after'], '1')
+        self.assertEqual(server.counts['throttled'], 1)
+
+    def test_latency_and_jitter(self):
+        with FixtureServer(delay=0.05, jitter=0.02, seed=1) as server:
+            started = time.time()
+            self.statuses(server, 3)
+        self.assertTrue(time.time() - started >= 3 * 0.03)
+
+    def test_unknown_route(self):
+        with StubServer() as server:
+            self.assertEqual(self.statuses(server, 1), [404])
+
+if __name__ == '__main__':
+    unittest.main()
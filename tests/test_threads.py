@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_threads
+----------------------------------
+
+Stress tests sharing one `Goodreads` client between many threads.
+"""
+
+import threading
+import unittest
+
+from goodreads import goodreads
+from goodreads.cache import EntityCache
+from goodreads.metrics import MetricsRegistry
+from goodreads.ratelimit import RateLimiter
+
+from tests.stub import StubServer
+
+THREADS = 200
+
+
+def run_threads(target, count=THREADS):
+    """
+    Start `count` threads at once on target(i); the exceptions they raised.
+    """
+    errors = []
+    barrier = threading.Event()
+
+    def run(i):
+        barrier.wait()
+        try:
+            target(i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    barrier.set()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class TestSharedClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer().__enter__()
+        self.metrics = MetricsRegistry()
+        self.g = goodreads.Goodreads('key', 'secret', 'token', 'token_secret',
+                                     base_url=self.server.url,
+                                     rate_limiter=RateLimiter(1e6, 1000),
+                                     entity_cache=EntityCache(),
+                                     metrics=self.metrics, threads=THREADS)
+
+    def tearDown(self):
+        self.g.close()
+        self.server.__exit__()
+
+    def requests(self):
+        counters = self.metrics.snapshot()['counters']
+        return sum(v for k, v in counters.items() if k.startswith('requests'))
+
+    def test_mixed_endpoints(self):
+        calls = [
+            lambda: self.assertEqual(self.g.user(1000001).id, '1000001'),
+            lambda: self.assertEqual(self.g.author(2001).id, '2001'),
+            lambda: self.assertEqual(self.g.book(3001).id, 3001),
+            lambda: self.assertTrue(self.g.user_compare(1000002)),
+            lambda: self.assertEqual(len(list(self.g.user_notifications())),
+                                     2),
+        ]
+
+        def work(i):
+            calls[i % len(calls)]()
+            calls[(i + 1) % len(calls)]()
+
+        self.assertEqual(run_threads(work), [])
+        # every request the server saw was counted exactly once
+        self.assertEqual(self.requests(), self.server.counts['served'])
+
+    def test_credentials_replaced_under_load(self):
+        tokens = set()
+
+        def work(i):
+            if i % 50 == 0:
+                self.g.set_oauth_user('token%d' % i, 'secret%d' % i)
+            self.g.user_compare(1000002)
+            tokens.add(self.g.signer.token.key)
+
+        self.assertEqual(run_threads(work), [])
+        self.assertTrue(tokens <= set(['token'] + ['token%d' % i for i in
+                                                   range(0, THREADS, 50)]))
+
+
+class TestEntityCacheThreads(unittest.TestCase):
+
+    def test_concurrent_reads_and_writes(self):
+        cache = EntityCache(max_entries=50)
+
+        def work(i):
+            for j in range(100):
+                author = goodreads.GoodreadsAuthor(id=str((i + j) % 80))
+                cache.set(author)
+                cached = cache.get(goodreads.GoodreadsAuthor, author.id)
+                if cached is not None:
+                    self.assertEqual(cached.id, author.id)
+
+        self.assertEqual(run_threads(work, count=50), [])
+        self.assertEqual(len(cache), 50)
+        self.assertEqual(cache.bytes, sum(
+            entry[3] for entry in cache._entries.values()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_transport
+----------------------------------
+
+Tests for `transport` module.
+"""
+
+import unittest
+
+from goodreads import goodreads
+from goodreads.cache import CachedResponse
+from goodreads.ratelimit import RateLimiter
+from goodreads.transport import Transport
+
+
+class RecordingTransport(object):
+
+    def __init__(self):
+        self.calls = []
+        self.closed = False
+
+    def get(self, url, params=None, **kwargs):
+        self.calls.append(('GET', url, params))
+        return CachedResponse(url, 200, {}, '', 0)
+
+    def post(self, url, data=None, **kwargs):
+        self.calls.append(('POST', url, data))
+        return CachedResponse(url, 200, {}, '', 0)
+
+    def close(self):
+        self.closed = True
+
+
+class TestTransport(unittest.TestCase):
+
+    def test_pool_configuration(self):
+        t = Transport(pool_connections=2, pool_maxsize=7)
+        adapter = t.session.get_adapter('http://www.goodreads.com')
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 7)
+        self.assertEqual(t.session.headers['Connection'], 'keep-alive')
+        t.close()
+
+    def test_close_and_reopen(self):
+        t = Transport()
+        t.close()
+        self.assertTrue(t.closed)
+        t.open()
+        self.assertFalse(t.closed)
+        t.close()
+
+    def test_client_routes_through_transport(self):
+        t = RecordingTransport()
+        g = goodreads.Goodreads('key', 'secret', transport=t,
+                                rate_limiter=RateLimiter(100, 10))
+        g.dev_get('author/show.xml', {'id': 1})
+        g.dev_post('comment.xml', {'id': 2})
+        self.assertEqual(t.calls, [
+            ('GET', 'http://www.goodreads.com/author/show.xml',
+             {'id': 1, 'key': 'key'}),
+            ('POST', 'http://www.goodreads.com/comment.xml',
+             {'id': 2, 'key': 'key'}),
+        ])
+        g.close()
+        self.assertFalse(t.closed)
+
+    def test_client_closes_own_transport(self):
+        with goodreads.Goodreads('key', 'secret') as g:
+            transport = g.transport
+        self.assertTrue(transport.closed)
+
+if __name__ == '__main__':
+    unittest.main()